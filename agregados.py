@@ -0,0 +1,365 @@
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentacion
+from analisis_hashtags import explotar_hashtags
+from cargar_y_limpiar_datos import asignar_plataforma, inferir_sexo
+from duplicados import Deduplicador
+from frecuencia_palabras import ContadorPalabras
+from grafo_tareas import GrafoTareas, Nodo
+from indice_frecuencias import contar_hashtags
+from metricas_texto import metricas_texto, ResumenTexto
+from motor_agregacion import MotorAgregacion, METRICAS, DERIVADAS
+from muestreo import Aproximacion, CONFIANZA, escalar, intervalo_conteo, intervalo_media
+from regiones import OTRAS_REGIONES, REGIONES_TOP
+from series_tiempo import SeriesTiempo, DIMENSIONES
+from spam_cuentas import PuntuacionSpam
+
+
+# Etapa de instrumentacion en la que se mide cada paso de actualizar()
+ETAPAS = {
+    "palabras": instrumentacion.PALABRAS,
+    "hashtags": instrumentacion.HASHTAGS,
+    "agrupadas": instrumentacion.AGRUPADAS,
+    "series": instrumentacion.SERIES,
+    "spam": instrumentacion.SPAM,
+    "texto": instrumentacion.TEXTO,
+}
+
+# Lo que necesita cada sección (la 1, la carga, se hace siempre): pasos de
+# actualizar(), métricas agrupadas, dimensiones de las series, campos de
+# Resultados y columnas del CSV (además de 'Date').
+Necesidades = namedtuple("Necesidades", ["pasos", "metricas", "dimensiones", "campos", "columnas"])
+
+SECCIONES = {
+    2: Necesidades(("palabras",), (), (), ("word_freq",), ("Tweet",)),
+    3: Necesidades(("hashtags",), (), (), ("hashtag_freq",), ("Hashtags",)),
+    4: Necesidades(("series",), (), ("total",), ("tweets_por_dia", "picos_actividad"), ()),
+    5: Necesidades(("agrupadas",), ("sexo",), (), ("sexo_counts",), ("Name", "Tweet")),
+    6: Necesidades(("spam",), (), (), ("spam", "cuentas_spam"),
+                   ("Name", "Tweet", "Hashtags", "Followers", "Friends")),
+    7: Necesidades(("series",), (), ("region",), ("tweets_por_hora_region",), ("Place",)),
+    8: Necesidades(("agrupadas",), ("plataformas",), (), ("plataformas_counts",), ("Source", "Tweet")),
+    9: Necesidades(("agrupadas",), ("sexo_plataforma",), (), ("sexo_plataforma",), ("Name", "Source", "Tweet")),
+    10: Necesidades(("texto",), (), (), ("promedio_palabras", "resumen_texto"), ("Tweet",)),
+    11: Necesidades(("texto",), (), (), ("max_tweet", "min_tweet"), ("Tweet",)),
+    12: Necesidades(("agrupadas",), ("likes_sexo", "likes_region", "likes_plataforma"), (),
+                    ("likes_sexo", "likes_region", "likes_plataforma"), ("Name", "Place", "Source", "Likes")),
+}
+
+
+def columnas_de(secciones):
+    """Columnas del CSV que hay que leer para esas secciones."""
+    return sorted({columna for seccion in secciones for columna in SECCIONES[seccion].columnas})
+
+
+# Tweets con texto vistos y cuántos eran copias exactas o casi duplicados
+Duplicados = namedtuple("Duplicados", ["tweets", "exactos", "cercanos"])
+
+# Columnas que se añaden a los bloques; si un bloque ya las trae, no se calculan
+COLUMNAS_DERIVADAS = ("Sexo", "Plataforma", "Region")
+
+
+def _llamar_midiendo(nombre, funcion, *entradas):
+    if nombre not in ETAPAS:
+        return funcion(*entradas)
+    with instrumentacion.etapa(ETAPAS[nombre]) as medicion:
+        resultado = funcion(*entradas)
+        medicion.contar(len(entradas[0]))
+        return resultado
+
+
+class Resultados:
+    """Resultados de los doce análisis, listos para graficar o imprimir."""
+
+    def __init__(self, **resultados):
+        self.__dict__.update(resultados)
+
+
+class AgregadosTweets:
+    """Acumula los doce análisis bloque a bloque, sin guardar los tweets.
+
+    Cada bloque debe venir limpio (columnas 'Dia' y 'Hora_int'); 'Sexo',
+    'Plataforma' y 'Region' se calculan si no vienen. Las métricas
+    agrupadas (secciones 5, 8, 9 y 12) se declaran en motor_agregacion y se
+    calculan todas con unos pocos groupby por bloque que comparten claves;
+    los tweets por día y por hora (4 y 7) salen de los conteos por minuto de
+    series_tiempo; el spam (6) se puntúa por cuenta en spam_cuentas; las de
+    texto (10 y 11) salen de las columnas de metricas_texto, resumidas en
+    histogramas exactos. La memoria usada depende del número de palabras,
+    hashtags y grupos distintos, de minutos y de cuentas, no del número de
+    filas.
+
+    Cada columna derivada y cada paso es un nodo de un GrafoTareas con sus
+    entradas declaradas: con `secciones` sólo se calcula lo que esas
+    secciones necesitan (p. ej. sin la 5, 9 ni 12 no se infiere el sexo), y
+    las ramas independientes (sexo, plataforma, palabras...) pueden correr
+    a la vez en `hilos` hilos (por defecto 1, en orden; None, uno por
+    núcleo). Con cProfile o tracemalloc activos siempre van en orden (ver
+    instrumentacion.exclusiva).
+
+    `procesos` es el número de procesos para contar palabras (por defecto,
+    uno por núcleo); se crean al construir el objeto, antes de que haya
+    otros hilos. Si se pasa un `indice` (ver indice_frecuencias), las
+    palabras y hashtags no se cuentan aquí: se leen del índice, que ya está
+    al día. Si los bloques son de una `muestra` (ver muestreo), los
+    resultados se escalan a todos los datos y llevan sus intervalos de
+    confianza en 'aproximacion'.
+
+    Las series por minuto sólo guardan las dimensiones que usan las
+    secciones (el total y la región); `series` añade otras de DIMENSIONES,
+    p. ej. ("hashtag", "plataforma"), para consultarlas en `self.series`.
+
+    Con `deduplicar`, cada bloque pasa por un Deduplicador (ver duplicados):
+    las palabras y hashtags (2 y 3) cuentan cada contenido una sola vez,
+    sin retweets ni copias, y el spam (6) compara los grupos de contenido,
+    así que cuenta también los casi duplicados de una misma cuenta.
+    """
+
+    def __init__(self, procesos=None, indice=None, secciones=None, hilos=1, muestra=None, deduplicar=False,
+                 series=()):
+        self.indice = indice
+        self.muestra = muestra
+        self.deduplicador = Deduplicador(procesos) if deduplicar else None
+        self.secciones = tuple(SECCIONES) if secciones is None else tuple(secciones)
+        necesidades = [SECCIONES[seccion] for seccion in self.secciones]
+        pasos = {paso for n in necesidades for paso in n.pasos} | ({"series"} if series else set())
+        if indice is not None:
+            pasos -= {"palabras", "hashtags"}
+        self.objetivos = tuple(paso for paso in ETAPAS if paso in pasos)
+        metricas = {metrica for n in necesidades for metrica in n.metricas}
+        dimensiones = {dimension: columna for dimension, columna in DIMENSIONES.items()
+                       if dimension in series or any(dimension in n.dimensiones for n in necesidades)}
+
+        self.contador_palabras = ContadorPalabras(procesos)
+        self.motor = MotorAgregacion([m for m in METRICAS if m.nombre in metricas], dispersion=muestra is not None)
+        self.series = SeriesTiempo(dimensiones)
+        self.puntuacion_spam = PuntuacionSpam()
+        self.palabras = Counter()
+        self.hashtags = Counter()
+        self.texto = ResumenTexto()
+        self.tweet_max = None
+        self.tweet_min = None
+        self.grafo = self._grafo()
+        self.hilos = hilos or os.cpu_count() or 1
+        self._ejecutor = None
+        if "palabras" in self.objetivos:
+            self.contador_palabras.iniciar()
+        if self.deduplicador is not None:
+            self.deduplicador.iniciar()
+
+    def _grafo(self):
+        columnas_motor = {c for grupo in self.motor.plan for c in grupo}
+        columnas_series = [c for c in self.series.dimensiones.values() if c in COLUMNAS_DERIVADAS]
+        # Sin duplicados, palabras y hashtags usan sólo el primer tweet de cada grupo
+        unicos = "_unicos" if self.deduplicador is not None else ""
+        return GrafoTareas([
+            # Columnas derivadas de cada bloque
+            Nodo("tweets", ("bloque",), lambda df: df['Tweet'].dropna()),
+            Nodo("Sexo", ("bloque",), lambda df: inferir_sexo(df['Name'])),
+            Nodo("Plataforma", ("bloque",), lambda df: asignar_plataforma(df['Source'])),
+            Nodo("Region", ("bloque",), DERIVADAS["Region"]),
+            Nodo("explotado", ("bloque",), lambda df: explotar_hashtags(df['Hashtags'])),
+            Nodo("bloque_unicos", ("bloque",), lambda df: df[~df['Duplicado'].to_numpy()]),
+            Nodo("tweets_unicos", ("bloque_unicos",), lambda df: df['Tweet'].dropna()),
+            Nodo("explotado_unicos", ("bloque_unicos",), lambda df: explotar_hashtags(df['Hashtags'])),
+            # Pasos que acumulan cada análisis
+            Nodo("palabras", ("tweets" + unicos,), self._palabras),
+            Nodo("hashtags", ("bloque" + unicos, "explotado" + unicos), self._hashtags),
+            self._con_columnas("agrupadas", self._agrupadas,
+                               [c for c in COLUMNAS_DERIVADAS if c in columnas_motor]),
+            self._con_columnas("series", self._series, columnas_series,
+                               ("explotado",) if "Hashtag" in self.series.dimensiones.values() else ()),
+            Nodo("spam", ("bloque", "explotado"), self._spam),
+            Nodo("texto", ("bloque", "tweets"), self._texto),
+        ])
+
+    @staticmethod
+    def _con_columnas(nombre, paso, columnas, otras=()):
+        """Nodo de un paso que recibe el bloque con `columnas` derivadas añadidas."""
+        def ejecutar(df, *valores):
+            if columnas:
+                df = df.assign(**dict(zip(columnas, valores)))
+            return paso(df, *valores[len(columnas):])
+        return Nodo(nombre, ("bloque",) + tuple(columnas) + tuple(otras), ejecutar)
+
+    def _palabras(self, tweets):
+        # 2. Palabras más utilizadas
+        self.palabras.update(self.contador_palabras.contar(tweets))
+
+    def _hashtags(self, df, explotado):
+        # 3. Hashtags más utilizados
+        self.hashtags.update(contar_hashtags(df['Hashtags'], explotado))
+
+    def _agrupadas(self, df):
+        # 5, 8, 9 y 12. Métricas agrupadas
+        self.motor.actualizar(df)
+
+    def _series(self, df, explotado=None):
+        # 4 y 7. Tweets por minuto de cada región, plataforma y hashtag
+        self.series.actualizar(df, explotado)
+
+    def _spam(self, df, explotado):
+        # 6. Señales de spam por cuenta
+        self.puntuacion_spam.actualizar(df, explotado)
+
+    def _texto(self, df, tweets):
+        # 10. Palabras por tweet, longitud y demás métricas de texto
+        metricas = metricas_texto(tweets)
+        self.texto.actualizar(metricas)
+
+        # 11. Tweets más largos y más cortos (se conserva el primero en caso de empate)
+        if len(tweets):
+            longitud = metricas['Longitud']
+            fila_max = df.loc[longitud.idxmax()]
+            fila_min = df.loc[longitud.idxmin()]
+            if self.tweet_max is None or len(fila_max['Tweet']) > len(self.tweet_max['Tweet']):
+                self.tweet_max = fila_max
+            if self.tweet_min is None or len(fila_min['Tweet']) < len(self.tweet_min['Tweet']):
+                self.tweet_min = fila_min
+
+    def actualizar(self, df, llamar=_llamar_midiendo):
+        """Incorpora un bloque a todos los acumuladores.
+
+        `llamar(nombre, funcion, *entradas)` ejecuta cada nodo del grafo; por
+        defecto mide los pasos en su etapa de instrumentacion.
+        """
+        if self.deduplicador is not None:
+            # Las columnas 'Grupo' y 'Duplicado' se añaden a una copia, no al bloque de quien llama
+            df = self.deduplicador.marcar(df.copy(deep=False))
+        valores = {"bloque": df}
+        valores.update({columna: df[columna] for columna in COLUMNAS_DERIVADAS if columna in df})
+        if self.hilos > 1 and self._ejecutor is None:
+            self._ejecutor = ThreadPoolExecutor(self.hilos, thread_name_prefix="agregados")
+        ejecutor = None if instrumentacion.exclusiva() else self._ejecutor
+        self.grafo.ejecutar(self.objetivos, valores, ejecutor, llamar)
+
+    def cerrar(self):
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown()
+            self._ejecutor = None
+        self.contador_palabras.cerrar()
+        if self.deduplicador is not None:
+            self.deduplicador.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def word_freq(self, n=20):
+        if self.indice is not None:
+            return self.indice.palabras.top(n)
+        return self.palabras.most_common(n)
+
+    def hashtag_freq(self, n=20):
+        if self.indice is not None:
+            return self.indice.hashtags.top(n)
+        return self.hashtags.most_common(n)
+
+    def cuentas_spam(self):
+        return self.puntuacion_spam.cuentas()
+
+    @property
+    def spam(self):
+        return int(self.cuentas_spam()["es_spam"].sum())
+
+    def tweets_por_dia(self):
+        return self.series.serie("total", "D", completa=False).rename("count")
+
+    def sexo_counts(self):
+        sexo = self.motor.metrica("sexo")
+        return sexo.sort_values(ascending=False, kind="stable").rename("count")
+
+    def tweets_por_hora_region(self, k=REGIONES_TOP):
+        """Tweets por hora del día de las `k` regiones con más tweets.
+
+        Los lugares que no están en la tabla de regiones (OTRAS_REGIONES) no
+        compiten por el top.
+        """
+        regiones = self.series.principales("region", k, excluir=(OTRAS_REGIONES,))
+        return self.series.por_hora_del_dia("region", regiones).rename_axis(index='Place')
+
+    def picos_actividad(self, grano="min"):
+        return self.series.picos("total", grano)
+
+    def plataformas_counts(self):
+        plataformas = self.motor.metrica("plataformas")
+        return plataformas.sort_values(ascending=False, kind="stable").rename("count")
+
+    def sexo_plataforma_tabla(self):
+        return self.motor.metrica("sexo_plataforma").unstack().fillna(0)
+
+    def promedio_palabras(self):
+        return self.texto.histogramas['Palabras'].media()
+
+    def likes_sexo(self):
+        return self.motor.metrica("likes_sexo").rename('Likes')
+
+    def likes_region(self):
+        return self.motor.metrica("likes_region").rename('Likes').rename_axis('Place').sort_values(ascending=False)
+
+    def likes_plataforma(self):
+        return self.motor.metrica("likes_plataforma").rename('Likes')
+
+    def aproximacion(self, confianza=CONFIANZA):
+        """Tamaño de la muestra, usuarios distintos e intervalos de confianza."""
+        fraccion = self.muestra.fraccion
+        intervalos = {}
+        for metrica in self.motor.metricas:
+            if metrica.valor == "likes":
+                intervalo = intervalo_media(self.motor.error_media(metrica.nombre), fraccion, confianza)
+                intervalos[metrica.nombre] = intervalo.sort_values("media", ascending=False, kind="stable")
+            elif len(metrica.claves) == 1:
+                conteos = self.motor.metrica(metrica.nombre)
+                intervalos[metrica.nombre] = intervalo_conteo(conteos, fraccion, confianza).sort_values(
+                    "estimacion", ascending=False, kind="stable")
+        return Aproximacion(fraccion, self.muestra.filas, self.muestra.muestra, self.muestra.usuarios.estimar(),
+                            self.muestra.usuarios.error_relativo, intervalos)
+
+    def resultados(self, n=20):
+        """Todos los análisis en un solo objeto (top `n` de palabras y hashtags)."""
+        with instrumentacion.etapa(instrumentacion.RESULTADOS):
+            campos = {campo for seccion in self.secciones for campo in SECCIONES[seccion].campos}
+            calculos = {
+                "word_freq": lambda: self.word_freq(n),
+                "hashtag_freq": lambda: self.hashtag_freq(n),
+                "tweets_por_dia": self.tweets_por_dia,
+                "sexo_counts": self.sexo_counts,
+                "spam": lambda: int(resultados["cuentas_spam"]["es_spam"].sum()),
+                "cuentas_spam": self.cuentas_spam,
+                "tweets_por_hora_region": self.tweets_por_hora_region,
+                "picos_actividad": self.picos_actividad,
+                "plataformas_counts": self.plataformas_counts,
+                "sexo_plataforma": self.sexo_plataforma_tabla,
+                "promedio_palabras": self.promedio_palabras,
+                "max_tweet": lambda: self.tweet_max,
+                "min_tweet": lambda: self.tweet_min,
+                "resumen_texto": self.texto.resumen,
+                "likes_sexo": self.likes_sexo,
+                "likes_region": self.likes_region,
+                "likes_plataforma": self.likes_plataforma,
+            }
+            # Sólo los campos de las secciones pedidas; 'spam' usa 'cuentas_spam'
+            resultados = {}
+            for campo in sorted(campos, key=lambda c: c == "spam"):
+                resultados[campo] = calculos[campo]()
+            resultados = {campo: resultados[campo] for campo in calculos if campo in campos}
+            if self.deduplicador is not None:
+                resultados["duplicados"] = Duplicados(self.deduplicador.tweets, self.deduplicador.exactos,
+                                                      self.deduplicador.cercanos)
+            if self.muestra is not None:
+                resultados = escalar(resultados, self.muestra.fraccion)
+                resultados["aproximacion"] = self.aproximacion()
+            return Resultados(**resultados)
+
+
+def agregar_bloques(bloques):
+    """Recorre un iterable de bloques limpios y devuelve los agregados."""
+    agregados = AgregadosTweets()
+    with agregados:
+        for bloque in bloques:
+            agregados.actualizar(bloque)
+    return agregados
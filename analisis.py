@@ -0,0 +1,281 @@
+# Punto de entrada único de los análisis: recorre el CSV una sola vez y
+# muestra o guarda las secciones pedidas, en uno o varios estilos.
+#
+#   python analisis.py                                   # todo, en pantalla
+#   python analisis.py --secciones 2 3 7 --estilos porcentajes
+#   python analisis.py --salida reporte --estilos basico colores
+#
+# Los scripts data_analytics_*.py son atajos a este módulo con un estilo.
+import argparse
+import os
+from collections import namedtuple
+from functools import partial
+
+import graficos
+import instrumentacion
+from agregados import AgregadosTweets, columnas_de
+from cargar_y_limpiar_datos import iterar_bloques
+from graficos import ESTILOS
+from indice_frecuencias import MODOS, actualizar_indice
+from muestreo import MuestraEstratificada
+
+# Una sección del análisis: `graficas` son (nombre, título, función, campo
+# de Resultados) y `textos`, (título, función(resultados) -> texto, o None
+# si no aplica).
+Seccion = namedtuple("Seccion", ["numero", "titulo", "graficas", "textos"])
+
+ADVERTENCIA_SEXO = ("El análisis de sexo se basa en el primer nombre y puede tener un margen de error "
+                    "considerable, especialmente con nombres poco comunes, apodos o nombres ambiguos.")
+
+# Columnas de la tabla de cuentas que se muestran
+COLUMNAS_SPAM = ["tweets", "tasa", "proporcion_repetidos", "densidad_hashtags", "audiencia_baja", "puntuacion"]
+
+
+def _tabla(datos):
+    return datos.to_string(float_format="{:.2f}".format)
+
+
+def _texto_picos(resultados):
+    return _tabla(resultados.picos_actividad.head(10))
+
+
+def _texto_advertencia(resultados):
+    return ADVERTENCIA_SEXO
+
+
+def _texto_spam(resultados):
+    return str(resultados.spam)
+
+
+def _texto_cuentas_spam(resultados):
+    return _tabla(resultados.cuentas_spam.head(10)[COLUMNAS_SPAM])
+
+
+def _texto_promedio(resultados):
+    return f"{resultados.promedio_palabras:.2f}"
+
+
+def _texto_metricas(resultados):
+    return _tabla(resultados.resumen_texto)
+
+
+def _texto_max(resultados):
+    return resultados.max_tweet['Tweet']
+
+
+def _texto_min(resultados):
+    return resultados.min_tweet['Tweet']
+
+
+def _texto_likes_region(resultados):
+    return resultados.likes_region.head(10).to_string()
+
+
+def _texto_duplicados(resultados):
+    duplicados = getattr(resultados, "duplicados", None)
+    if duplicados is None:
+        return None
+    return (f"{duplicados.exactos} copias exactas y {duplicados.cercanos} casi duplicados de "
+            f"{duplicados.tweets} tweets no cuentan en palabras ni hashtags")
+
+
+def _aproximacion(resultados):
+    return getattr(resultados, "aproximacion", None)
+
+
+def _texto_muestra(resultados):
+    aproximacion = _aproximacion(resultados)
+    if aproximacion is None:
+        return None
+    return (f"{aproximacion.muestra} de {aproximacion.filas} tweets ({aproximacion.fraccion:.2%}); "
+            "los conteos están escalados a todos los datos")
+
+
+def _texto_usuarios(resultados):
+    aproximacion = _aproximacion(resultados)
+    if aproximacion is None:
+        return None
+    return f"{aproximacion.usuarios} (± {aproximacion.error_usuarios:.1%})"
+
+
+def _texto_intervalos(*metricas):
+    def texto(resultados):
+        aproximacion = _aproximacion(resultados)
+        if aproximacion is None:
+            return None
+        return "\n\n".join(_tabla(aproximacion.intervalos[metrica].head(10)) for metrica in metricas
+                            if metrica in aproximacion.intervalos)
+    return texto
+
+
+SECCIONES = (
+    Seccion(2, "Palabras más utilizadas",
+            [("palabras", "Palabras más comunes", graficos.grafica_palabras, "word_freq")],
+            [("Tweets repetidos", _texto_duplicados)]),
+    Seccion(3, "Hashtags más utilizados",
+            [("hashtags", "Hashtags más utilizados", graficos.grafica_hashtags, "hashtag_freq")], []),
+    Seccion(4, "Publicaciones por día",
+            [("tweets_por_dia", "Publicaciones por día", graficos.grafica_por_dia, "tweets_por_dia")],
+            [("Picos de actividad por minuto (Top 10)", _texto_picos),
+             ("Modo aproximado", _texto_muestra)]),
+    Seccion(5, "¿Qué sexo publica más?",
+            [("sexo", "¿Qué sexo publica más?", graficos.grafica_sexo, "sexo_counts")],
+            [("Advertencia", _texto_advertencia),
+             ("Intervalos de confianza (modo aproximado)", _texto_intervalos("sexo"))]),
+    Seccion(6, "Posible spam", [],
+            [("Usuarios potencialmente spam", _texto_spam),
+             ("Cuentas con mayor puntuación de spam (Top 10)", _texto_cuentas_spam),
+             ("Usuarios distintos (estimado)", _texto_usuarios)]),
+    Seccion(7, "Tweets por hora y región",
+            [("hora_region", "Tweets por hora y región", graficos.grafica_hora_region, "tweets_por_hora_region"),
+             ("hora_region_calor", "Mapa de calor por hora y región", graficos.grafica_calor_hora_region,
+              "tweets_por_hora_region")], []),
+    Seccion(8, "Plataforma más usada",
+            [("plataformas", "Plataforma más usada", graficos.grafica_plataformas, "plataformas_counts")],
+            [("Intervalos de confianza (modo aproximado)", _texto_intervalos("plataformas"))]),
+    Seccion(9, "Sexo vs plataforma",
+            [("sexo_plataforma", "Sexo vs plataforma", graficos.grafica_sexo_plataforma, "sexo_plataforma")], []),
+    Seccion(10, "Palabras promedio por tweet", [],
+            [("Promedio de palabras por tweet", _texto_promedio),
+             ("Métricas de texto por tweet", _texto_metricas)]),
+    Seccion(11, "Tweets más largos y más cortos", [],
+            [("Tweet más largo", _texto_max), ("Tweet más corto", _texto_min)]),
+    Seccion(12, "Likes promedio por sexo, región y plataforma",
+            [("likes_sexo", "Likes promedio por sexo", graficos.grafica_likes_sexo, "likes_sexo"),
+             ("likes_plataforma", "Likes promedio por plataforma", graficos.grafica_likes_plataforma,
+              "likes_plataforma")],
+            [("Likes promedio por región (Top 10)", _texto_likes_region),
+             ("Intervalos de confianza (modo aproximado)",
+              _texto_intervalos("likes_sexo", "likes_plataforma", "likes_region"))]),
+)
+
+NUMEROS = tuple(seccion.numero for seccion in SECCIONES)
+
+
+def secciones_de(numeros=None):
+    """Secciones con esos números (todas si es None), en orden."""
+    if numeros is None:
+        return SECCIONES
+    desconocidos = set(numeros) - set(NUMEROS)
+    if desconocidos:
+        raise ValueError(f"Secciones desconocidas: {sorted(desconocidos)} (hay {list(NUMEROS)})")
+    return tuple(seccion for seccion in SECCIONES if seccion.numero in numeros)
+
+
+def calcular(file_path="mundial_tweets.csv", backend="pandas", secciones=None, desde=None, hasta=None,
+             fraccion=None, modo_indice="exacto", hilos=1, deduplicar=False):
+    """Recorre el CSV una vez y devuelve los Resultados de los análisis.
+
+    Con `secciones`, sólo se leen las columnas y se calcula lo que esas
+    secciones necesitan (ver agregados.SECCIONES). Con `desde`/`hasta`
+    (fechas inclusivas), sólo se leen esos días: del dataset particionado,
+    si limpieza_tweets lo guardó. Con una `fraccion` (modo aproximado), los
+    análisis se hacen sobre una muestra estratificada por día y lugar,
+    elegida antes de limpiar las filas, y los resultados llevan sus
+    intervalos de confianza (ver muestreo). Las palabras y hashtags de todo
+    el CSV salen del índice persistente (ver indice_frecuencias), exacto o,
+    con modo_indice="space_saving", de memoria fija. Con `deduplicar`, las
+    palabras y hashtags cuentan cada contenido una vez, sin retweets, copias
+    ni casi duplicados (ver duplicados). `hilos` es el de AgregadosTweets.
+    Con backend="duckdb" los análisis se hacen en SQL sobre una base local
+    (ver backend_sql), sin cargar los datos en memoria.
+    """
+    if backend == "duckdb":
+        if desde is not None or hasta is not None or fraccion is not None or deduplicar:
+            raise ValueError("El backend duckdb no filtra por fechas, no muestrea ni quita duplicados; "
+                             "usa el de pandas")
+        from backend_sql import ConsultasSQL
+
+        with ConsultasSQL(file_path) as consultas, instrumentacion.etapa(instrumentacion.CONSULTAS_SQL):
+            return consultas.resultados()
+    secciones = None if secciones is None else [seccion.numero for seccion in secciones_de(secciones)]
+    columnas = None if secciones is None else columnas_de(secciones)
+    if columnas is not None and deduplicar:
+        columnas = sorted(set(columnas) | {"Tweet"})
+    muestra = None if fraccion is None else MuestraEstratificada(fraccion)
+    # El índice de frecuencias cuenta todo el CSV: con fechas, muestra o sin duplicados se cuenta aquí
+    necesita_indice = secciones is None or {2, 3} & set(secciones)
+    necesita_indice = necesita_indice and desde is None and hasta is None and muestra is None and not deduplicar
+    indice = actualizar_indice(file_path, modo=modo_indice) if necesita_indice else None
+    with AgregadosTweets(indice=indice, secciones=secciones, hilos=hilos, muestra=muestra,
+                         deduplicar=deduplicar) as agregados:
+        for bloque in iterar_bloques(file_path, desde=desde, hasta=hasta, columnas=columnas, muestra=muestra):
+            agregados.actualizar(bloque)
+    return agregados.resultados()
+
+
+def graficas(resultados, secciones=None, estilo="basico"):
+    """Lista de (nombre, título, función(datos), datos) de las secciones pedidas."""
+    if estilo not in ESTILOS:
+        raise ValueError(f"Estilo desconocido: '{estilo}' (hay {list(ESTILOS)})")
+    return [
+        (nombre, titulo, partial(funcion, estilo=estilo), getattr(resultados, campo))
+        for seccion in secciones_de(secciones)
+        for nombre, titulo, funcion, campo in seccion.graficas
+    ]
+
+
+def textos(resultados, secciones=None):
+    """Lista de (título, texto) de las secciones pedidas."""
+    lista = [(titulo, funcion(resultados)) for seccion in secciones_de(secciones)
+             for titulo, funcion in seccion.textos]
+    return [(titulo, texto) for titulo, texto in lista if texto is not None]
+
+
+def mostrar(resultados, secciones=None, estilo="basico"):
+    """Muestra las secciones en pantalla, una gráfica tras otra, como los scripts."""
+    import matplotlib.pyplot as plt
+
+    graficos.configurar()
+    for seccion in secciones_de(secciones):
+        print(f"\n=== {seccion.numero}. {seccion.titulo} ===")
+        for _, _, funcion, datos in graficas(resultados, [seccion.numero], estilo):
+            plt.figure()
+            funcion(datos)
+            plt.tight_layout()
+            plt.show()
+        for titulo, texto in textos(resultados, [seccion.numero]):
+            print(f"{titulo}:\n{texto}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Análisis de los tweets del Mundial.")
+    parser.add_argument("--csv", default="mundial_tweets.csv", help="archivo de tweets")
+    parser.add_argument("--secciones", nargs="+", type=int, choices=NUMEROS, default=None,
+                        help="secciones a producir (por defecto, todas)")
+    parser.add_argument("--estilos", nargs="+", choices=ESTILOS, default=["basico"],
+                        help="estilos de las gráficas; con --salida, una carpeta por estilo")
+    parser.add_argument("--salida", default=None,
+                        help="carpeta del reporte (sin ella, las gráficas se muestran en pantalla)")
+    parser.add_argument("--formatos", nargs="+", default=["png"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--procesos", type=int, default=None, help="procesos para el render")
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "duckdb"],
+                        help="motor de los análisis (duckdb necesita el paquete 'duckdb')")
+    parser.add_argument("--desde", default=None, help="primer día a analizar (AAAA-MM-DD)")
+    parser.add_argument("--hasta", default=None, help="último día a analizar (AAAA-MM-DD)")
+    parser.add_argument("--muestra", type=float, default=None, metavar="FRACCION",
+                        help="modo aproximado: analizar esa fracción de los tweets (p. ej. 0.01)")
+    parser.add_argument("--indice", default="exacto", choices=MODOS,
+                        help="índice de palabras y hashtags: exacto o space_saving (memoria fija)")
+    parser.add_argument("--hilos", type=int, default=1,
+                        help="hilos para los pasos independientes de cada bloque (0 = uno por núcleo)")
+    parser.add_argument("--sin-duplicados", action="store_true",
+                        help="contar palabras y hashtags sin retweets, copias ni casi duplicados")
+    args = parser.parse_args(argumentos)
+
+    resultados = calcular(args.csv, args.backend, args.secciones, args.desde, args.hasta, args.muestra,
+                          args.indice, args.hilos, args.sin_duplicados)
+    for estilo in args.estilos:
+        if args.salida is None:
+            mostrar(resultados, args.secciones, estilo)
+            continue
+        # reporte_batch importa este módulo: se importa aquí para no formar un ciclo
+        from reporte_batch import escribir_reporte
+
+        salida = os.path.join(args.salida, estilo) if len(args.estilos) > 1 else args.salida
+        escribir_reporte(resultados, salida, tuple(args.formatos), args.procesos, args.secciones, estilo)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import pandas as pd
+
+from cargar_y_limpiar_datos import dia_a_fecha, SIN_FECHA
+
+
+def explotar_hashtags(hashtags):
+    """Una fila por hashtag usado: 'fila' (índice del tweet) y 'Hashtag'.
+
+    'Hashtag' es categórico, con las categorías en orden de primera
+    aparición, así que cada texto se guarda una sola vez y los conteos
+    salen en el mismo orden que con un Counter. Con pyarrow, el separado y
+    la codificación se hacen sin crear una lista de Python por tweet.
+    """
+    try:
+        filas, codigos, categorias = _explotar_arrow(hashtags)
+    except ImportError:
+        filas, codigos, categorias = _explotar_pandas(hashtags)
+    return pd.DataFrame({
+        "fila": filas,
+        "Hashtag": pd.Categorical.from_codes(codigos, categorias),
+    })
+
+
+def _explotar_arrow(hashtags):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    texto = pa.array(hashtags.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    listas = pc.split_pattern(pc.utf8_lower(texto), ", ")
+    padres = pc.list_parent_indices(listas)
+    planos = pc.list_flatten(listas)
+    validos = pc.not_equal(planos, "")
+    codificado = pc.dictionary_encode(planos.filter(validos))
+    filas = hashtags.index.to_numpy()[padres.filter(validos).to_numpy()]
+    return filas, codificado.indices.to_numpy(), codificado.dictionary.to_pylist()
+
+
+def _explotar_pandas(hashtags):
+    listas = hashtags.dropna().astype(str).str.lower().str.split(', ')
+    explotado = listas.explode()
+    explotado = explotado[explotado.notna() & (explotado != "")]
+    codigos, categorias = pd.factorize(explotado)
+    return explotado.index.to_numpy(), codigos, categorias
+
+
+def contar(explotado):
+    """Número de usos de cada hashtag, en orden de primera aparición."""
+    return explotado["Hashtag"].value_counts(sort=False)
+
+
+def top_hashtags(explotado, n=20):
+    """Los `n` hashtags más usados como lista de (hashtag, frecuencia)."""
+    conteo = contar(explotado).sort_values(ascending=False, kind="stable")
+    return list(conteo.head(n).items())
+
+
+def unir(explotado, df, columnas):
+    """Añade a cada hashtag columnas de su tweet (p. ej. 'Dia', 'Plataforma')."""
+    datos = df.loc[explotado["fila"].to_numpy(), columnas].reset_index(drop=True)
+    return pd.concat([explotado.reset_index(drop=True), datos], axis=1)
+
+
+def por_grupo(explotado, df, columna, n=None):
+    """Tabla hashtag x valores de `columna` (p. ej. 'Plataforma' o 'Sexo')."""
+    unido = unir(_limitar(explotado, n), df, [columna])
+    return unido.groupby(["Hashtag", columna], observed=True).size().unstack(fill_value=0)
+
+
+def tendencia_diaria(explotado, df, n=10):
+    """Usos por día de los `n` hashtags más usados (días x hashtags)."""
+    unido = unir(_limitar(explotado, n), df, ["Dia", "Hora_int"])
+    unido = unido[unido["Hora_int"] != SIN_FECHA]
+    tabla = unido.groupby(["Dia", "Hashtag"], observed=True).size().unstack(fill_value=0)
+    tabla.index = dia_a_fecha(tabla.index).rename("Fecha")
+    return tabla
+
+
+def coocurrencias(explotado, n=None):
+    """Pares de hashtags que aparecen en el mismo tweet, con su frecuencia.
+
+    Con `n` sólo se consideran los `n` hashtags más usados, lo que limita el
+    número de pares posibles.
+    """
+    limitado = _limitar(explotado, n)
+    pares = pd.DataFrame({
+        "fila": limitado["fila"].to_numpy(),
+        "codigo": limitado["Hashtag"].cat.codes.to_numpy(),
+    }).drop_duplicates()
+    cruzado = pares.merge(pares, on="fila", suffixes=("_a", "_b"))
+    cruzado = cruzado[cruzado["codigo_a"] < cruzado["codigo_b"]]
+    conteo = cruzado.groupby(["codigo_a", "codigo_b"]).size().sort_values(ascending=False, kind="stable")
+    categorias = limitado["Hashtag"].cat.categories
+    return pd.DataFrame({
+        "Hashtag_a": categorias.take(conteo.index.get_level_values(0)),
+        "Hashtag_b": categorias.take(conteo.index.get_level_values(1)),
+        "Frecuencia": conteo.to_numpy(),
+    })
+
+
+def _limitar(explotado, n):
+    """Deja sólo los usos de los `n` hashtags más frecuentes (todos si n es None)."""
+    if n is None:
+        return explotado
+    conteo = contar(explotado)
+    principales = conteo.sort_values(ascending=False, kind="stable").index[:n]
+    mascara = explotado["Hashtag"].isin(principales)
+    limitado = explotado[mascara].copy()
+    limitado["Hashtag"] = limitado["Hashtag"].cat.remove_unused_categories()
+    return limitado
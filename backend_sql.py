@@ -0,0 +1,341 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from agregados import Resultados
+from cache_limpio import cache_vigente, clave_archivo, guardar_clave
+from cargar_y_limpiar_datos import iterar_bloques, enriquecer_bloque, dia_a_fecha, instantes, SIN_FECHA, TAMANO_BLOQUE
+from inferencia_sexo import CATEGORIAS_SEXO
+from metricas_texto import metricas_texto, ResumenTexto
+from plataformas import categorias_plataforma
+from recursos_locales import cargar_stopwords
+from regiones import normalizar_regiones, regiones_conocidas, OTRAS_REGIONES, REGIONES_TOP, SIN_REGION
+from series_tiempo import DIMENSIONES, SeriesTiempo
+from spam_cuentas import puntuar
+
+# Se incrementa cada vez que cambia la tabla, para regenerar las bases antiguas
+VERSION_BASE = 3
+
+# Columnas de la tabla 'tweets'. 'fila' es la posición en el CSV y decide los
+# empates igual que el orden de aparición en el camino con pandas.
+_TABLA = """
+CREATE TABLE tweets (
+    fila BIGINT,
+    Instante BIGINT,
+    Dia INTEGER,
+    Hora_int TINYINT,
+    Name VARCHAR,
+    Place VARCHAR,
+    Region VARCHAR,
+    Sexo VARCHAR,
+    Plataforma VARCHAR,
+    Followers UINTEGER,
+    Friends UINTEGER,
+    Likes UINTEGER,
+    Tweet VARCHAR,
+    Hashtags VARCHAR,
+    Longitud INTEGER,
+    Palabras SMALLINT,
+    Hashtags_n SMALLINT,
+    Menciones SMALLINT,
+    URLs SMALLINT,
+    Emojis SMALLINT
+)
+"""
+
+# RE2 (el motor de expresiones de DuckDB) sólo entiende \w como ASCII; con
+# las clases Unicode se obtienen las mismas palabras que `\w+` en Python.
+_PALABRA = r"[\pL\pN_]+"
+
+
+def ruta_base(file_path):
+    """Ruta de la base DuckDB asociada a un CSV."""
+    base, _ = os.path.splitext(file_path)
+    return base + "_analisis.duckdb"
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("El backend SQL necesita el paquete 'duckdb' (pip install duckdb)") from e
+    return duckdb
+
+
+def construir_base(file_path="mundial_tweets.csv", ruta=None, tamano_bloque=TAMANO_BLOQUE):
+    """Carga los tweets limpios y enriquecidos en una base DuckDB.
+
+    Sexo, plataforma y métricas de texto se calculan con el mismo código
+    que el camino con pandas y se guardan como columnas, así que las
+    consultas sólo agrupan. Se escribe a un archivo temporal que se
+    renombra al terminar.
+    """
+    duckdb = _duckdb()
+    ruta = ruta or ruta_base(file_path)
+    temporal = ruta + ".tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    # Antes de leer, como en la caché (ver guardar_clave)
+    clave = clave_archivo(file_path, VERSION_BASE)
+    con = duckdb.connect(temporal)
+    try:
+        con.execute(_TABLA)
+        con.execute("CREATE TABLE stopwords (palabra VARCHAR PRIMARY KEY)")
+        con.executemany("INSERT INTO stopwords VALUES (?)", [[p] for p in sorted(cargar_stopwords())])
+        for bloque in iterar_bloques(file_path, tamano_bloque):
+            bloque = enriquecer_bloque(bloque)
+            instante, valido = instantes(bloque["Date"])
+            datos = pd.concat([
+                pd.DataFrame({
+                    "fila": bloque.index.to_numpy(),
+                    "Instante": pd.arrays.IntegerArray(instante, ~valido),
+                }, index=bloque.index),
+                bloque[["Dia", "Hora_int", "Name", "Place"]],
+                normalizar_regiones(bloque["Place"]).astype(object),
+                bloque[["Sexo", "Plataforma", "Followers", "Friends", "Likes", "Tweet", "Hashtags"]],
+                metricas_texto(bloque["Tweet"]),
+            ], axis=1)
+            con.register("bloque", datos)
+            con.execute("INSERT INTO tweets SELECT * FROM bloque")
+            con.unregister("bloque")
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    os.replace(temporal, ruta)
+    guardar_clave(ruta, clave)
+    return ruta
+
+
+class ConsultasSQL:
+    """Los doce análisis como consultas SQL sobre la base DuckDB.
+
+    Devuelve lo mismo que AgregadosTweets (mismos valores, orden e
+    índices), de modo que las gráficas no cambian. DuckDB ejecuta las
+    consultas en paralelo y, con `memoria` (p. ej. "2GB"), usa disco para
+    lo que no quepa en ella, así que la tabla no tiene que caber en RAM.
+    """
+
+    def __init__(self, file_path="mundial_tweets.csv", ruta=None, memoria=None, hilos=None):
+        duckdb = _duckdb()
+        ruta = ruta or ruta_base(file_path)
+        if not cache_vigente(file_path, ruta, VERSION_BASE):
+            construir_base(file_path, ruta)
+        self.con = duckdb.connect(ruta, read_only=True)
+        if memoria:
+            self.con.execute(f"SET memory_limit = '{memoria}'")
+        if hilos:
+            self.con.execute(f"SET threads = {int(hilos)}")
+
+    def _consulta(self, sql, *parametros):
+        return self.con.execute(sql, list(parametros)).df()
+
+    def cerrar(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _frecuencias(self, terminos, n):
+        # `orden` es la primera aparición (fila y posición dentro del tweet)
+        # y deshace los empates como Counter.most_common
+        df = self._consulta(f"""
+            SELECT termino, count(*) AS n
+            FROM ({terminos})
+            GROUP BY termino
+            ORDER BY n DESC, min(orden)
+            LIMIT ?""", n)
+        return list(zip(df["termino"], df["n"].tolist()))
+
+    def word_freq(self, n=20):
+        terminos = f"""
+            SELECT unnest(lista) AS termino, fila * 1000000 + unnest(range(len(lista))) AS orden
+            FROM (SELECT fila, regexp_extract_all(lower(Tweet), '{_PALABRA}') AS lista
+                  FROM tweets WHERE Tweet IS NOT NULL)"""
+        return self._frecuencias(f"""
+            SELECT * FROM ({terminos})
+            WHERE length(termino) > 3 AND termino NOT IN (SELECT palabra FROM stopwords)""", n)
+
+    def hashtag_freq(self, n=20):
+        terminos = """
+            SELECT unnest(lista) AS termino, fila * 1000000 + unnest(range(len(lista))) AS orden
+            FROM (SELECT fila, string_split(lower(Hashtags), ', ') AS lista
+                  FROM tweets WHERE Hashtags IS NOT NULL)"""
+        return self._frecuencias(f"SELECT * FROM ({terminos}) WHERE termino <> ''", n)
+
+    def _conteo(self, columna, categorias):
+        df = self._consulta(f"""
+            SELECT {columna}, count(*) AS n FROM tweets
+            WHERE {columna} IS NOT NULL GROUP BY {columna}""")
+        conteo = pd.Series(df["n"].to_numpy(), index=pd.CategoricalIndex(
+            df[columna], categories=categorias, name=columna), name="count")
+        return conteo.sort_index().sort_values(ascending=False, kind="stable")
+
+    def cuentas_spam(self):
+        """Señales por cuenta agregadas en SQL y puntuadas como en spam_cuentas.
+
+        Un tweet repetido es un texto que la cuenta ya había publicado; las
+        cuentas quedan en orden de primera aparición antes de ordenar por
+        puntuación, igual que en PuntuacionSpam.
+        """
+        cuentas = self._consulta("""
+            SELECT Name,
+                   count(*) AS tweets,
+                   count(Tweet) - count(DISTINCT Tweet) AS repetidos,
+                   min(Instante) AS inicio,
+                   max(Instante) AS fin,
+                   max(Followers)::DOUBLE AS followers,
+                   max(Friends)::DOUBLE AS friends,
+                   coalesce(sum(len(list_filter(string_split(Hashtags, ', '), h -> h <> ''))), 0) AS hashtags
+            FROM tweets WHERE Name IS NOT NULL
+            GROUP BY Name ORDER BY min(fila)""").set_index("Name")
+        cuentas.index = cuentas.index.astype(object)
+        return puntuar(cuentas.astype({"tweets": "int64", "repetidos": "int64", "hashtags": "int64",
+                                       "inicio": "Int64", "fin": "Int64"}))
+
+    @property
+    def spam(self):
+        return int(self.cuentas_spam()["es_spam"].sum())
+
+    def tweets_por_dia(self):
+        df = self._consulta(f"""
+            SELECT Dia, count(*) AS n FROM tweets
+            WHERE Hora_int <> {SIN_FECHA} GROUP BY Dia ORDER BY Dia""")
+        return pd.Series(df["n"].to_numpy(), index=dia_a_fecha(df["Dia"]).rename("Fecha"), name="count")
+
+    def sexo_counts(self):
+        return self._conteo("Sexo", CATEGORIAS_SEXO)
+
+    def series_tiempo(self, dimensiones=None):
+        """Conteos por minuto agregados en SQL, como los de SeriesTiempo.
+
+        Con `dimensiones` (p. ej. ["total"]) sólo se consultan esas; cada
+        una es un GROUP BY sobre toda la tabla.
+        """
+        dimensiones = DIMENSIONES if dimensiones is None else dimensiones
+        minuto = "Instante // 60000000000"
+        claves = {
+            # Como ACOTAR en series_tiempo: los lugares fuera de la tabla, juntos
+            "region": f"CASE WHEN list_contains(?, Region) THEN Region ELSE '{OTRAS_REGIONES}' END",
+            "plataforma": "Plataforma",
+            "hashtag": "unnest(list_filter(string_split(lower(Hashtags), ', '), h -> h <> ''))",
+        }
+        conteos = {}
+        if "total" in dimensiones:
+            total = self._consulta(f"""
+                SELECT {minuto} AS minuto, count(*) AS n FROM tweets
+                WHERE Instante IS NOT NULL GROUP BY ALL""")
+            conteos["total"] = total.set_index("minuto")["n"].rename_axis("minuto")
+        for dimension, clave in claves.items():
+            if dimension not in dimensiones:
+                continue
+            parametros = [list(regiones_conocidas())] if dimension == "region" else []
+            df = self._consulta(f"""
+                SELECT clave, minuto, count(*) AS n
+                FROM (SELECT {clave}::VARCHAR AS clave, {minuto} AS minuto FROM tweets
+                      WHERE Instante IS NOT NULL)
+                WHERE clave IS NOT NULL GROUP BY ALL""", *parametros)
+            df["clave"] = df["clave"].astype(object)
+            conteos[dimension] = df.set_index(["clave", "minuto"])["n"]
+        return SeriesTiempo.desde_conteos(conteos)
+
+    def tweets_por_hora_region(self, k=REGIONES_TOP):
+        """Tweets por hora del día de las `k` regiones con más tweets.
+
+        El orden de las regiones (más tweets primero, empates por nombre) es
+        el de SeriesTiempo.principales; los lugares que no están en la tabla
+        de regiones no entran, como en AgregadosTweets.
+        """
+        df = self._consulta(f"""
+            WITH principales AS (
+                SELECT Region, row_number() OVER (ORDER BY count(*) DESC, Region) AS orden
+                FROM tweets WHERE Hora_int <> {SIN_FECHA} AND list_contains(?, Region) GROUP BY Region
+                ORDER BY orden LIMIT ?)
+            SELECT p.Region AS Place, t.Hora_int, count(*) AS n
+            FROM tweets t JOIN principales p USING (Region)
+            WHERE t.Hora_int <> {SIN_FECHA} GROUP BY ALL ORDER BY min(p.orden), t.Hora_int""", list(regiones_conocidas()), k)
+        regiones = list(dict.fromkeys(df["Place"]))
+        tabla = df.set_index(["Place", "Hora_int"])["n"].unstack(fill_value=0)
+        return tabla.reindex(index=regiones, columns=range(24), fill_value=0).rename_axis(columns="Hora_int")
+
+    def plataformas_counts(self):
+        return self._conteo("Plataforma", categorias_plataforma())
+
+    def sexo_plataforma_tabla(self):
+        df = self._consulta("""
+            SELECT Plataforma, Sexo, count(Tweet) AS n FROM tweets
+            WHERE Plataforma IS NOT NULL AND Sexo IS NOT NULL GROUP BY ALL""")
+        indice = pd.MultiIndex.from_arrays([
+            pd.Categorical(df["Plataforma"], categories=categorias_plataforma()),
+            pd.Categorical(df["Sexo"], categories=CATEGORIAS_SEXO),
+        ], names=["Plataforma", "Sexo"])
+        return pd.Series(df["n"].to_numpy(), index=indice).sort_index().unstack().fillna(0)
+
+    def resumen_texto(self):
+        """Histogramas de las métricas de texto calculados en la base."""
+        resumen = ResumenTexto()
+        for columna, histograma in resumen.histogramas.items():
+            df = self._consulta(f"""
+                SELECT {columna} AS valor, count(*) AS n FROM tweets
+                WHERE Tweet IS NOT NULL GROUP BY ALL""")
+            valores = df["valor"].to_numpy()
+            histograma.conteos = np.zeros(valores.max() + 1 if len(valores) else 0, dtype=np.int64)
+            histograma.conteos[valores] = df["n"].to_numpy()
+        return resumen
+
+    def promedio_palabras(self, resumen=None):
+        return (resumen or self.resumen_texto()).histogramas["Palabras"].media()
+
+    def _tweet_extremo(self, orden):
+        fila = self._consulta(f"""
+            SELECT * FROM tweets WHERE Tweet IS NOT NULL
+            ORDER BY Longitud {orden}, fila LIMIT 1""")
+        return fila.set_index("fila").iloc[0]
+
+    def _media_likes(self, columna, expresion=None, categorias=None):
+        expresion = expresion or columna
+        df = self._consulta(f"""
+            SELECT {expresion} AS clave, sum(Likes)::DOUBLE AS suma, count(Likes) AS n FROM tweets
+            WHERE {expresion} IS NOT NULL GROUP BY ALL ORDER BY clave""")
+        indice = (pd.CategoricalIndex(df["clave"], categories=categorias, name=columna)
+                  if categorias else pd.Index(df["clave"], name=columna))
+        media = pd.Series((df["suma"] / df["n"]).to_numpy(), index=indice, name="Likes")
+        return media.sort_index()
+
+    def likes_sexo(self):
+        return self._media_likes("Sexo", categorias=CATEGORIAS_SEXO)
+
+    def likes_region(self):
+        # Por 'Place' sin normalizar, como en el análisis original
+        media = self._media_likes("Place", f"coalesce(Place, '{SIN_REGION}')")
+        return media.sort_values(ascending=False)
+
+    def likes_plataforma(self):
+        return self._media_likes("Plataforma", categorias=categorias_plataforma())
+
+    def resultados(self, n=20):
+        """Todos los análisis en un solo objeto, como AgregadosTweets.resultados()."""
+        resumen = self.resumen_texto()
+        cuentas = self.cuentas_spam()
+        return Resultados(
+            word_freq=self.word_freq(n),
+            hashtag_freq=self.hashtag_freq(n),
+            tweets_por_dia=self.tweets_por_dia(),
+            sexo_counts=self.sexo_counts(),
+            spam=int(cuentas["es_spam"].sum()),
+            cuentas_spam=cuentas,
+            tweets_por_hora_region=self.tweets_por_hora_region(),
+            picos_actividad=self.series_tiempo(["total"]).picos("total", "min"),
+            plataformas_counts=self.plataformas_counts(),
+            sexo_plataforma=self.sexo_plataforma_tabla(),
+            promedio_palabras=self.promedio_palabras(resumen),
+            max_tweet=self._tweet_extremo("DESC"),
+            min_tweet=self._tweet_extremo("ASC"),
+            resumen_texto=resumen.resumen(),
+            likes_sexo=self.likes_sexo(),
+            likes_region=self.likes_region(),
+            likes_plataforma=self.likes_plataforma(),
+        )
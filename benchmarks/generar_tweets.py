@@ -0,0 +1,143 @@
+# Genera un CSV sintético con las columnas del dataset del Mundial, siempre
+# igual para la misma semilla y el mismo número de filas:
+#
+#   python benchmarks/generar_tweets.py --filas 1m --salida benchmarks/datos/tweets_1m.csv
+#
+# Las distribuciones imitan las del dataset real: pocos clientes y lugares
+# muy repetidos, nombres con y sin apellido, conteos con cola larga, nulos
+# en 'Place', 'Hashtags' y los conteos, y algunas fechas no válidas. Algunos
+# tweets llevan comas, comillas o saltos de línea, así que en el CSV van
+# entre comillas y ocupan varias líneas, como en el original.
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+TAMANOS = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+SEMILLA = 2022
+FILAS_POR_BLOQUE = 100_000
+
+INICIO = pd.Timestamp("2022-11-20", tz="UTC")
+DURACION_S = 29 * 24 * 3600
+
+PALABRAS = (
+    "el la de que y en los por para con una gol golazo partido final mundial "
+    "qatar argentina francia brasil españa méxico croacia marruecos selección "
+    "messi mbappé neymar modric penal penales árbitro var tarjeta roja amarilla "
+    "campeones ganamos vamos hinchada estadio jugada remate portero defensa "
+    "historia increíble emoción copa trofeo grupo octavos cuartos semifinal "
+    "minuto tiempo alargue festejo camiseta afición banderas lusail doha"
+).split()
+EMOJIS = ["⚽", "🏆", "🔥", "😭", "🇦🇷", "🇫🇷", "👏", "💙", "🙌", "⭐"]
+HASHTAGS = ["Qatar2022", "FIFAWorldCup", "Messi", "ARG", "FRA", "Mundial2022", "VamosArgentina",
+            "Mbappe", "WorldCupFinal", "BRA", "ESP", "MEX", "CRO", "MAR", "Scaloneta"]
+NOMBRES = ["Juan", "María", "Lucía", "Carlos", "Sofía", "Diego", "Valentina", "Mateo", "Camila",
+           "Alex", "Andrea", "José", "Ana", "Luis", "Paula", "Jordan", "Kim", "Lionel", "Fernanda",
+           "Santiago", "Martina", "Pedro", "Laura", "xXgamerXx", "elTano10", "Ale"]
+APELLIDOS = ["Pérez", "López", "García", "Rodríguez", "Martínez", "Gómez", "Fernández", "Ruiz", "Díaz"]
+FUENTES = ["Twitter for iPhone", "Twitter for Android", "Twitter Web App", "Twitter for iPad",
+           "TweetDeck", "Hootsuite Inc.", "Instagram", "android web"]
+PESOS_FUENTES = [0.38, 0.40, 0.12, 0.04, 0.02, 0.02, 0.01, 0.01]
+LUGARES = ["Buenos Aires, Argentina", "Argentina", "CABA", "Córdoba, Argentina", "Rosario",
+           "Madrid", "Barcelona", "España", "Ciudad de México", "CDMX", "Guadalajara",
+           "Doha, Qatar", "Lima, Perú", "Bogotá, Colombia", "Santiago, Chile", "Montevideo",
+           "Caracas", "Quito", "Paris, France", "Miami, FL"]
+
+
+def _elegir(rng, valores, n, pesos=None):
+    return np.asarray(valores, dtype=object)[rng.choice(len(valores), n, p=pesos)]
+
+
+def _tweets(rng, n):
+    longitudes = rng.integers(3, 30, n)
+    palabras = _elegir(rng, PALABRAS, int(longitudes.sum()))
+    cortes = np.cumsum(longitudes)[:-1]
+    textos = [" ".join(trozo) for trozo in np.split(palabras, cortes)]
+    extras = rng.random((n, 4))
+    tweets = []
+    for i, texto in enumerate(textos):
+        if extras[i, 0] < 0.3:
+            texto += " #" + HASHTAGS[i % len(HASHTAGS)]
+        if extras[i, 1] < 0.15:
+            texto = f"@usuario{i % 997} " + texto
+        if extras[i, 2] < 0.25:
+            texto += " " + EMOJIS[i % len(EMOJIS)] * (1 + i % 3)
+        if extras[i, 2] > 0.9:
+            texto += f" https://t.co/{i:x}"
+        if extras[i, 3] < 0.05:
+            texto = texto.replace(" ", ", ", 1)
+        elif extras[i, 3] < 0.08:
+            texto = texto.replace(" ", "\n", 1 + i % 2)
+        elif extras[i, 3] < 0.10:
+            texto = f'"{texto}" dijo, y "gol"'
+        tweets.append(texto)
+    return tweets
+
+
+def _hashtags(rng, n):
+    cantidad = rng.choice(4, n, p=[0.35, 0.35, 0.2, 0.1])
+    elegidos = _elegir(rng, HASHTAGS, int(cantidad.sum()))
+    cortes = np.cumsum(cantidad)[:-1]
+    return [", ".join(trozo) if len(trozo) else None for trozo in np.split(elegidos, cortes)]
+
+
+def _conteos(rng, n, media, nulos):
+    valores = np.floor(rng.lognormal(np.log(media), 1.5, n)).astype("float64")
+    valores[rng.random(n) < nulos] = np.nan
+    return pd.array(valores, dtype="Float64").astype("Int64")
+
+
+def generar_bloque(rng, n):
+    """Un bloque de `n` tweets sintéticos con las columnas del CSV original."""
+    segundos = rng.integers(0, DURACION_S, n)
+    fechas = (INICIO + pd.to_timedelta(segundos, unit="s")).astype(str).to_numpy(dtype=object)
+    fechas[rng.random(n) < 0.001] = "fecha no válida"
+    nombres = _elegir(rng, NOMBRES, n)
+    con_apellido = rng.random(n) < 0.6
+    nombres[con_apellido] = nombres[con_apellido] + " " + _elegir(rng, APELLIDOS, int(con_apellido.sum()))
+    lugares = _elegir(rng, LUGARES, n, pesos=np.arange(len(LUGARES), 0, -1) / sum(range(len(LUGARES) + 1)))
+    lugares[rng.random(n) < 0.35] = None
+    return pd.DataFrame({
+        "Date": fechas,
+        "Tweet": _tweets(rng, n),
+        "Hashtags": _hashtags(rng, n),
+        "Name": nombres,
+        "Source": _elegir(rng, FUENTES, n, pesos=PESOS_FUENTES),
+        "Place": lugares,
+        "Followers": _conteos(rng, n, 300, 0.01),
+        "Friends": _conteos(rng, n, 200, 0.01),
+        "Likes": _conteos(rng, n, 3, 0.02),
+        "lang": "es",
+    })
+
+
+def generar_csv(salida, filas, semilla=SEMILLA):
+    """Escribe `filas` tweets en `salida` por bloques (no hace falta memoria para todo)."""
+    rng = np.random.default_rng(semilla)
+    carpeta = os.path.dirname(salida)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    escritas = 0
+    with open(salida, "w", encoding="utf-8", newline="") as f:
+        while escritas < filas:
+            n = min(FILAS_POR_BLOQUE, filas - escritas)
+            generar_bloque(rng, n).to_csv(f, index=False, header=escritas == 0)
+            escritas += n
+    return salida
+
+
+def filas_de(tamano):
+    """Número de filas para '10k', '1m', '10m' o un entero."""
+    return TAMANOS[tamano.lower()] if tamano.lower() in TAMANOS else int(tamano)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera tweets sintéticos del Mundial.")
+    parser.add_argument("--filas", default="10k", help="10k, 1m, 10m o un número de filas")
+    parser.add_argument("--salida", default=None, help="CSV de salida (por defecto benchmarks/datos/tweets_<filas>.csv)")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    args = parser.parse_args()
+    salida = args.salida or os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", f"tweets_{args.filas}.csv")
+    generar_csv(salida, filas_de(args.filas), args.semilla)
+    print(f"{filas_de(args.filas)} tweets en '{salida}'")
@@ -0,0 +1,196 @@
+# Mide el tiempo y la memoria de cada sección del análisis sobre un CSV y
+# guarda el resultado en JSON para compararlo entre versiones:
+#
+#   python benchmarks/medir.py --csv benchmarks/datos/tweets_1m.csv
+#   python benchmarks/medir.py --csv benchmarks/datos/tweets_1m.csv --comparar base.json
+#
+# Las secciones se miden bloque a bloque, igual que en los scripts, y se
+# suman. La memoria es el pico de RSS del proceso durante la sección y lo
+# que ese pico supera al RSS con el que empezó (Linux permite reiniciar el
+# pico; en otros sistemas sólo se da el pico del proceso).
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agregados import AgregadosTweets  # noqa: E402
+from cargar_y_limpiar_datos import _leer_csv, leer_filas_nuevas, limpiar_bloque, TAMANO_BLOQUE  # noqa: E402
+from inferencia_sexo import InferenciaSexo  # noqa: E402
+from plataformas import clasificar_plataformas  # noqa: E402
+from seguimiento_vivo import BYTES_LOTE  # noqa: E402
+
+CARPETA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Por encima de este cociente (actual / base) una sección se marca como regresión
+TOLERANCIA = 1.10
+
+
+def _memoria_kb(campo):
+    """VmRSS o VmHWM del proceso en kB (None fuera de Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith(campo + ":"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reiniciar_pico():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _pico_proceso_kb():
+    import resource
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+
+class Medidor:
+    """Acumula tiempo y picos de memoria por sección."""
+
+    def __init__(self):
+        self.secciones = {}
+
+    def medir(self, nombre, funcion, *args):
+        reiniciado = _reiniciar_pico()
+        rss_inicio = _memoria_kb("VmRSS")
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        segundos = time.perf_counter() - inicio
+        pico = _memoria_kb("VmHWM") if reiniciado else _pico_proceso_kb()
+        datos = self.secciones.setdefault(nombre, {"segundos": 0.0, "rss_pico_mb": 0.0, "rss_extra_mb": None})
+        datos["segundos"] += segundos
+        datos["rss_pico_mb"] = max(datos["rss_pico_mb"], pico / 1024)
+        if reiniciado and rss_inicio is not None:
+            datos["rss_extra_mb"] = max(datos["rss_extra_mb"] or 0.0, (pico - rss_inicio) / 1024)
+        return resultado
+
+
+def _graficas(agregados, medidor):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from analisis import graficas
+
+    resultados = agregados.resultados()
+    with tempfile.TemporaryDirectory() as carpeta:
+        for nombre, _, funcion, datos in graficas(resultados):
+            def dibujar():
+                plt.figure()
+                funcion(datos)
+                plt.tight_layout()
+                plt.savefig(os.path.join(carpeta, f"{nombre}.png"))
+                plt.close("all")
+            medidor.medir("graficas", dibujar)
+
+
+def _lectura_incremental(file_path, filas, medidor, tamano_bloque=TAMANO_BLOQUE):
+    """Relee el CSV en micro-lotes, como el seguimiento en vivo, y comprueba las filas."""
+    desplazamiento, leidas = 0, 0
+    while True:
+        bloques, siguiente = medidor.medir("incremental", leer_filas_nuevas, file_path, desplazamiento,
+                                           tamano_bloque, BYTES_LOTE)
+        leidas += sum(len(bloque) for bloque in bloques)
+        if siguiente == desplazamiento:
+            break
+        desplazamiento = siguiente
+    if leidas != filas:
+        raise RuntimeError(f"La lectura incremental dio {leidas} filas y la completa {filas}")
+
+
+def medir(file_path, tamano_bloque=TAMANO_BLOQUE, procesos=1):
+    """Recorre el CSV midiendo cada sección; devuelve el resultado para el JSON."""
+    medidor = Medidor()
+    inferencia = InferenciaSexo(ruta_cache=None)
+    # Un solo hilo: el medidor toma el pico de memoria de todo el proceso
+    agregados = AgregadosTweets(procesos=procesos, hilos=1)
+    filas = 0
+    inicio = time.perf_counter()
+    with agregados:
+        lector = _leer_csv(file_path, tamano_bloque)
+        while True:
+            bloque = medidor.medir("carga", next, lector, None)
+            if bloque is None:
+                break
+            filas += len(bloque)
+            bloque = medidor.medir("fechas", limpiar_bloque, bloque)
+            bloque["Sexo"] = medidor.medir("sexo", inferencia.inferir, bloque["Name"])
+            bloque["Plataforma"] = medidor.medir("plataforma", clasificar_plataformas, bloque["Source"])
+            agregados.actualizar(bloque, llamar=medidor.medir)
+    _graficas(agregados, medidor)
+    _lectura_incremental(file_path, filas, medidor, tamano_bloque)
+    return {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "csv": os.path.basename(file_path),
+        "filas": filas,
+        "tamano_bloque": tamano_bloque,
+        "procesos": procesos,
+        "python": platform.python_version(),
+        "sistema": platform.platform(),
+        "total_segundos": time.perf_counter() - inicio,
+        "rss_pico_mb": max([_pico_proceso_kb() / 1024] + [d["rss_pico_mb"] for d in medidor.secciones.values()]),
+        "secciones": medidor.secciones,
+    }
+
+
+def imprimir(resultado, base=None, tolerancia=TOLERANCIA):
+    """Tabla por sección; con `base`, el cociente frente a esa medición."""
+    print(f"\n{resultado['filas']} filas de '{resultado['csv']}' en {resultado['total_segundos']:.2f} s "
+          f"(pico {resultado['rss_pico_mb']:.0f} MB)\n")
+    cabecera = f"{'Sección':<12} {'Segundos':>9} {'Pico MB':>9} {'Extra MB':>9}"
+    print(cabecera + ("   Base s   Cociente" if base else ""))
+    regresiones = []
+    for nombre, datos in resultado["secciones"].items():
+        extra = "-" if datos["rss_extra_mb"] is None else f"{datos['rss_extra_mb']:.1f}"
+        linea = f"{nombre:<12} {datos['segundos']:>9.3f} {datos['rss_pico_mb']:>9.0f} {extra:>9}"
+        anterior = base["secciones"].get(nombre) if base else None
+        if anterior:
+            cociente = datos["segundos"] / anterior["segundos"] if anterior["segundos"] else float("inf")
+            linea += f" {anterior['segundos']:>8.3f} {cociente:>9.2f}"
+            if cociente > tolerancia:
+                linea += "  <- más lento"
+                regresiones.append(nombre)
+        print(linea)
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide cada sección del análisis sobre un CSV.")
+    parser.add_argument("--csv", required=True, help="CSV a medir (ver generar_tweets.py)")
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/<csv>.json)")
+    parser.add_argument("--comparar", default=None, help="JSON de una medición anterior")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="cociente a partir del cual se marca regresión")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE)
+    parser.add_argument("--procesos", type=int, default=1, help="procesos para contar palabras")
+    args = parser.parse_args()
+
+    resultado = medir(args.csv, args.tamano_bloque, args.procesos)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+    regresiones = imprimir(resultado, base, args.tolerancia)
+
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, os.path.splitext(os.path.basename(args.csv))[0] + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado guardado en '{salida}'")
+    if regresiones:
+        sys.exit(1)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+
+# Tamaño de lectura para calcular el hash del archivo original
+_BLOQUE_HASH = 1 << 20
+
+
+def ruta_cache(file_path):
+    """Ruta del archivo columnar (Feather) asociado a un CSV."""
+    base, _ = os.path.splitext(file_path)
+    return base + "_limpio.feather"
+
+
+def _ruta_clave(ruta):
+    return ruta + ".json"
+
+
+def clave_archivo(file_path, version):
+    """Tamaño, fecha de modificación y hash del contenido de un archivo.
+
+    El hash cubre sólo los `tamano` bytes que había al hacer stat, así que
+    la clave describe un mismo estado del archivo aunque siga creciendo.
+    """
+    info = os.stat(file_path)
+    h = hashlib.blake2b(digest_size=16)
+    pendientes = info.st_size
+    with open(file_path, "rb") as f:
+        while pendientes > 0:
+            trozo = f.read(min(_BLOQUE_HASH, pendientes))
+            if not trozo:
+                break
+            h.update(trozo)
+            pendientes -= len(trozo)
+    return {
+        "version": version,
+        "tamano": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "hash": h.hexdigest(),
+    }
+
+
+def cache_vigente(file_path, ruta, version):
+    """Indica si la caché existe y corresponde al archivo original actual."""
+    if not (os.path.exists(ruta) and os.path.exists(_ruta_clave(ruta))):
+        return False
+    try:
+        with open(_ruta_clave(ruta), encoding="utf-8") as f:
+            guardada = json.load(f)
+    except (OSError, ValueError):
+        return False
+    info = os.stat(file_path)
+    # Comprobaciones baratas antes de leer el archivo completo para el hash
+    if guardada.get("version") != version or guardada.get("tamano") != info.st_size:
+        return False
+    return guardada == clave_archivo(file_path, version)
+
+
+def guardar_clave(ruta, clave):
+    """Marca la caché `ruta` como correspondiente al archivo de `clave`.
+
+    La clave (ver clave_archivo) se toma antes de leer el archivo original:
+    si crece mientras se lee, la caché queda marcada con el estado de antes
+    y la siguiente lectura ve que ya no está vigente.
+    """
+    with open(_ruta_clave(ruta), "w", encoding="utf-8") as f:
+        json.dump(clave, f)
+
+
+class EscritorCache:
+    """Escribe bloques de un DataFrame en un archivo Feather (Arrow IPC).
+
+    Se escribe primero a un archivo temporal y sólo al cerrar sin errores se
+    renombra y se guarda la clave, así una ejecución interrumpida nunca deja
+    una caché a medias marcada como válida. `clave` es la del archivo
+    original tomada antes de empezar a leerlo.
+    """
+
+    def __init__(self, ruta, esquema, clave):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.ruta = ruta
+        self.esquema = esquema
+        self.clave = clave
+        self._temporal = ruta + ".tmp"
+        self._escritor = pa.ipc.new_file(self._temporal, esquema)
+
+    def escribir(self, df):
+        lote = self._pa.RecordBatch.from_pandas(df, schema=self.esquema, preserve_index=False)
+        self._escritor.write_batch(lote)
+
+    def cerrar(self):
+        self._escritor.close()
+        os.replace(self._temporal, self.ruta)
+        guardar_clave(self.ruta, self.clave)
+
+    def descartar(self):
+        self._escritor.close()
+        if os.path.exists(self._temporal):
+            os.remove(self._temporal)
+
+
+def leer_tabla(ruta):
+    """Abre la caché con memory mapping (sin copiar los datos a memoria)."""
+    import pyarrow as pa
+
+    with pa.memory_map(ruta) as fuente:
+        return pa.ipc.open_file(fuente).read_all()
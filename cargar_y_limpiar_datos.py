@@ -0,0 +1,416 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from cache_limpio import ruta_cache, cache_vigente, clave_archivo, EscritorCache, leer_tabla
+from esquema import (COLUMNAS, CONTEOS, TIPOS_LECTURA, validar_conteos, esquema_arrow, opciones_arrow,
+                     ordenar_categorias, concatenar)
+import instrumentacion
+from inferencia_sexo import InferenciaSexo, MAPA_SEXO
+from plataformas import clasificar_plataformas, REGLAS_PLATAFORMA
+
+# Inferencia de sexo memoizada; el detector se carga al resolver el primer
+# nombre nuevo, no al importar el módulo
+inferencia_sexo = InferenciaSexo()
+
+# Filas por bloque al leer el CSV en streaming
+TAMANO_BLOQUE = 100_000
+
+# Se incrementa cada vez que cambia lo que se guarda en la caché limpia,
+# para que las cachés antiguas se regeneren solas.
+VERSION_CACHE = 2
+
+# Valor de 'Dia' y 'Hora_int' para fechas que no se pudieron convertir
+SIN_FECHA = -1
+
+def limpiar_bloque(df):
+    """Deriva de 'Date' (ya convertida a datetime) el día y la hora.
+
+    'Date' se conserva como datetime64 y se añaden 'Dia' (días desde
+    1970-01-01, int32) y 'Hora_int' (0-23, int8), con SIN_FECHA donde la
+    fecha no es válida; las filas válidas son las de 'Hora_int' != SIN_FECHA.
+    Así no se crean objetos date/time de Python por fila.
+    """
+    instante, valido = instantes(df["Date"])
+    valores = instante.view("datetime64[ns]")
+    hora = valores.astype("datetime64[h]").astype(np.int64) % 24
+    df["Dia"] = _dias_de(instante, valido)
+    df["Hora_int"] = np.where(valido, hora, SIN_FECHA).astype(np.int8)
+    return df
+
+def dias(fechas):
+    """'Dia' de cada fecha (int32, días desde 1970-01-01), SIN_FECHA si no es válida."""
+    return _dias_de(*instantes(fechas))
+
+def _dias_de(instante, valido):
+    """Como dias(), a partir de lo que ya devolvió instantes()."""
+    dia = instante.view("datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    return np.where(valido, dia, SIN_FECHA).astype(np.int32)
+
+def instantes(fechas):
+    """'Date' como nanosegundos desde 1970 (int64) y la máscara de fechas válidas.
+
+    Se usa la hora local del propio CSV, igual que hacía dt.date/dt.time.
+    """
+    if fechas.dt.tz is not None:
+        fechas = fechas.dt.tz_localize(None)
+    valores = fechas.to_numpy(dtype="datetime64[ns]")
+    return valores.view(np.int64), ~np.isnat(valores)
+
+def dia_a_fecha(dias):
+    """Convierte valores de 'Dia' en fechas (datetime64)."""
+    return pd.to_datetime(np.asarray(dias, dtype=np.int64), unit="D")
+
+def _leer_csv(file_path, tamano_bloque, **opciones):
+    """Lee el CSV por bloques con el esquema fijo (ver esquema) y convierte 'Date'.
+
+    Los conteos fuera de rango o no enteros quedan nulos (ver validar_conteos).
+    """
+    with pd.read_csv(file_path, usecols=COLUMNAS, dtype=TIPOS_LECTURA, chunksize=tamano_bloque,
+                     **opciones) as lector:
+        for bloque in lector:
+            bloque["Date"] = pd.to_datetime(bloque["Date"], errors="coerce")
+            yield validar_conteos(bloque)
+
+def muestrear_lote(lote, muestra):
+    """Filas de la `muestra` de un lote o tabla de Arrow sin convertir.
+
+    Para elegirlas sólo se pasan a pandas las columnas de los estratos; el
+    resto se convierte (y después se limpia) ya filtrado. Devuelve el lote
+    filtrado y la máscara de filas elegidas.
+    """
+    import pyarrow as pa
+
+    estratos = lote.select(list(muestra.columnas)).to_pandas(**opciones_arrow())
+    elegidas = muestra.elegir(estratos)
+    return lote.filter(pa.array(elegidas)), elegidas
+
+def _bloques_desde_cache(ruta, tamano_bloque, columnas=None, muestra=None):
+    """Recorre la caché en bloques con índices consecutivos, como el CSV.
+
+    Con una `muestra`, cada lote se muestrea antes de pasarlo a pandas (ver
+    muestrear_lote).
+    """
+    tabla = leer_tabla(ruta)
+    if columnas is not None:
+        tabla = tabla.select([c for c in COLUMNAS if c in columnas])
+    inicio = 0
+    for lote in tabla.to_batches(max_chunksize=tamano_bloque):
+        indice = pd.RangeIndex(inicio, inicio + lote.num_rows)
+        inicio += lote.num_rows
+        if muestra is not None:
+            lote, elegidas = muestrear_lote(lote, muestra)
+            indice = indice[elegidas]
+        bloque = ordenar_categorias(lote.to_pandas(**opciones_arrow()))
+        bloque.index = indice
+        yield bloque
+
+def _bloques_guardando_cache(file_path, ruta, tamano_bloque):
+    """Lee el CSV y, a la vez, escribe la caché columnar."""
+    escritor = None
+    completo = False
+    # La clave se toma antes de leer: si el CSV crece mientras tanto, la
+    # caché no queda marcada como vigente para el archivo nuevo
+    clave = clave_archivo(file_path, VERSION_CACHE)
+    try:
+        for bloque in _leer_csv(file_path, tamano_bloque):
+            if escritor is None:
+                try:
+                    escritor = EscritorCache(ruta, esquema_arrow(bloque), clave)
+                except ImportError:
+                    # Sin pyarrow no hay caché: se lee el CSV como siempre
+                    escritor = False
+            if escritor:
+                escritor.escribir(bloque)
+            yield bloque
+        completo = True
+    finally:
+        if escritor and completo:
+            escritor.cerrar()
+        elif escritor:
+            escritor.descartar()
+
+def iterar_bloques(file_path="mundial_tweets.csv", tamano_bloque=TAMANO_BLOQUE, usar_cache=True,
+                   desde=None, hasta=None, columnas=None, plataformas=None, muestra=None):
+    """Lee el CSV en bloques de `tamano_bloque` filas ya tipados y limpios.
+
+    Con `usar_cache`, la primera lectura guarda una copia columnar del CSV
+    (ver cache_limpio) y las siguientes la leen con memory mapping mientras
+    el CSV no cambie.
+
+    `desde` y `hasta` (fechas inclusivas), `columnas` y `plataformas`
+    filtran los bloques ('Date', 'Dia' y 'Hora_int' van siempre). Con
+    fechas o plataformas, si limpieza_tweets guardó el dataset particionado
+    y sigue vigente, sólo se leen sus particiones y columnas pedidas (ver
+    dataset_particionado), con las mismas filas, índice y orden.
+
+    Con una `muestra` (ver muestreo.MuestraEstratificada), de las filas que
+    pasan los filtros sólo se devuelven las de la muestra. Se eligen antes
+    de limpiarlas y, en la caché y el dataset, antes de pasarlas a pandas,
+    así que sólo se convierten y limpian las filas de la muestra. Con
+    plataformas que no son particiones, se muestrea después de filtrar.
+    """
+    # dataset_particionado importa este módulo: se importa aquí para no formar un ciclo
+    from dataset_particionado import dataset_vigente, filtrar_bloque, leer_dataset, por_plataforma, ruta_dataset
+
+    filtrado = any(filtro is not None for filtro in (desde, hasta, columnas, plataformas))
+    filtro_filas = (desde, hasta, plataformas) != (None, None, None)
+    leidas = columnas
+    if columnas is not None and plataformas is not None:
+        # Sin particiones por plataforma, se clasifica a partir de 'Source'
+        leidas = list(columnas) + ["Source"]
+    if columnas is not None and muestra is not None:
+        # Los estratos son por lugar y los usuarios distintos salen de 'Name'
+        leidas = list(leidas) + ["Place", "Name"]
+    if columnas is not None:
+        desconocidas = set(columnas) - set(COLUMNAS)
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas: {sorted(desconocidas)} (hay {COLUMNAS})")
+        leidas = ["Date"] + list(leidas)
+
+    # La muestra que queda por aplicar después de leer
+    pendiente = muestra
+    if filtro_filas and usar_cache and dataset_vigente(file_path):
+        ruta = ruta_dataset(file_path)
+        # Las particiones filtran exactamente las fechas, y las plataformas
+        # si el dataset está partido por ellas: se puede muestrear al leer
+        if plataformas is None or por_plataforma(ruta):
+            pendiente = None
+        bloques = leer_dataset(ruta, desde, hasta, leidas, plataformas, tamano_bloque,
+                               muestra=muestra if pendiente is None else None)
+    elif not usar_cache:
+        bloques = _leer_csv(file_path, tamano_bloque)
+    elif cache_vigente(file_path, ruta_cache(file_path), VERSION_CACHE):
+        if not filtro_filas:
+            pendiente = None
+        bloques = _bloques_desde_cache(ruta_cache(file_path), tamano_bloque, leidas,
+                                       muestra=muestra if pendiente is None else None)
+    else:
+        bloques = _bloques_guardando_cache(file_path, ruta_cache(file_path), tamano_bloque)
+    bloques = iter(bloques)
+    while True:
+        with instrumentacion.etapa(instrumentacion.CARGA) as medicion:
+            bloque = next(bloques, None)
+            if bloque is not None:
+                if pendiente is not None and not filtro_filas:
+                    # Sin copia, limpiar_bloque escribiría en una vista del bloque leído
+                    bloque = pendiente.filtrar(bloque).copy(deep=False)
+                bloque = limpiar_bloque(bloque)
+                if filtrado:
+                    bloque = filtrar_bloque(bloque, desde, hasta, plataformas=plataformas)
+                if "Plataforma" in bloque:
+                    # Partición del dataset: los bloques salen como los del CSV
+                    bloque = bloque.drop(columns="Plataforma")
+                if pendiente is not None and filtro_filas:
+                    bloque = pendiente.filtrar(bloque)
+                if columnas is not None:
+                    bloque = filtrar_bloque(bloque, columnas=columnas)
+                medicion.contar(len(bloque))
+        if bloque is None:
+            return
+        if len(bloque):
+            yield bloque
+
+def cargar_y_limpiar_datos(file_path="mundial_tweets.csv", tamano_bloque=TAMANO_BLOQUE, usar_cache=True):
+    """Carga el CSV (o su caché), procesa fechas y horas."""
+    if usar_cache and cache_vigente(file_path, ruta_cache(file_path), VERSION_CACHE):
+        with instrumentacion.etapa(instrumentacion.CARGA) as medicion:
+            tabla = leer_tabla(ruta_cache(file_path))
+            df = limpiar_bloque(ordenar_categorias(tabla.to_pandas(**opciones_arrow())))
+            medicion.contar(len(df))
+        return df
+    return concatenar(iterar_bloques(file_path, tamano_bloque, usar_cache))
+
+# Bytes que se leen de una vez al buscar dónde empieza un registro
+BYTES_BUSQUEDA = 16 * 1024 * 1024
+
+def _finales_registros(datos, comillas=False, impar=False):
+    """Posiciones de `datos` justo después de cada fin de registro.
+
+    Con `comillas` (CSV) un salto de línea dentro de un campo entre
+    comillas no termina el registro: sólo cuentan los que tienen delante
+    un número par de comillas (las comillas escapadas, '""', van de dos en
+    dos). `datos` debe empezar al principio de un registro o, con `impar`,
+    dentro de un campo entre comillas.
+    """
+    bytes_ = np.frombuffer(datos, dtype=np.uint8)
+    saltos = np.flatnonzero(bytes_ == ord("\n"))
+    if comillas and len(saltos):
+        posiciones = np.flatnonzero(bytes_ == ord('"'))
+        saltos = saltos[(np.searchsorted(posiciones, saltos) + impar) % 2 == 0]
+    return saltos + 1
+
+def _fin_registros(datos, comillas=False):
+    """Bytes de `datos` hasta el final del último registro completo."""
+    finales = _finales_registros(datos, comillas)
+    return int(finales[-1]) if len(finales) else 0
+
+def comillas_impares(file_path, fin):
+    """Indica si hay un número impar de comillas en los `fin` primeros bytes."""
+    impar = False
+    with open(file_path, "rb") as f:
+        while f.tell() < fin:
+            trozo = f.read(min(BYTES_BUSQUEDA, fin - f.tell()))
+            if not trozo:
+                break
+            impar ^= trozo.count(b'"') % 2 == 1
+    return impar
+
+def inicio_registro(file_path, posicion, comillas=False, impar=False):
+    """Primer principio de registro en el byte `posicion` o después.
+
+    Sirve para empezar a leer un archivo que crece por el final aunque se
+    esté escribiendo un registro. `impar` dice si antes de `posicion` hay
+    un número impar de comillas (ver comillas_impares); sólo cuenta con
+    `comillas`. Devuelve None si ese registro aún no está completo.
+    """
+    if posicion == 0:
+        return 0
+    with open(file_path, "rb") as f:
+        f.seek(posicion - 1)
+        datos = f.read(BYTES_BUSQUEDA)
+        # `datos` empieza un byte antes de `posicion`: si es una comilla, ya estaba contada
+        impar = comillas and impar != (datos[:1] == b'"')
+        while datos:
+            finales = _finales_registros(datos, comillas, impar)
+            if len(finales):
+                return posicion - 1 + int(finales[0])
+            resto = f.read(BYTES_BUSQUEDA)
+            if not resto:
+                break
+            datos += resto
+    return None
+
+def _lineas_nuevas(f, inicio, limite=None, comillas=False):
+    """Bytes de los registros completos desde `inicio`, unos `limite` como mucho."""
+    f.seek(inicio)
+    datos = f.read() if limite is None else f.read(limite)
+    fin = _fin_registros(datos, comillas)
+    # Un registro más largo que `limite` se lee entero
+    while not fin and limite is not None:
+        resto = f.read(limite)
+        if not resto:
+            break
+        datos += resto
+        fin = _fin_registros(datos, comillas)
+    # Un último registro a medio escribir se deja para la próxima lectura
+    return datos[:fin]
+
+def _por_registro(registros, convertir, errores):
+    """Convierte de uno en uno los registros de un lote que falló entero.
+
+    Los que no se pueden convertir se descartan y se anotan en `errores`
+    (una lista, o None para no anotarlos) como (número en el lote, error).
+    """
+    bloques = []
+    for i, registro in enumerate(registros):
+        try:
+            bloques.append(convertir(registro))
+        except (ValueError, TypeError, OverflowError) as e:
+            if errores is not None:
+                errores.append((i, e))
+    return [concatenar(bloques)] if bloques else []
+
+def leer_filas_nuevas(file_path, desplazamiento, tamano_bloque=TAMANO_BLOQUE, limite=None, errores=None):
+    """Lee sólo las filas escritas en el CSV a partir del byte `desplazamiento`.
+
+    Pensado para archivos a los que se van añadiendo tweets: devuelve una
+    lista de bloques limpios y el byte donde termina el último registro
+    completo (un tweet entre comillas puede ocupar varias líneas), que es
+    el `desplazamiento` para la siguiente llamada. Con `limite` se leen
+    unos `limite` bytes como mucho, salvo que un solo registro sea mayor.
+    Si el lote no se puede leer, se lee fila a fila y las filas mal
+    formadas se saltan (ver _por_registro).
+    """
+    with open(file_path, "rb") as f:
+        cabecera = f.readline()
+        inicio = max(desplazamiento, f.tell())
+        datos = _lineas_nuevas(f, inicio, limite, comillas=True)
+    if not datos:
+        return [], inicio
+    nombres = next(csv.reader([cabecera.decode("utf-8")]))
+
+    def leer(contenido):
+        return list(_leer_csv(io.BytesIO(contenido), tamano_bloque, header=None, names=nombres))
+
+    try:
+        bloques = leer(datos)
+    except (ValueError, TypeError, OverflowError):
+        finales = _finales_registros(datos, comillas=True)
+        registros = [datos[a:b] for a, b in zip(np.r_[0, finales[:-1]], finales)]
+        bloques = _por_registro(registros, lambda registro: leer(registro)[0], errores)
+    return [limpiar_bloque(bloque) for bloque in bloques], inicio + len(datos)
+
+def _bloque_de_registros(registros):
+    """Bloque con el esquema fijo (ver esquema) a partir de diccionarios JSON."""
+    df = pd.DataFrame(registros, columns=COLUMNAS)
+    # Los hashtags pueden venir como lista; se unen como en el CSV
+    df["Hashtags"] = df["Hashtags"].map(lambda h: ", ".join(h) if isinstance(h, list) else h)
+    for columna in CONTEOS:
+        df[columna] = pd.to_numeric(df[columna], errors="coerce")
+    df = validar_conteos(df.astype(TIPOS_LECTURA))
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    return df
+
+def leer_jsonl_nuevas(file_path, desplazamiento, tamano_bloque=TAMANO_BLOQUE, limite=None, errores=None):
+    """Como leer_filas_nuevas, para un archivo JSON Lines (un tweet por línea).
+
+    Las claves que faltan quedan nulas y las líneas que no son un objeto
+    JSON, o cuyos valores no se pueden convertir, se descartan.
+    """
+    with open(file_path, "rb") as f:
+        datos = _lineas_nuevas(f, desplazamiento, limite)
+    registros = []
+    for linea in datos.splitlines():
+        try:
+            registro = json.loads(linea)
+        except ValueError:
+            continue
+        if isinstance(registro, dict):
+            registros.append(registro)
+    bloques = []
+    for i in range(0, len(registros), tamano_bloque):
+        lote = registros[i:i + tamano_bloque]
+        try:
+            bloques.append(_bloque_de_registros(lote))
+        except (ValueError, TypeError, OverflowError):
+            bloques += _por_registro(lote, lambda registro: _bloque_de_registros([registro]), errores)
+    return [limpiar_bloque(bloque) for bloque in bloques], desplazamiento + len(datos)
+
+def extraer_primer_nombre(nombre):
+    """Extrae el primer nombre de una cadena."""
+    if pd.isna(nombre):
+        return None
+    return nombre.split()[0]
+
+def asignar_sexo(nombre, detector):
+    """Asigna un sexo basado en el primer nombre."""
+    if pd.notnull(nombre):
+        gender_str = detector.get_gender(nombre)
+        return MAPA_SEXO.get(gender_str, "Desconocido")
+    return "Desconocido"
+
+def asignar_plataforma(source, reglas=REGLAS_PLATAFORMA):
+    """Agrupa la columna 'Source' en iPhone, Android, Web, iPad u Otro."""
+    with instrumentacion.etapa(instrumentacion.PLATAFORMA) as medicion:
+        medicion.contar(len(source))
+        return clasificar_plataformas(source, reglas)
+
+def inferir_sexo(nombres, inferencia=inferencia_sexo):
+    """Columna categórica 'Sexo' a partir de 'Name'."""
+    with instrumentacion.etapa(instrumentacion.SEXO) as medicion:
+        medicion.contar(len(nombres))
+        return inferencia.inferir(nombres)
+
+def enriquecer_bloque(df, inferencia=inferencia_sexo, reglas=REGLAS_PLATAFORMA):
+    """Añade las columnas 'Sexo' y 'Plataforma' a un bloque limpio."""
+    df["Sexo"] = inferir_sexo(df["Name"], inferencia)
+    df["Plataforma"] = asignar_plataforma(df["Source"], reglas)
+    return df
+
+if __name__ == "__main__":
+    df_base = cargar_y_limpiar_datos()
+    print("Datos cargados y limpieza básica realizada.")
@@ -0,0 +1,259 @@
+# Dataset limpio particionado al estilo Hive por fecha y, si se pide, por
+# plataforma, que guarda limpieza_tweets.py:
+#
+#   mundial_tweets_particionado/Fecha=2022-12-18/Plataforma=iPhone/part-0.parquet
+#
+# iterar_bloques lo usa cuando se piden fechas o plataformas: sólo se abren
+# las carpetas de esas particiones y, de sus archivos Parquet, las columnas
+# pedidas. Las fechas no válidas van a la partición nula de Hive. Cada fila
+# guarda su número en el CSV ('Fila'), con el que se lee en el orden y con el
+# índice de siempre.
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from cache_limpio import cache_vigente, clave_archivo, guardar_clave
+from cargar_y_limpiar_datos import SIN_FECHA, TAMANO_BLOQUE, muestrear_lote
+from esquema import COLUMNAS, esquema_arrow, opciones_arrow, ordenar_categorias
+from plataformas import clasificar_plataformas, categorias_plataforma, REGLAS_PLATAFORMA
+
+# Se incrementa cada vez que cambia lo que se guarda en el dataset, para que
+# los antiguos dejen de usarse
+VERSION_DATASET = 2
+
+# Filas por grupo de Parquet: se lee un grupo entero aunque se pidan menos
+FILAS_POR_GRUPO = 64 * 1024
+
+# Límite de particiones abiertas a la vez al escribir (días x plataformas)
+MAX_PARTICIONES = 1 << 16
+
+
+def ruta_dataset(file_path):
+    """Carpeta del dataset particionado asociado a un CSV."""
+    base, _ = os.path.splitext(file_path)
+    return base + "_particionado"
+
+
+def dataset_vigente(file_path, ruta=None):
+    """Indica si el dataset existe y corresponde al CSV actual."""
+    return cache_vigente(file_path, ruta or ruta_dataset(file_path), VERSION_DATASET)
+
+
+def fecha_a_dia(fecha):
+    """Días desde 1970-01-01 de una fecha ('2022-12-18', date o Timestamp)."""
+    return (pd.Timestamp(fecha).normalize() - pd.Timestamp(0)).days
+
+
+def _esquema_particiones():
+    import pyarrow as pa
+
+    return pa.schema([("Fecha", pa.date32()), ("Plataforma", pa.string())])
+
+
+def _lote(bloque, esquema, por_plataforma):
+    import pyarrow as pa
+
+    lote = pa.RecordBatch.from_pandas(bloque[COLUMNAS], schema=esquema_arrow(bloque), preserve_index=False)
+    dias = bloque["Dia"].to_numpy()
+    columnas = lote.columns + [
+        pa.array(bloque.index.to_numpy(), type=pa.int64()),
+        pa.array(dias, type=pa.int32(), mask=dias == SIN_FECHA).cast(pa.date32()),
+    ]
+    if por_plataforma:
+        plataforma = bloque["Plataforma"] if "Plataforma" in bloque else clasificar_plataformas(bloque["Source"])
+        columnas.append(pa.array(plataforma.astype(object), type=pa.string(), from_pandas=True))
+    return pa.RecordBatch.from_arrays(columnas, schema=esquema)
+
+
+def escribir_dataset(file_path, bloques, ruta=None, por_plataforma=False):
+    """Guarda bloques limpios (con 'Dia') como dataset particionado por fecha.
+
+    El índice de cada bloque (el número de fila en el CSV, como lo da
+    iterar_bloques) se guarda en la columna 'Fila'.
+
+    Los bloques se escriben según llegan, así que `bloques` puede ser un
+    generador que haga otras cosas con ellos. Como la caché, se escribe en
+    una carpeta temporal que sólo al terminar sin errores reemplaza a la
+    anterior y se marca como vigente. Devuelve la ruta, o None si no había
+    filas.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    ruta = ruta or ruta_dataset(file_path)
+    # Antes de pedir el primer bloque, como en la caché (ver guardar_clave)
+    clave = clave_archivo(file_path, VERSION_DATASET)
+    bloques = iter(bloques)
+    primero = next(bloques, None)
+    if primero is None:
+        return None
+    particiones = _esquema_particiones()
+    if not por_plataforma:
+        particiones = particiones.remove(1)
+    esquema = esquema_arrow(primero).append(pa.field("Fila", pa.int64()))
+    for campo in particiones:
+        esquema = esquema.append(campo)
+
+    def lotes():
+        yield _lote(primero, esquema, por_plataforma)
+        for bloque in bloques:
+            yield _lote(bloque, esquema, por_plataforma)
+
+    temporal = ruta + ".tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    try:
+        ds.write_dataset(lotes(), temporal, schema=esquema, format="parquet",
+                         partitioning=ds.partitioning(particiones, flavor="hive"),
+                         preserve_order=True, max_partitions=MAX_PARTICIONES,
+                         min_rows_per_group=FILAS_POR_GRUPO, max_rows_per_group=FILAS_POR_GRUPO)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    shutil.rmtree(ruta, ignore_errors=True)
+    os.replace(temporal, ruta)
+    guardar_clave(ruta, clave)
+    return ruta
+
+
+def por_plataforma(ruta):
+    """Indica si el dataset está particionado también por plataforma."""
+    for nombre in os.listdir(ruta):
+        carpeta = os.path.join(ruta, nombre)
+        if os.path.isdir(carpeta):
+            return any(n.startswith("Plataforma=") for n in os.listdir(carpeta))
+    return False
+
+
+def _filtro(desde, hasta, plataformas):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    filtro = None
+    condiciones = []
+    if desde is not None:
+        condiciones.append(ds.field("Fecha") >= pa.scalar(pd.Timestamp(desde).date(), pa.date32()))
+    if hasta is not None:
+        condiciones.append(ds.field("Fecha") <= pa.scalar(pd.Timestamp(hasta).date(), pa.date32()))
+    if plataformas is not None:
+        condiciones.append(ds.field("Plataforma").isin(list(plataformas)))
+    for condicion in condiciones:
+        filtro = condicion if filtro is None else filtro & condicion
+    return filtro
+
+
+def _siguiente(lotes):
+    """Siguiente lote no vacío de un archivo, como tabla, o None."""
+    import pyarrow as pa
+
+    for lote in lotes:
+        if lote.num_rows:
+            return pa.Table.from_batches([lote])
+    return None
+
+
+def _tablas_en_orden(dataset, leer, filtro, tamano_bloque):
+    """Filas de los archivos del dataset mezcladas por 'Fila' creciente.
+
+    Cada archivo ya está en el orden del CSV, así que basta una mezcla de
+    listas ordenadas con un lote cargado por archivo: las filas hasta la
+    menor de las últimas 'Fila' cargadas pueden salir, porque ningún
+    archivo puede traer ya otras menores. La memoria es de un lote por
+    partición, no de todas las filas.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    fuentes, cargadas = [], []
+    for fragmento in dataset.get_fragments(filter=filtro):
+        fuente = fragmento.to_batches(schema=dataset.schema, columns=leer, filter=filtro,
+                                      batch_size=tamano_bloque)
+        tabla = _siguiente(fuente)
+        if tabla is not None:
+            fuentes.append(fuente)
+            cargadas.append(tabla)
+    while fuentes:
+        limite = min(tabla["Fila"][-1].as_py() for tabla in cargadas)
+        partes = []
+        for i in reversed(range(len(fuentes))):
+            tabla = cargadas[i]
+            n = int(np.searchsorted(tabla["Fila"].to_numpy(), limite, side="right"))
+            partes.append(tabla.slice(0, n))
+            resto = tabla.slice(n) if n < tabla.num_rows else _siguiente(fuentes[i])
+            if resto is None:
+                del fuentes[i], cargadas[i]
+            else:
+                cargadas[i] = resto
+        tabla = pa.concat_tables(partes)
+        yield tabla.take(pc.sort_indices(tabla["Fila"]))
+
+
+def _a_pandas(tablas):
+    import pyarrow as pa
+
+    tabla = pa.concat_tables(tablas)
+    filas = tabla["Fila"].to_numpy()
+    bloque = ordenar_categorias(tabla.drop_columns(["Fila"]).to_pandas(**opciones_arrow()))
+    if "Plataforma" in bloque:
+        bloque["Plataforma"] = pd.Categorical(bloque["Plataforma"], categorias_plataforma(REGLAS_PLATAFORMA))
+    bloque.index = pd.Index(filas)
+    return bloque
+
+
+def leer_dataset(ruta, desde=None, hasta=None, columnas=None, plataformas=None, tamano_bloque=TAMANO_BLOQUE,
+                 muestra=None):
+    """Bloques tipados (sin limpiar) de las particiones y columnas pedidas.
+
+    `desde` y `hasta` son fechas inclusivas; `plataformas` sólo se usa como
+    filtro de particiones si el dataset está partido por plataforma (si no,
+    lo aplica quien lee, ver filtrar_bloque). 'Date' se lee siempre, y
+    'Plataforma' si es una partición. Las filas salen en el orden del CSV y
+    con su número de fila como índice, como al leer el CSV y filtrarlo.
+
+    Con una `muestra`, las filas leídas se muestrean antes de pasarlas a
+    pandas; sólo es la muestra de las filas pedidas si las particiones
+    filtran todo (sin `plataformas`, o con el dataset partido por ellas).
+    """
+    import pyarrow.dataset as ds
+
+    con_plataforma = por_plataforma(ruta)
+    dataset = ds.dataset(ruta, format="parquet", partitioning=ds.partitioning(
+        _esquema_particiones(), flavor="hive"))
+    leer = [c for c in COLUMNAS if columnas is None or c in columnas or c == "Date"] + ["Fila"]
+    if con_plataforma:
+        leer.append("Plataforma")
+    filtro = _filtro(desde, hasta, plataformas if con_plataforma else None)
+    pendientes, filas = [], 0
+    for tabla in _tablas_en_orden(dataset, leer, filtro, tamano_bloque):
+        if muestra is not None:
+            tabla, _ = muestrear_lote(tabla, muestra)
+        pendientes.append(tabla)
+        filas += tabla.num_rows
+        if filas >= tamano_bloque:
+            yield _a_pandas(pendientes)
+            pendientes, filas = [], 0
+    if pendientes:
+        yield _a_pandas(pendientes)
+
+
+def filtrar_bloque(df, desde=None, hasta=None, columnas=None, plataformas=None):
+    """Filas de un bloque limpio en [desde, hasta] y de `plataformas`, con sólo `columnas`.
+
+    Se conservan siempre 'Date', 'Dia' y 'Hora_int' (y 'Plataforma' si el
+    bloque la trae).
+    """
+    mascara = np.ones(len(df), dtype=bool)
+    if desde is not None:
+        mascara &= df["Dia"].to_numpy() >= fecha_a_dia(desde)
+    if hasta is not None:
+        mascara &= df["Dia"].to_numpy() <= fecha_a_dia(hasta)
+    if desde is not None or hasta is not None:
+        mascara &= df["Dia"].to_numpy() != SIN_FECHA
+    if plataformas is not None:
+        plataforma = df["Plataforma"] if "Plataforma" in df else clasificar_plataformas(df["Source"])
+        mascara &= plataforma.isin(list(plataformas)).to_numpy()
+    if columnas is not None:
+        fijas = {"Date", "Dia", "Hora_int", "Plataforma"}
+        df = df[[c for c in df.columns if c in columnas or c in fijas]]
+    return df if mascara.all() else df[mascara]
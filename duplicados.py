@@ -0,0 +1,362 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import instrumentacion
+
+# Firmas MinHash de BANDAS * FILAS_BANDA valores. Dos textos con similitud de
+# Jaccard s caen en el mismo cubo de alguna banda con probabilidad
+# 1 - (1 - s^FILAS_BANDA)^BANDAS: ~0.98 para s = 0.7 y ~0.6 para s = 0.5.
+# Los candidatos se confirman después con la similitud estimada por la firma.
+BANDAS = 15
+FILAS_BANDA = 4
+UMBRAL = 0.7
+SEMILLA = 2022
+
+# Grupo de los tweets vacíos
+SIN_GRUPO = -1
+
+# Por debajo de este número de textos no compensa repartir las firmas
+MIN_TEXTOS_POR_PROCESO = 5_000
+
+# Las mismas expresiones para re (pandas) y RE2 (pyarrow). Los espacios se
+# dan explícitos porque \s no significa lo mismo en los dos motores.
+# Sólo se reemplazan los espacios que cambian (tramos o tabuladores, saltos...)
+_ESPACIOS = r'[ \t\n\r\f\v]{2,}|[\t\n\r\f\v]'
+_URL = r'https?://[^ \t\n\r\f\v]+'
+_RETWEET_RE = r'^rt @\w+:? ?'
+_RETWEET_RE2 = r'^rt @[\pL\pN_]+:? ?'
+_PALABRA = re.compile(r'\w+')
+_SEPARADOR_RE2 = r'[^\pL\pN_]+'
+
+# Firma de los textos sin palabras: no entran en las bandas
+_VACIA = np.iinfo(np.uint64).max
+
+
+def normalizar(tweets):
+    """Texto comparable de cada tweet: minúsculas, sin URLs ni prefijo 'RT @usuario:'.
+
+    Los retweets y las copias que sólo cambian el enlace acortado quedan
+    iguales al original. Devuelve un array de str.
+    """
+    try:
+        return _normalizar_arrow(tweets)
+    except ImportError:
+        return _normalizar_pandas(tweets)
+
+
+def _normalizar_arrow(tweets):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    texto = pc.utf8_lower(pa.array(tweets.to_numpy(dtype=object), type=pa.string(), from_pandas=True))
+    texto = pc.replace_substring_regex(texto, _URL, " ")
+    texto = pc.replace_substring_regex(texto, _ESPACIOS, " ")
+    texto = pc.replace_substring_regex(pc.utf8_trim(texto, " "), _RETWEET_RE2, "")
+    return texto.to_numpy(zero_copy_only=False)
+
+
+def _normalizar_pandas(tweets):
+    texto = (tweets.astype(str).str.lower()
+             .str.replace(_URL, " ", regex=True)
+             .str.replace(_ESPACIOS, " ", regex=True)
+             .str.strip(" ")
+             .str.replace(_RETWEET_RE, "", regex=True))
+    return texto.to_numpy(dtype=object)
+
+
+def _mezclar(x):
+    # Finalizador de splitmix64: cada bit de la salida depende de todos los de la entrada
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _palabras(textos):
+    """Hash de cada palabra de los textos y el índice del texto al que pertenece."""
+    try:
+        return _palabras_arrow(textos)
+    except ImportError:
+        return _palabras_pandas(textos)
+
+
+def _palabras_arrow(textos):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    listas = pc.split_pattern_regex(pa.array(textos, type=pa.string()), _SEPARADOR_RE2)
+    planos = pc.list_flatten(listas)
+    validos = pc.not_equal(planos, "")
+    # Se calcula el hash de cada palabra distinta una sola vez
+    codificado = pc.dictionary_encode(planos.filter(validos))
+    hashes = pd.util.hash_array(codificado.dictionary.to_numpy(zero_copy_only=False))
+    padres = pc.list_parent_indices(listas).filter(validos)
+    return hashes[codificado.indices.to_numpy()], padres.to_numpy()
+
+
+def _palabras_pandas(textos):
+    tokens = [_PALABRA.findall(texto) for texto in textos]
+    longitudes = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    planos = np.fromiter((t for lista in tokens for t in lista), dtype=object, count=int(longitudes.sum()))
+    return pd.util.hash_array(planos), np.repeat(np.arange(len(tokens)), longitudes)
+
+
+def _tejas(textos):
+    """Hashes de los bigramas de palabras de cada texto, ordenados por texto.
+
+    Un texto de una sola palabra usa la palabra. Devuelve los hashes y el
+    índice del texto al que pertenece cada uno.
+    """
+    hashes, padres = _palabras(textos)
+    longitudes = np.bincount(padres, minlength=len(textos))
+    mismo = padres[:-1] == padres[1:]
+    bigramas = _mezclar(hashes[:-1][mismo] * np.uint64(0x9E3779B97F4A7C15) ^ hashes[1:][mismo])
+    sueltas = longitudes[padres] == 1
+    tejas = np.concatenate([bigramas, hashes[sueltas]])
+    padres = np.concatenate([padres[:-1][mismo], padres[sueltas]])
+    orden = np.argsort(padres, kind="stable")
+    return tejas[orden], padres[orden]
+
+
+def firmas_minhash(textos, coeficientes):
+    """Matriz (len(textos), len(coeficientes)) de mínimos de cada permutación.
+
+    Cada permutación es h -> los 32 bits altos de a*h + b (mod 2^64), con
+    `a` impar: basta un producto porque las tejas ya son hashes mezclados.
+    """
+    firmas = np.full((len(textos), len(coeficientes)), _VACIA, dtype=np.uint64)
+    tejas, padres = _tejas(textos)
+    if len(tejas) == 0:
+        return firmas
+    con_tejas, inicios = np.unique(padres, return_index=True)
+    for i, (a, b) in enumerate(coeficientes):
+        firmas[con_tejas, i] = np.minimum.reduceat((tejas * a + b) >> np.uint64(32), inicios)
+    return firmas
+
+
+def _firmas_fragmento(argumentos):
+    return firmas_minhash(*argumentos)
+
+
+class TablaOrdenada:
+    """Claves uint64 -> grupo, en arrays ordenados (sin un objeto por clave).
+
+    Las claves se guardan en tramos ordenados, como un árbol LSM: cada
+    agregar() añade un tramo y los dos últimos se fusionan mientras el
+    último sea al menos la mitad del anterior. Así hay O(log n) tramos y
+    cada clave se copia O(log n) veces, en lugar de reordenar toda la
+    tabla en cada bloque.
+    """
+
+    def __init__(self):
+        self._tramos = []
+
+    def __len__(self):
+        return sum(len(claves) for claves, _ in self._tramos)
+
+    def buscar(self, claves):
+        """Grupo de cada clave, o SIN_GRUPO si no está."""
+        resultado = np.full(len(claves), SIN_GRUPO, dtype=np.int64)
+        for tramo, grupos in self._tramos:
+            posicion = np.searchsorted(tramo, claves).clip(max=len(tramo) - 1)
+            encontrada = tramo[posicion] == claves
+            # Cada clave está en un solo tramo
+            resultado[encontrada] = grupos[posicion[encontrada]]
+        return resultado
+
+    def agregar(self, claves, grupos):
+        """Guarda las claves que aún no están (la primera si se repiten)."""
+        claves, primeras = np.unique(claves, return_index=True)
+        grupos = grupos[primeras]
+        nuevas = self.buscar(claves) == SIN_GRUPO
+        if not nuevas.any():
+            return
+        self._tramos.append((claves[nuevas], grupos[nuevas]))
+        while len(self._tramos) > 1 and 2 * len(self._tramos[-1][0]) >= len(self._tramos[-2][0]):
+            (claves_a, grupos_a), (claves_b, grupos_b) = self._tramos[-2:]
+            # Dos tramos ordenados: el ordenamiento estable los fusiona en tiempo lineal
+            claves = np.concatenate([claves_a, claves_b])
+            orden = np.argsort(claves, kind="stable")
+            self._tramos[-2:] = [(claves[orden], np.concatenate([grupos_a, grupos_b])[orden])]
+
+
+class Deduplicador:
+    """Agrupa tweets repetidos y casi repetidos a lo largo de todos los bloques.
+
+    Los duplicados exactos (tras normalizar) se detectan por hash. Para los
+    textos nuevos se calcula una firma MinHash de sus bigramas de palabras y
+    se parte en bandas (LSH): dos textos son candidatos a casi duplicado si
+    coinciden en alguna banda, así que nunca se comparan todos con todos, y
+    lo son si además la fracción de valores iguales de sus firmas (la
+    similitud de Jaccard estimada) llega a `umbral`.
+    marcar() añade a cada bloque 'Grupo' (id del contenido, el mismo para
+    todas las copias y variantes, en orden de primera aparición) y
+    'Duplicado' (el tweet no es el primero de su grupo).
+
+    Las firmas se calculan en `procesos` procesos (por defecto, uno por
+    núcleo) con 'fork'; donde no existe se calculan en el proceso actual.
+    Si marcar() se va a llamar desde otro hilo, o con otros hilos en
+    marcha, hay que llamar antes a iniciar().
+    """
+
+    def __init__(self, procesos=None, bandas=BANDAS, filas_banda=FILAS_BANDA, umbral=UMBRAL, semilla=SEMILLA):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            procesos = 1
+        self.procesos = procesos or os.cpu_count() or 1
+        self.bandas = bandas
+        self.filas_banda = filas_banda
+        self.umbral = umbral
+        self.coeficientes = np.random.default_rng(semilla).integers(
+            0, np.iinfo(np.uint64).max, (bandas * filas_banda, 2), dtype=np.uint64, endpoint=True)
+        self.coeficientes[:, 0] |= np.uint64(1)
+        self._exactos = TablaOrdenada()
+        self._cubos = [TablaOrdenada() for _ in range(bandas)]
+        # Firma del primer texto de cada grupo, con la que se confirman los candidatos
+        self._firmas_grupos = np.empty((0, bandas * filas_banda), dtype=np.uint16)
+        self._pool = None
+        self.tweets = 0
+        self.grupos = 0
+        self.exactos = 0
+        self.cercanos = 0
+
+    def _ejecutor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.procesos, mp_context=multiprocessing.get_context("fork"))
+        return self._pool
+
+    def iniciar(self):
+        """Crea los procesos ahora, antes de que haya otros hilos (ver frecuencia_palabras)."""
+        if self.procesos > 1:
+            self._ejecutor().submit(int).result()
+
+    def firmas(self, textos):
+        """Firmas MinHash de una lista de textos normalizados."""
+        partes = min(self.procesos, len(textos) // MIN_TEXTOS_POR_PROCESO)
+        if partes <= 1:
+            return firmas_minhash(textos, self.coeficientes)
+        tamano = -(-len(textos) // partes)
+        fragmentos = [(textos[i:i + tamano], self.coeficientes) for i in range(0, len(textos), tamano)]
+        return np.concatenate(list(self._ejecutor().map(_firmas_fragmento, fragmentos)))
+
+    def _llaves(self, firmas):
+        """Una clave por banda: el hash de sus FILAS_BANDA valores."""
+        llaves = []
+        for banda in range(self.bandas):
+            llave = np.full(len(firmas), banda, dtype=np.uint64)
+            for columna in firmas[:, banda * self.filas_banda:(banda + 1) * self.filas_banda].T:
+                llave = _mezclar(llave ^ columna)
+            llaves.append(llave)
+        return llaves
+
+    def _guardar_representantes(self, firmas):
+        necesarias = self.grupos + len(firmas)
+        if necesarias > len(self._firmas_grupos):
+            ampliada = np.empty((max(necesarias, 2 * len(self._firmas_grupos)), firmas.shape[1]), dtype=np.uint16)
+            ampliada[:self.grupos] = self._firmas_grupos[:self.grupos]
+            self._firmas_grupos = ampliada
+        self._firmas_grupos[self.grupos:necesarias] = firmas
+
+    def _similares(self, a, b):
+        return (a == b).mean(axis=1) >= self.umbral
+
+    def _agrupar(self, textos):
+        """Grupo de cada texto nuevo y si abre un grupo propio.
+
+        Un texto se une al grupo anterior con el que comparte cubo si su
+        firma se parece a la del primer texto del grupo (el de menor id si
+        hay varios), y a los textos del bloque con los que comparte cubo y
+        se parece; los grupos ya asignados no se fusionan después.
+        """
+        n = len(textos)
+        firmas = self.firmas(textos)
+        con_firma = firmas[:, 0] != _VACIA
+        # De cada valor basta con 16 bits para comparar firmas
+        compactas = firmas.astype(np.uint16)
+        posiciones = np.arange(n)
+        etiquetas = self.grupos + posiciones
+        origen, destino = [], []
+        llaves = self._llaves(firmas)
+        for tabla, llave in zip(self._cubos, llaves):
+            previos = tabla.buscar(llave)
+            candidatos = np.flatnonzero(con_firma & (previos != SIN_GRUPO))
+            candidatos = candidatos[self._similares(compactas[candidatos], self._firmas_grupos[previos[candidatos]])]
+            etiquetas[candidatos] = np.minimum(etiquetas[candidatos], previos[candidatos])
+            codigos, _ = pd.factorize(llave)
+            _, primeros = np.unique(codigos, return_index=True)
+            primero = primeros[codigos]
+            unir = np.flatnonzero(con_firma & (primero != posiciones))
+            unir = unir[self._similares(compactas[unir], compactas[primero[unir]])]
+            origen.append(unir)
+            destino.append(primero[unir])
+        # Se propaga la etiqueta mínima por las aristas hasta que no cambia
+        origen, destino = np.concatenate(origen), np.concatenate(destino)
+        while len(origen):
+            minimo = np.minimum(etiquetas[origen], etiquetas[destino])
+            nuevas = etiquetas.copy()
+            np.minimum.at(nuevas, origen, minimo)
+            np.minimum.at(nuevas, destino, minimo)
+            if np.array_equal(nuevas, etiquetas):
+                break
+            etiquetas = nuevas
+        propio = etiquetas == self.grupos + posiciones
+        # Ids consecutivos para los grupos nuevos, en orden de aparición
+        nuevas = etiquetas >= self.grupos
+        etiquetas[nuevas] = self.grupos + np.searchsorted(np.flatnonzero(propio), etiquetas[nuevas] - self.grupos)
+        self._guardar_representantes(compactas[propio])
+        self.grupos += int(propio.sum())
+        for tabla, llave in zip(self._cubos, llaves):
+            tabla.agregar(llave[con_firma], etiquetas[con_firma])
+        return etiquetas, propio
+
+    def marcar(self, df):
+        """Añade 'Grupo' y 'Duplicado' a un bloque limpio."""
+        with instrumentacion.etapa(instrumentacion.DUPLICADOS) as medicion:
+            medicion.contar(len(df))
+            con_texto = df["Tweet"].notna().to_numpy()
+            grupo = np.full(len(df), SIN_GRUPO, dtype=np.int64)
+            duplicado = np.zeros(len(df), dtype=bool)
+            if con_texto.any():
+                textos = normalizar(df["Tweet"][con_texto])
+                claves = pd.util.hash_array(textos)
+                grupos = self._exactos.buscar(claves)
+                nuevos = np.flatnonzero(grupos == SIN_GRUPO)
+                codigos, unicas = pd.factorize(claves[nuevos])
+                _, primeros = np.unique(codigos, return_index=True)
+                etiquetas, propio = self._agrupar(textos[nuevos[primeros]])
+                grupos[nuevos] = etiquetas[codigos]
+                self._exactos.agregar(unicas, etiquetas)
+                abre = np.zeros(len(textos), dtype=bool)
+                abre[nuevos[primeros[propio]]] = True
+                grupo[con_texto] = grupos
+                duplicado[con_texto] = ~abre
+                self.tweets += len(textos)
+                self.exactos += len(textos) - len(unicas)
+                self.cercanos += int((~propio).sum())
+            df["Grupo"] = grupo
+            df["Duplicado"] = duplicado
+        return df
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def sin_duplicados(bloques, deduplicador=None):
+    """Recorre los bloques dejando sólo el primer tweet de cada grupo."""
+    deduplicador = deduplicador or Deduplicador()
+    with deduplicador:
+        for bloque in bloques:
+            bloque = deduplicador.marcar(bloque)
+            yield bloque[~bloque["Duplicado"]]
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columnas del CSV que usan los análisis ('lang' tiene siempre el mismo valor)
+COLUMNAS = ["Date", "Tweet", "Hashtags", "Name", "Source", "Place", "Followers", "Friends", "Likes"]
+
+# Tipo de cada columna al leer el CSV. Los textos que se repiten mucho
+# (lugar, cliente, usuario) son categóricos: cada valor distinto se guarda
+# una vez y las filas sólo llevan un código. Los conteos son enteros sin
+# signo de 32 bits con nulos (ningún perfil ni tweet pasa de 4.000
+# millones), en lugar de float64 sólo para poder representar NaN.
+TIPOS = {
+    "Date": "object",
+    "Tweet": "object",
+    "Hashtags": "object",
+    "Name": "category",
+    "Source": "category",
+    "Place": "category",
+    "Followers": "UInt32",
+    "Friends": "UInt32",
+    "Likes": "UInt32",
+}
+
+# Columnas de conteos. Se leen como Float64 y se validan después (ver
+# validar_conteos): leídas como UInt32, pandas convierte "-1" en 4294967295.
+CONTEOS = [columna for columna, tipo in TIPOS.items() if tipo == "UInt32"]
+TIPOS_LECTURA = {**TIPOS, **{columna: "Float64" for columna in CONTEOS}}
+
+# Mayor conteo que cabe en UInt32
+MAX_CONTEO = 2**32 - 1
+
+# Tipos con los que se leían antes las columnas, para comparar la memoria
+TIPOS_SIN_COMPACTAR = {
+    "Name": "object",
+    "Source": "object",
+    "Place": "object",
+    "Followers": "float64",
+    "Friends": "float64",
+    "Likes": "float64",
+    "Sexo": "object",
+    "Plataforma": "object",
+}
+
+CATEGORICAS = [columna for columna, tipo in TIPOS.items() if tipo == "category"]
+
+
+def validar_conteos(df):
+    """Deja en UInt32 los conteos leídos con TIPOS_LECTURA.
+
+    Un conteo es un entero entre 0 y MAX_CONTEO; los negativos (como el -1
+    que usan algunas exportaciones para "desconocido"), los fraccionarios y
+    los que no caben quedan nulos en vez de descartar la fila.
+    """
+    for columna in CONTEOS:
+        if columna not in df:
+            continue
+        valores = df[columna].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Los nulos (NaN) no cumplen ninguna comparación: también quedan nulos
+        validos = (valores >= 0) & (valores <= MAX_CONTEO) & (valores == np.floor(valores))
+        enteros = np.where(validos, valores, 0).astype(np.uint32)
+        df[columna] = pd.arrays.IntegerArray(enteros, ~validos)
+    return df
+
+
+def esquema_arrow(bloque):
+    """Esquema Arrow de la caché para un bloque leído con TIPOS.
+
+    Las categóricas se guardan como texto: el formato de archivo de Arrow
+    no admite un diccionario distinto por lote, y al leer se vuelven a
+    codificar (ver opciones_arrow).
+    """
+    import pyarrow as pa
+
+    tipos = {"object": pa.string(), "category": pa.string(), "UInt32": pa.uint32()}
+    # 'Date' puede venir con o sin zona horaria según el CSV
+    return pa.schema([
+        (col, pa.array(bloque[col]).type if col == "Date" else tipos[TIPOS[col]])
+        for col in COLUMNAS
+    ])
+
+
+def opciones_arrow():
+    """Argumentos de to_pandas() para recuperar los tipos de TIPOS."""
+    import pyarrow as pa
+
+    return {
+        "categories": CATEGORICAS,
+        "types_mapper": {pa.uint32(): pd.UInt32Dtype()}.get,
+    }
+
+
+def ordenar_categorias(df):
+    """Deja las categorías de CATEGORICAS en orden alfabético.
+
+    Al leer la caché, las categorías salen en orden de aparición; con el
+    mismo orden que al leer el CSV, los groupby y tablas no dependen de
+    dónde se leyeron los datos.
+    """
+    for col in CATEGORICAS:
+        if col not in df:
+            continue
+        categorias = df[col].cat.categories
+        if not categorias.is_monotonic_increasing:
+            df[col] = df[col].cat.reorder_categories(categorias.sort_values())
+    return df
+
+
+def concatenar(bloques):
+    """Une bloques conservando las categóricas.
+
+    pd.concat convierte a object una columna categórica si las categorías
+    de los bloques no coinciden (cada bloque del CSV tiene las suyas);
+    union_categoricals las combina sin pasar por los textos de cada fila.
+    """
+    bloques = list(bloques)
+    categoricas = [col for col in bloques[0].columns
+                   if isinstance(bloques[0][col].dtype, pd.CategoricalDtype)]
+    unido = pd.concat([b.drop(columns=categoricas) for b in bloques], ignore_index=True)
+    for col in categoricas:
+        iguales = all(b[col].dtype == bloques[0][col].dtype for b in bloques)
+        valores = union_categoricals([b[col] for b in bloques], sort_categories=not iguales)
+        unido[col] = valores
+    return unido[bloques[0].columns]
+
+
+def memoria_por_columna(df):
+    """Bytes que ocupa cada columna, contando el contenido de los textos."""
+    return df.memory_usage(deep=True, index=False)
+
+
+def comparar_memoria(df):
+    """Bytes de cada columna con los tipos anteriores ('antes') y los actuales ('despues')."""
+    antes = memoria_por_columna(df.astype({c: t for c, t in TIPOS_SIN_COMPACTAR.items() if c in df}))
+    return pd.DataFrame({"antes": antes, "despues": memoria_por_columna(df)})
+
+
+def reporte_memoria(comparacion):
+    """Añade el total y el porcentaje de reducción a una comparación.
+
+    La comparación puede ser la suma de las de varios bloques.
+    """
+    reporte = comparacion.copy()
+    reporte.loc["Total"] = reporte.sum()
+    reporte["reduccion"] = (1 - reporte["despues"] / reporte["antes"]) * 100
+    return reporte
@@ -0,0 +1,116 @@
+import hashlib
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from recursos_locales import cargar_stopwords
+
+# Palabras de más de 3 caracteres: el filtro de longitud va en el propio
+# patrón (`\b\w{4,}\b` encuentra lo mismo que `\b\w+\b` con len(w) > 3).
+_PATRON_PALABRA = re.compile(r'\b\w{4,}\b')
+
+# Por debajo de este número de tweets no compensa repartir el trabajo
+MIN_TWEETS_POR_PROCESO = 5_000
+
+_stopwords_proceso = frozenset()
+
+
+def _iniciar_proceso(stopwords):
+    global _stopwords_proceso
+    _stopwords_proceso = stopwords
+
+
+def contar_fragmento(tweets, stopwords=None):
+    """Cuenta las palabras de una lista de tweets en un solo recorrido."""
+    if stopwords is None:
+        stopwords = _stopwords_proceso
+    contador = Counter()
+    buscar = _PATRON_PALABRA.findall
+    for texto in tweets:
+        contador.update(w for w in buscar(texto.lower()) if w not in stopwords)
+    return contador
+
+
+def huella_conteo(stopwords):
+    """Hash del patrón de palabras y de las stopwords con que se cuenta.
+
+    Si cambia, los conteos guardados (ver indice_frecuencias) ya no valen.
+    """
+    h = hashlib.blake2b(_PATRON_PALABRA.pattern.encode("utf-8"), digest_size=16)
+    for palabra in sorted(stopwords):
+        h.update(b"\n" + palabra.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _fragmentos(tweets, partes):
+    """Parte la lista en `partes` trozos contiguos, en orden."""
+    tamano = -(-len(tweets) // partes)
+    return [tweets[i:i + tamano] for i in range(0, len(tweets), tamano)]
+
+
+class ContadorPalabras:
+    """Conteo de palabras repartido entre varios procesos.
+
+    Cada proceso cuenta un trozo contiguo de los tweets y los Counter
+    parciales se suman en el mismo orden, de modo que el orden de primera
+    aparición (que decide los empates de most_common) es el mismo que al
+    contar todo de una vez y el top-N coincide exactamente.
+
+    Los procesos se crean con 'fork', que no vuelve a ejecutar el script
+    principal; donde no existe (Windows) se cuenta en un solo proceso. Sin
+    `stopwords` se usan las de recursos/stopwords_es.txt. Quien vaya a
+    contar desde un hilo debe llamar antes a iniciar().
+    """
+
+    def __init__(self, procesos=None, stopwords=None):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            procesos = 1
+        self.procesos = procesos or os.cpu_count() or 1
+        self.stopwords = cargar_stopwords() if stopwords is None else frozenset(stopwords)
+        self._pool = None
+
+    def _ejecutor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.procesos,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_iniciar_proceso,
+                initargs=(self.stopwords,),
+            )
+        return self._pool
+
+    def iniciar(self):
+        """Crea los procesos ahora, no al contar el primer bloque grande.
+
+        Hacer fork mientras otros hilos pueden tener tomado un cerrojo (de
+        pandas, del asignador de memoria, de logging...) puede dejar
+        bloqueados a los hijos: se llama desde el hilo principal antes de
+        lanzar hilos que cuenten.
+        """
+        if self.procesos > 1:
+            # Con 'fork', el primer envío arranca todos los procesos a la vez
+            self._ejecutor().submit(int).result()
+
+    def contar(self, tweets):
+        """Counter de palabras (sin stopwords y de más de 3 letras)."""
+        tweets = list(tweets)
+        partes = min(self.procesos, len(tweets) // MIN_TWEETS_POR_PROCESO)
+        if partes <= 1:
+            return contar_fragmento(tweets, self.stopwords)
+        total = Counter()
+        for parcial in self._ejecutor().map(contar_fragmento, _fragmentos(tweets, partes)):
+            total.update(parcial)
+        return total
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,47 @@
+# Genera los recursos locales que usan los análisis, para no descargar nada
+# al ejecutarlos (p. ej. en nodos sin red):
+#
+#   python generar_recursos.py            # tabla de sexo por nombre
+#   python generar_recursos.py --stopwords
+#
+# La tabla de sexo se calcula con gender_guesser, que trae su diccionario en
+# el propio paquete. Las stopwords ya están en recursos/; --stopwords sólo
+# las vuelve a copiar del corpus de NLTK instalado (sin descargarlo).
+import argparse
+import os
+
+from recursos_locales import DIRECTORIO_RECURSOS, RUTA_STOPWORDS, RUTA_SEXO_NOMBRES
+
+
+def generar_sexo_nombres(ruta=RUTA_SEXO_NOMBRES):
+    """Escribe nombre -> género de gender_guesser para todo su diccionario."""
+    import gender_guesser.detector as gender
+
+    detector = gender.Detector()
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        for nombre in sorted(detector.names):
+            f.write(f"{nombre}\t{detector.get_gender(nombre)}\n")
+    os.replace(temporal, ruta)
+    return len(detector.names)
+
+
+def generar_stopwords(ruta=RUTA_STOPWORDS):
+    """Copia las stopwords en español del corpus de NLTK ya instalado."""
+    from nltk.corpus import stopwords
+
+    palabras = stopwords.words('spanish')
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.writelines(f"{palabra}\n" for palabra in palabras)
+    return len(palabras)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los recursos locales de los análisis.")
+    parser.add_argument("--stopwords", action="store_true", help="copiar también las stopwords de NLTK")
+    args = parser.parse_args()
+
+    os.makedirs(DIRECTORIO_RECURSOS, exist_ok=True)
+    print(f"{generar_sexo_nombres()} nombres en '{RUTA_SEXO_NOMBRES}'")
+    if args.stopwords:
+        print(f"{generar_stopwords()} stopwords en '{RUTA_STOPWORDS}'")
@@ -0,0 +1,156 @@
+import pandas as pd
+
+# Estilos de las gráficas, los de los antiguos scripts de análisis:
+#   basico       sin etiquetas (data_analytics_2)
+#   porcentajes  cada barra con su valor y porcentaje (data_analytics_3)
+#   colores      como 'porcentajes', con un color por gráfica (data_analytics_4)
+#   valores      cada barra con su valor (data_analytics_5)
+ESTILOS = ("basico", "porcentajes", "colores", "valores")
+
+# Colores del estilo 'colores' (en 'sexo_plataforma', un mapa de colores)
+COLORES = {
+    "palabras": "skyblue",
+    "hashtags": "orchid",
+    "plataformas": "teal",
+    "sexo_plataforma": "Set2",
+    "likes_sexo": "salmon",
+    "likes_plataforma": "lightblue",
+}
+
+
+def configurar():
+    """Estilo común de matplotlib y seaborn para todas las gráficas."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set(rc={'figure.figsize': (12, 6)})
+
+
+def _color(nombre, estilo):
+    return {"color": COLORES[nombre]} if estilo == "colores" else {}
+
+
+def _texto_conteo(valor, total, estilo):
+    if estilo == "valores":
+        return str(valor)
+    return f"{valor} ({valor / total:.1%})"
+
+
+def _etiquetar_conteos(ax, valores, estilo, horizontal=False):
+    if estilo == "basico":
+        return
+    valores = list(valores)
+    total = sum(valores)
+    for i, valor in enumerate(valores):
+        if horizontal:
+            ax.text(valor, i, " " + _texto_conteo(valor, total, estilo), va='center')
+        else:
+            ax.text(i, valor, _texto_conteo(valor, total, estilo), ha='center', va='bottom')
+
+
+def _etiquetar_medias(ax, valores, estilo):
+    if estilo == "basico":
+        return
+    for i, valor in enumerate(valores):
+        ax.text(i, valor, f'{valor:.1f}', ha='center', va='bottom')
+
+
+def _barras_horizontales(nombre, datos, columnas, titulo, estilo):
+    import matplotlib.pyplot as plt
+
+    tabla = pd.DataFrame(datos, columns=columnas)
+    ax = tabla.plot(kind="barh", x=columnas[0], y=columnas[1], legend=False, ax=plt.gca(),
+                    **_color(nombre, estilo))
+    _etiquetar_conteos(ax, tabla[columnas[1]], estilo, horizontal=True)
+    plt.title(titulo)
+    plt.xlabel("Frecuencia")
+    ax.invert_yaxis()
+
+
+def grafica_palabras(word_freq, estilo="basico"):
+    _barras_horizontales("palabras", word_freq, ["Palabra", "Frecuencia"], "Palabras más comunes en tweets", estilo)
+
+
+def grafica_hashtags(hashtag_freq, estilo="basico"):
+    _barras_horizontales("hashtags", hashtag_freq, ["Hashtag", "Frecuencia"], "Hashtags más utilizados", estilo)
+
+
+def grafica_por_dia(tweets_por_dia, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    tweets_por_dia.plot(kind="line", marker="o", ax=plt.gca())
+    plt.title("Publicaciones por día")
+    plt.xlabel("Fecha")
+    plt.ylabel("Cantidad de tweets")
+    plt.xticks(rotation=45)
+
+
+def grafica_sexo(sexo_counts, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    total = sexo_counts.sum()
+    if estilo == "basico":
+        autopct = '%1.1f%%'
+    else:
+        autopct = lambda porcentaje: f'{porcentaje:.1f}%\n({round(porcentaje * total / 100)})'
+    sexo_counts.plot(kind="pie", autopct=autopct, startangle=90, title="¿Qué sexo publica más?", ax=plt.gca())
+    plt.ylabel("")
+
+
+def grafica_hora_region(tweets_por_hora_region, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    tweets_por_hora_region.T.plot(ax=plt.gca())
+    plt.title("Tweets por hora y región")
+    plt.xlabel("Hora del día")
+    plt.ylabel("Cantidad de tweets")
+
+
+def grafica_calor_hora_region(tweets_por_hora_region, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    imagen = plt.imshow(tweets_por_hora_region.to_numpy(), aspect="auto", cmap="viridis")
+    plt.colorbar(imagen, label="Cantidad de tweets")
+    plt.yticks(range(len(tweets_por_hora_region)), tweets_por_hora_region.index)
+    plt.xticks(range(len(tweets_por_hora_region.columns)), tweets_por_hora_region.columns)
+    plt.grid(False)
+    plt.title("Tweets por hora y región (regiones con más tweets)")
+    plt.xlabel("Hora del día")
+
+
+def grafica_plataformas(plataformas_counts, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    ax = plataformas_counts.plot(kind='bar', ax=plt.gca(), **_color("plataformas", estilo))
+    _etiquetar_conteos(ax, plataformas_counts, estilo)
+    plt.title("Plataforma desde la cual se tuiteó más")
+    plt.xlabel("Plataforma")
+    plt.ylabel("Cantidad de tweets")
+
+
+def grafica_sexo_plataforma(sexo_plataforma, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    colores = {"colormap": COLORES["sexo_plataforma"]} if estilo == "colores" else {}
+    sexo_plataforma.plot(kind='bar', stacked=True, ax=plt.gca(), **colores)
+    plt.title("Sexo que más tuiteó por plataforma")
+    plt.xlabel("Plataforma")
+    plt.ylabel("Tweets")
+
+
+def grafica_likes_sexo(likes_sexo, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    ax = likes_sexo.plot(kind='bar', title="Likes promedio por sexo", ax=plt.gca(), **_color("likes_sexo", estilo))
+    _etiquetar_medias(ax, likes_sexo, estilo)
+    plt.ylabel("Promedio de likes")
+
+
+def grafica_likes_plataforma(likes_plataforma, estilo="basico"):
+    import matplotlib.pyplot as plt
+
+    ax = likes_plataforma.plot(kind='bar', title="Likes promedio por plataforma", ax=plt.gca(),
+                               **_color("likes_plataforma", estilo))
+    _etiquetar_medias(ax, likes_plataforma, estilo)
+    plt.ylabel("Promedio de likes")
@@ -0,0 +1,81 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+# Un nodo del grafo: su valor es funcion(*valores de `entradas`)
+Nodo = namedtuple("Nodo", ["nombre", "entradas", "funcion"])
+
+
+def _llamar(nombre, funcion, *argumentos):
+    return funcion(*argumentos)
+
+
+class GrafoTareas:
+    """Grafo de tareas con entradas declaradas que se calcula bajo demanda.
+
+    `ejecutar` sólo calcula los nodos de los que dependen los objetivos y
+    que no tienen ya un valor, cada uno una sola vez aunque lo usen varios
+    nodos. Con un `ejecutor` (p. ej. un ThreadPoolExecutor) cada nodo se
+    lanza en cuanto están sus entradas, así que las ramas independientes
+    corren a la vez.
+    """
+
+    def __init__(self, nodos):
+        self.nodos = {nodo.nombre: nodo for nodo in nodos}
+        self._planes = {}
+
+    def necesarios(self, objetivos, conocidos=()):
+        """Nodos que hay que calcular para `objetivos`, en orden topológico."""
+        clave = (tuple(objetivos), frozenset(conocidos))
+        if clave not in self._planes:
+            orden, visitados, en_curso = [], set(conocidos), set()
+
+            def visitar(nombre):
+                if nombre in visitados:
+                    return
+                if nombre in en_curso:
+                    raise ValueError(f"El grafo tiene un ciclo que pasa por '{nombre}'")
+                if nombre not in self.nodos:
+                    raise KeyError(f"'{nombre}' no es un nodo ni tiene valor")
+                en_curso.add(nombre)
+                for entrada in self.nodos[nombre].entradas:
+                    visitar(entrada)
+                en_curso.discard(nombre)
+                visitados.add(nombre)
+                orden.append(nombre)
+
+            for objetivo in objetivos:
+                visitar(objetivo)
+            self._planes[clave] = orden
+        return self._planes[clave]
+
+    def ejecutar(self, objetivos, valores, ejecutor=None, llamar=_llamar):
+        """Calcula `objetivos` a partir de los `valores` ya conocidos.
+
+        Devuelve un diccionario con los valores dados y todos los
+        calculados. `llamar(nombre, funcion, *entradas)` ejecuta cada nodo
+        (sirve para medirlos); sin `ejecutor`, los nodos se calculan en
+        orden en este hilo.
+        """
+        valores = dict(valores)
+        pendientes = self.necesarios(objetivos, valores)
+        if ejecutor is None:
+            for nombre in pendientes:
+                nodo = self.nodos[nombre]
+                valores[nombre] = llamar(nombre, nodo.funcion, *(valores[e] for e in nodo.entradas))
+            return valores
+
+        faltan = {nombre: set(self.nodos[nombre].entradas) - set(valores) for nombre in pendientes}
+        en_marcha = {}
+        while faltan or en_marcha:
+            for nombre in [nombre for nombre, entradas in faltan.items() if not entradas]:
+                del faltan[nombre]
+                nodo = self.nodos[nombre]
+                futuro = ejecutor.submit(llamar, nombre, nodo.funcion, *(valores[e] for e in nodo.entradas))
+                en_marcha[futuro] = nombre
+            hechos, _ = wait(en_marcha, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                nombre = en_marcha.pop(futuro)
+                valores[nombre] = futuro.result()
+                for entradas in faltan.values():
+                    entradas.discard(nombre)
+        return valores
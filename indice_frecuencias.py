@@ -0,0 +1,224 @@
+import hashlib
+import heapq
+import os
+import pickle
+from collections import Counter
+from operator import itemgetter
+
+import instrumentacion
+from analisis_hashtags import explotar_hashtags, contar
+from cargar_y_limpiar_datos import leer_filas_nuevas
+from frecuencia_palabras import ContadorPalabras, huella_conteo
+from recursos_locales import cargar_stopwords
+
+# Sube al cambiar el formato del índice o cómo se cuentan los términos; un
+# índice guardado con otra versión se rehace desde cero
+VERSION_INDICE = 2
+
+# Modos del índice: conteo exacto o resumen de memoria fija
+MODOS = ("exacto", "space_saving")
+
+# Términos que guarda cada tabla en el modo "space_saving"
+CAPACIDAD = 10_000
+
+# Bytes del CSV que se leen de una vez al indexar
+BYTES_LECTURA = 64 * 1024 * 1024
+
+# Bytes del inicio del CSV con los que se reconoce que es el mismo archivo
+_BYTES_HUELLA = 1 << 16
+
+
+def contar_hashtags(hashtags, explotado=None):
+    """Counter de hashtags (en minúsculas) de una columna 'Hashtags'.
+
+    `explotado` es explotar_hashtags(hashtags), si ya se tiene.
+    """
+    conteo = contar(explotar_hashtags(hashtags) if explotado is None else explotado)
+    return Counter(dict(zip(conteo.index, conteo.to_numpy().tolist())))
+
+
+class FrecuenciasExactas:
+    """Conteo exacto de todos los términos vistos."""
+
+    def __init__(self):
+        self.conteos = Counter()
+
+    def sumar(self, conteos):
+        self.conteos.update(conteos)
+
+    def top(self, k):
+        return self.conteos.most_common(k)
+
+    def __len__(self):
+        return len(self.conteos)
+
+
+class FrecuenciasSpaceSaving:
+    """Resumen Space-Saving: memoria fija de `capacidad` términos.
+
+    Cuando llega un término nuevo con la tabla llena, reemplaza al de menor
+    conteo y hereda ese conteo como error máximo. Los términos frecuentes
+    (más de N / capacidad apariciones) nunca se pierden, y cada conteo
+    sobreestima el real en como mucho `errores[termino]`.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD):
+        self.capacidad = capacidad
+        self.conteos = {}
+        self.errores = {}
+        # Montículo de (conteo, término) con entradas que pueden estar
+        # desactualizadas: los conteos sólo crecen, así que basta con
+        # comprobarlas al sacarlas.
+        self._monticulo = []
+
+    def _sacar_minimo(self):
+        while True:
+            conteo, termino = heapq.heappop(self._monticulo)
+            actual = self.conteos.get(termino)
+            if actual == conteo:
+                return conteo, termino
+            if actual is not None:
+                heapq.heappush(self._monticulo, (actual, termino))
+
+    def sumar(self, conteos):
+        for termino, n in conteos.items():
+            if termino in self.conteos:
+                self.conteos[termino] += n
+                continue
+            error = 0
+            if len(self.conteos) >= self.capacidad:
+                error, desplazado = self._sacar_minimo()
+                del self.conteos[desplazado]
+                del self.errores[desplazado]
+            self.conteos[termino] = error + n
+            self.errores[termino] = error
+            heapq.heappush(self._monticulo, (error + n, termino))
+        if len(self._monticulo) > 4 * self.capacidad:
+            self._monticulo = [(n, t) for t, n in self.conteos.items()]
+            heapq.heapify(self._monticulo)
+
+    def top(self, k):
+        return heapq.nlargest(k, self.conteos.items(), key=itemgetter(1))
+
+    def __len__(self):
+        return len(self.conteos)
+
+
+def _nueva_tabla(modo, capacidad):
+    if modo == "exacto":
+        return FrecuenciasExactas()
+    if modo == "space_saving":
+        return FrecuenciasSpaceSaving(capacidad)
+    raise ValueError(f"Modo de índice desconocido: {modo!r} (hay {list(MODOS)})")
+
+
+def ruta_indice(file_path):
+    """Ruta del índice guardado de un CSV, junto a él (como la caché limpia)."""
+    base, _ = os.path.splitext(file_path)
+    return base + "_indice_frecuencias.pkl"
+
+
+def _huella(file_path, longitud):
+    with open(file_path, "rb") as f:
+        return hashlib.blake2b(f.read(longitud), digest_size=16).hexdigest()
+
+
+class IndiceFrecuencias:
+    """Frecuencias de palabras y hashtags acumuladas entre ejecuciones.
+
+    Guarda hasta qué byte del CSV se ha procesado, así que cada
+    actualización sólo lee y cuenta las filas añadidas desde la anterior.
+    Las consultas de top-K se responden desde las tablas, sin volver a
+    recorrer los tweets. Guarda también la versión y la huella del conteo
+    de palabras (patrón y stopwords): si alguna cambia, hay que rehacerlo.
+    """
+
+    def __init__(self, modo="exacto", capacidad=CAPACIDAD, stopwords=None):
+        self.modo = modo
+        self.capacidad = capacidad
+        self.stopwords = cargar_stopwords() if stopwords is None else frozenset(stopwords)
+        self.version = VERSION_INDICE
+        self.conteo = huella_conteo(self.stopwords)
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.palabras = _nueva_tabla(self.modo, self.capacidad)
+        self.hashtags = _nueva_tabla(self.modo, self.capacidad)
+        self.archivo = None
+        self.huella = None
+        self.desplazamiento = 0
+        self.filas = 0
+
+    def sumar_bloque(self, df, contador_palabras):
+        """Incorpora un bloque limpio a las tablas."""
+        with instrumentacion.etapa(instrumentacion.INDICE) as medicion:
+            self.palabras.sumar(contador_palabras.contar(df['Tweet'].dropna()))
+            self.hashtags.sumar(contar_hashtags(df['Hashtags']))
+            self.filas += len(df)
+            medicion.contar(len(df))
+
+    def _es_continuacion(self, file_path):
+        """Indica si el CSV es el ya indexado con filas añadidas al final."""
+        if self.archivo != os.path.abspath(file_path) or not self.desplazamiento:
+            return False
+        if os.path.getsize(file_path) < self.desplazamiento:
+            return False
+        return self.huella == _huella(file_path, min(self.desplazamiento, _BYTES_HUELLA))
+
+    def actualizar(self, file_path, procesos=None):
+        """Cuenta las filas nuevas del CSV; devuelve cuántas se procesaron.
+
+        Tanto al indexar un archivo nuevo como al sumar filas añadidas, el
+        desplazamiento es el final del último registro completo leído: una
+        fila a medio escribir se cuenta en la siguiente actualización.
+        """
+        if not self._es_continuacion(file_path):
+            # Archivo nuevo o reemplazado: se indexa completo
+            self._reiniciar()
+        filas_antes = self.filas
+        with ContadorPalabras(procesos, self.stopwords) as contador:
+            while True:
+                bloques, desplazamiento = leer_filas_nuevas(file_path, self.desplazamiento, limite=BYTES_LECTURA)
+                for bloque in bloques:
+                    self.sumar_bloque(bloque, contador)
+                if desplazamiento == self.desplazamiento:
+                    break
+                self.desplazamiento = desplazamiento
+        self.archivo = os.path.abspath(file_path)
+        self.huella = _huella(file_path, min(self.desplazamiento, _BYTES_HUELLA))
+        return self.filas - filas_antes
+
+    def guardar(self, ruta):
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, "rb") as f:
+            return pickle.load(f)
+
+
+def actualizar_indice(file_path="mundial_tweets.csv", ruta=None, modo="exacto",
+                      capacidad=CAPACIDAD, procesos=None):
+    """Abre (o crea) el índice guardado, le suma las filas nuevas y lo guarda.
+
+    Sin `ruta`, el índice va junto al CSV (ver ruta_indice). Uno guardado
+    con otra versión, otro modo u otras stopwords se rehace desde cero.
+    """
+    ruta = ruta_indice(file_path) if ruta is None else ruta
+    stopwords = cargar_stopwords()
+    indice, nuevo = None, False
+    if os.path.exists(ruta):
+        try:
+            indice = IndiceFrecuencias.cargar(ruta)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            indice = None
+    if (indice is None or getattr(indice, "version", None) != VERSION_INDICE
+            or indice.conteo != huella_conteo(stopwords) or indice.modo != modo or indice.capacidad != capacidad):
+        indice = IndiceFrecuencias(modo, capacidad, stopwords)
+        nuevo = True
+    if indice.actualizar(file_path, procesos) or nuevo:
+        indice.guardar(ruta)
+    return indice
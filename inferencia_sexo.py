@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from recursos_locales import cargar_detector
+
+# Normalización de las categorías de gender_guesser
+MAPA_SEXO = {
+    "male": "Hombre",
+    "female": "Mujer",
+    "mostly_male": "Hombre",
+    "mostly_female": "Mujer",
+    "unknown": "Desconocido",
+    "andy": "Ambiguo"
+}
+CATEGORIAS_SEXO = ["Ambiguo", "Desconocido", "Hombre", "Mujer"]
+_DESCONOCIDO = CATEGORIAS_SEXO.index("Desconocido")
+_CODIGO_GENERO = {genero: CATEGORIAS_SEXO.index(sexo) for genero, sexo in MAPA_SEXO.items()}
+
+# Caché en disco nombre -> resultado de gender_guesser (una línea por nombre)
+RUTA_CACHE_SEXO = "cache_sexo.tsv"
+
+
+class InferenciaSexo:
+    """Asigna 'Sexo' a partir del primer nombre consultando cada nombre una vez.
+
+    Los nombres se factorizan, sólo los distintos que no estén en la caché se
+    pasan por gender_guesser, y el resultado se reparte a todas las filas con
+    un `take` sobre los códigos. La caché se guarda en disco añadiendo líneas,
+    así que sirve entre ejecuciones y su coste depende sólo de los nombres
+    nuevos.
+    """
+
+    def __init__(self, ruta_cache=RUTA_CACHE_SEXO, detector=None):
+        self.ruta_cache = ruta_cache
+        self._detector = detector
+        self.generos = self._leer_cache()
+
+    def _leer_cache(self):
+        generos = {}
+        if self.ruta_cache and os.path.exists(self.ruta_cache):
+            with open(self.ruta_cache, encoding="utf-8") as f:
+                for linea in f:
+                    nombre, _, genero = linea.rstrip("\n").partition("\t")
+                    generos[nombre] = genero
+        return generos
+
+    def _guardar(self, nuevos):
+        if not self.ruta_cache:
+            return
+        with open(self.ruta_cache, "a", encoding="utf-8") as f:
+            f.writelines(f"{nombre}\t{genero}\n" for nombre, genero in nuevos.items())
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            self._detector = cargar_detector()
+        return self._detector
+
+    def resolver(self, nombres):
+        """Devuelve el código de categoría de cada nombre (sin repetidos)."""
+        nuevos = {}
+        for nombre in nombres:
+            if nombre not in self.generos:
+                nuevos[nombre] = self.detector.get_gender(nombre)
+        if nuevos:
+            self.generos.update(nuevos)
+            self._guardar(nuevos)
+        return np.fromiter(
+            (_CODIGO_GENERO.get(self.generos[nombre], _DESCONOCIDO) for nombre in nombres),
+            dtype=np.int8, count=len(nombres),
+        )
+
+    def inferir(self, nombres):
+        """Columna categórica 'Sexo' para una serie de nombres completos."""
+        primer_nombre = nombres.str.split(n=1).str[0]
+        codigos, unicos = pd.factorize(primer_nombre)
+        # El código -1 (sin nombre) toma el último valor: "Desconocido"
+        tabla = np.append(self.resolver(unicos), np.int8(_DESCONOCIDO))
+        sexo = pd.Categorical.from_codes(tabla.take(codigos), categories=CATEGORIAS_SEXO)
+        return pd.Series(sexo, index=nombres.index, name="Sexo")
@@ -0,0 +1,298 @@
+# Mide por etapas (secciones 1-12) cualquier script de análisis sin editarlo:
+#
+#   python instrumentacion.py data_analytics_2.py
+#   python instrumentacion.py --cprofile --tracemalloc --salida perfil.json reporte_batch.py --formatos png
+#
+# Las etapas se registran desde los módulos (carga, enriquecimiento,
+# agregados, índice); este archivo sólo las activa, ejecuta el script y al
+# final imprime una tabla y guarda el resumen en JSON. Sin activar, cada
+# etapa cuesta una llamada a una función vacía.
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+
+# Nombres de las etapas que registran los módulos
+CARGA = "1. Carga y limpieza"
+DUPLICADOS = "1. Duplicados"
+PALABRAS = "2. Palabras"
+HASHTAGS = "3. Hashtags"
+INDICE = "2-3. Índice de frecuencias"
+AGRUPADAS = "5, 8-9, 12. Métricas agrupadas"
+SERIES = "4, 7. Series de tiempo"
+SEXO = "5. Sexo (inferencia)"
+SPAM = "6. Spam por cuenta"
+PLATAFORMA = "8. Plataforma (clasificación)"
+TEXTO = "10-11. Métricas de texto"
+RESULTADOS = "Resultados"
+CONSULTAS_SQL = "Consultas SQL"
+GRAFICAS = "Gráficas"
+
+# Funciones por etapa que se guardan del perfil de cProfile
+FUNCIONES_PERFIL = 15
+
+_activa = None
+
+
+def memoria_rss_kb():
+    """RSS actual del proceso en kB (None fuera de Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class _EtapaInactiva:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def contar(self, filas):
+        pass
+
+
+_INACTIVA = _EtapaInactiva()
+
+
+class _Medicion:
+    """Una ejecución de una etapa; al salir suma lo medido a sus totales."""
+
+    def __init__(self, instrumentacion, nombre):
+        self.instrumentacion = instrumentacion
+        self.nombre = nombre
+        self.filas = 0
+        self.hilo = threading.get_ident()
+        # Otro hilo tuvo una etapa abierta mientras duraba esta
+        self.solapada = False
+        # Empezó dentro de otra etapa del mismo hilo
+        self.anidada = False
+
+    def contar(self, filas):
+        self.filas += filas
+
+    def __enter__(self):
+        ins = self.instrumentacion
+        with ins._cerrojo:
+            otras = [medicion for medicion in ins._abiertas if medicion.hilo != self.hilo]
+            for medicion in otras:
+                medicion.solapada = True
+            self.solapada = bool(otras)
+            self.anidada = any(medicion.hilo == self.hilo for medicion in ins._abiertas)
+            ins._abiertas.append(self)
+        self._perfil = None
+        if ins.cprofile and not ins._perfil_activo and not self.solapada:
+            # cProfile no admite dos perfiles a la vez: sólo perfila la etapa externa
+            self._perfil = ins._perfiles.setdefault(self.nombre, ins._nuevo_perfil())
+            ins._perfil_activo = True
+            self._perfil.enable()
+        if ins.tracemalloc and not self.solapada:
+            import tracemalloc
+
+            tracemalloc.reset_peak()
+            self._python_inicio = tracemalloc.get_traced_memory()[0]
+        self._rss = memoria_rss_kb()
+        self._cpu = time.thread_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self._inicio
+        cpu = time.thread_time() - self._cpu
+        rss = memoria_rss_kb()
+        ins = self.instrumentacion
+        if self._perfil is not None:
+            self._perfil.disable()
+            ins._perfil_activo = False
+        with ins._cerrojo:
+            ins._abiertas.remove(self)
+            datos = ins.etapas.setdefault(self.nombre, {
+                "llamadas": 0, "solapadas": 0, "anidadas": 0, "segundos": 0.0, "segundos_externos": 0.0,
+                "cpu_segundos": 0.0, "filas": 0, "memoria_delta_mb": 0.0,
+            })
+            datos["llamadas"] += 1
+            datos["segundos"] += segundos
+            if self.anidada:
+                datos["anidadas"] += 1
+            else:
+                datos["segundos_externos"] += segundos
+            datos["cpu_segundos"] += cpu
+            datos["filas"] += self.filas
+            # La memoria es la de todo el proceso: sólo se atribuye si la etapa corrió sola
+            if self.solapada:
+                datos["solapadas"] += 1
+            elif rss is not None and self._rss is not None:
+                datos["memoria_delta_mb"] += (rss - self._rss) / 1024
+            if ins.tracemalloc and not self.solapada:
+                import tracemalloc
+
+                pico = (tracemalloc.get_traced_memory()[1] - self._python_inicio) / 2**20
+                datos["pico_python_mb"] = max(datos.get("pico_python_mb", 0.0), pico)
+        return False
+
+
+class Instrumentacion:
+    """Tiempos, CPU, filas y memoria acumulados por etapa.
+
+    'cpu_segundos' es el tiempo de CPU del hilo que ejecuta la etapa (no
+    incluye otros hilos ni procesos hijos). 'memoria_delta_mb' es la suma
+    de lo que cambió el RSS en cada llamada (positivo si la etapa deja
+    memoria ocupada). Con `tracemalloc`, además, el pico de memoria
+    reservada por Python durante la etapa; con `cprofile`, las funciones
+    que más tiempo acumulan en ella.
+
+    La memoria y el perfil son de todo el proceso, así que sólo se toman de
+    las llamadas que no coinciden con una etapa de otro hilo; 'solapadas'
+    cuenta las que sí (con el pool de hilos de agregados). Con `cprofile` o
+    `tracemalloc`, agregados ejecuta sus pasos en orden (ver exclusiva).
+
+    Una etapa puede ir dentro de otra del mismo hilo (p. ej. la carga
+    dentro de las consultas SQL): 'anidadas' cuenta esas llamadas y
+    'segundos_externos' suma sólo las que no lo están, que son las que se
+    restan del total para la fila "Sin etapa".
+    """
+
+    def __init__(self, cprofile=False, tracemalloc=False):
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc
+        self.etapas = {}
+        self._perfiles = {}
+        self._perfil_activo = False
+        self._abiertas = []
+        self._cerrojo = threading.Lock()
+        self._inicio = time.perf_counter()
+
+    def _nuevo_perfil(self):
+        import cProfile
+
+        return cProfile.Profile()
+
+    def etapa(self, nombre):
+        return _Medicion(self, nombre)
+
+    def _funciones(self, perfil):
+        import pstats
+
+        estadisticas = pstats.Stats(perfil)
+        filas = sorted(estadisticas.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "funcion": f"{os.path.basename(archivo)}:{linea}({nombre})",
+                "llamadas": llamadas,
+                "tiempo_propio": propio,
+                "tiempo_acumulado": acumulado,
+            }
+            for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _) in filas[:FUNCIONES_PERFIL]
+        ]
+
+    def resumen(self):
+        """Diccionario listo para JSON con los totales de cada etapa."""
+        etapas = {}
+        for nombre, datos in self.etapas.items():
+            etapa = dict(datos)
+            etapa["filas_por_segundo"] = datos["filas"] / datos["segundos"] if datos["filas"] and datos["segundos"] else None
+            if nombre in self._perfiles:
+                etapa["perfil"] = self._funciones(self._perfiles[nombre])
+            etapas[nombre] = etapa
+        return {"total_segundos": time.perf_counter() - self._inicio, "etapas": etapas}
+
+    def tabla(self):
+        """Resumen en texto, una fila por etapa."""
+        resumen = self.resumen()
+        pico = f" {'Pico py MB':>10}" if self.tracemalloc else ""
+        lineas = [f"{'Etapa':<30} {'Llamadas':>8} {'Filas':>10} {'Wall s':>8} {'CPU s':>8} {'ΔRSS MB':>8}{pico}"]
+        for nombre, datos in resumen["etapas"].items():
+            marca = "*" if datos["solapadas"] else ""
+            linea = (f"{nombre + marca:<30} {datos['llamadas']:>8} {datos['filas']:>10} {datos['segundos']:>8.3f} "
+                     f"{datos['cpu_segundos']:>8.3f} {datos['memoria_delta_mb']:>8.1f}")
+            if self.tracemalloc:
+                linea += f" {datos.get('pico_python_mb', 0.0):>10.1f}"
+            lineas.append(linea)
+        solapadas = any(d["solapadas"] for d in resumen["etapas"].values())
+        if not solapadas:
+            medido = sum(d["segundos_externos"] for d in resumen["etapas"].values())
+            # Lo que no está en ninguna etapa: gráficas de los scripts, importaciones...
+            lineas.append(f"{'Sin etapa':<30} {'':>8} {'':>10} {resumen['total_segundos'] - medido:>8.3f}")
+        lineas.append(f"{'Total':<30} {'':>8} {'':>10} {resumen['total_segundos']:>8.3f}")
+        if solapadas:
+            lineas.append("* corrió a la vez que etapas de otros hilos: los tiempos reales se solapan y "
+                          "la memoria sólo cuenta las llamadas que corrieron solas")
+        return "\n".join(lineas)
+
+    def guardar(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.resumen(), f, indent=2, ensure_ascii=False)
+
+
+def activar(cprofile=False, tracemalloc=False):
+    """Empieza a registrar etapas; devuelve la instrumentación activa."""
+    global _activa
+    if tracemalloc:
+        import tracemalloc as tm
+
+        tm.start()
+    _activa = Instrumentacion(cprofile, tracemalloc)
+    return _activa
+
+
+def desactivar():
+    global _activa
+    instrumentacion, _activa = _activa, None
+    if instrumentacion is not None and instrumentacion.tracemalloc:
+        import tracemalloc
+
+        tracemalloc.stop()
+    return instrumentacion
+
+
+def exclusiva():
+    """Indica si las etapas deben ejecutarse de una en una.
+
+    cProfile y tracemalloc miden todo el proceso: con ellos activos, los
+    pasos que podrían correr en paralelo se ejecutan en orden para que
+    cada etapa mida sólo lo suyo.
+    """
+    return _activa is not None and (_activa.cprofile or _activa.tracemalloc)
+
+
+def etapa(nombre):
+    """Contexto que mide una ejecución de la etapa `nombre` (nada si está inactiva).
+
+    El objeto devuelto por `with` tiene contar(filas) para anotar las filas
+    procesadas.
+    """
+    if _activa is None:
+        return _INACTIVA
+    return _activa.etapa(nombre)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta un script de análisis midiendo sus etapas.")
+    parser.add_argument("--cprofile", action="store_true", help="perfilar las funciones de cada etapa")
+    parser.add_argument("--tracemalloc", action="store_true", help="medir el pico de memoria de Python por etapa")
+    parser.add_argument("--salida", default="instrumentacion.json", help="JSON con el resumen")
+    parser.add_argument("script", help="script a ejecutar")
+    parser.add_argument("argumentos", nargs=argparse.REMAINDER, help="argumentos del script")
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.argumentos
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    # Los módulos importan 'instrumentacion', no este '__main__': se activa ese
+    import instrumentacion as modulo
+
+    instrumentacion = modulo.activar(args.cprofile, args.tracemalloc)
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    finally:
+        modulo.desactivar()
+        print("\n" + instrumentacion.tabla())
+        instrumentacion.guardar(args.salida)
+        print(f"\nResumen guardado en '{args.salida}'")
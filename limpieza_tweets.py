@@ -1,32 +1,88 @@
+import argparse
+
 import pandas as pd
 
-# Cargar datos originales
-print("Cargando datos originales...")
-df = pd.read_csv("mundial_tweets.csv")
+from cargar_y_limpiar_datos import iterar_bloques
+from cache_limpio import ruta_cache
+from dataset_particionado import escribir_dataset
+from duplicados import Deduplicador
+from esquema import comparar_memoria, reporte_memoria
+
+parser = argparse.ArgumentParser(description="Limpia los tweets y guarda la caché y el dataset particionado.")
+parser.add_argument("--por-plataforma", action="store_true",
+                    help="particionar el dataset también por plataforma, además de por fecha")
+args = parser.parse_args()
+
+# Cargar datos originales por bloques
+# ('lang' no se lee porque todos los valores son iguales; 'Date' se convierte
+# a datetime y de ella salen 'Dia' y 'Hora_int' dentro de cada bloque). La
+# primera lectura deja además la caché columnar que usan los scripts de
+# análisis.
+print("Cargando datos originales por bloques...")
+vista_previa = None
+tipos = None
+total_filas = 0
+nulos = None
+memoria = None
+# Copias exactas, retweets y casi duplicados (ver duplicados). Sus procesos
+# se crean ya: pyarrow recorre los bloques desde sus propios hilos
+deduplicador = Deduplicador()
+deduplicador.iniciar()
+
 
-# Eliminar columna 'lang' porque todos los valores son iguales
-print("Eliminando columna 'lang'...")
-df = df.drop(columns=["lang"])
+def revisar_bloques():
+    global vista_previa, tipos, total_filas, nulos, memoria
+    for bloque in iterar_bloques("mundial_tweets.csv"):
+        if vista_previa is None:
+            vista_previa = bloque.head(10)
+            tipos = bloque.dtypes
+        total_filas += len(bloque)
+        nulos_bloque = bloque.isnull().sum()
+        nulos = nulos_bloque if nulos is None else nulos + nulos_bloque
+        memoria_bloque = comparar_memoria(bloque)
+        memoria = memoria_bloque if memoria is None else memoria + memoria_bloque
+        deduplicador.marcar(bloque)
+        yield bloque
 
-# Convertir columna 'Date' a datetime, y separar en 'Fecha' y 'Hora'
-print("Separando fecha y hora...")
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-df["Fecha"] = df["Date"].dt.date
-df["Hora"] = df["Date"].dt.time
-df = df.drop(columns=["Date"])
+
+# Mientras se revisan, los bloques limpios se guardan particionados por fecha
+# (ver dataset_particionado)
+with deduplicador:
+    try:
+        ruta_particiones = escribir_dataset("mundial_tweets.csv", revisar_bloques(),
+                                            por_plataforma=args.por_plataforma)
+    except ImportError:
+        # Sin pyarrow no hay dataset particionado
+        ruta_particiones = None
+        for _ in revisar_bloques():
+            pass
 
 # Mostrar resumen de datos
-print("\n Vista previa de los datos limpios (primeros 10 registros):")
-print(df.head(10))
+if total_filas == 0:
+    print("\n El archivo no tiene registros.")
+else:
+    print("\n Vista previa de los datos limpios (primeros 10 registros):")
+    print(vista_previa)
+
+    print("\n Información general del DataFrame:")
+    print(f"Registros: {total_filas}")
+    print(pd.DataFrame({"Tipo": tipos, "No nulos": total_filas - nulos}))
+
+    print("\n Conteo de valores nulos por columna:")
+    print(nulos)
 
-print("\n Información general del DataFrame:")
-print(df.info())
+    # Categóricas y enteros compactos (ver esquema) frente a object/float64
+    print("\n Memoria por columna (bytes) y reducción (%):")
+    print(reporte_memoria(memoria).round({"reduccion": 1}))
 
-print("\n Conteo de valores nulos por columna:")
-print(df.isnull().sum())
+print("\n Tweets duplicados:")
+print(f"Copias exactas (incluye retweets): {deduplicador.exactos}")
+print(f"Casi duplicados: {deduplicador.cercanos}")
+print(f"Contenidos distintos: {deduplicador.grupos} de {deduplicador.tweets} tweets")
 
-# Guardar archivo limpio
-print("\n Guardando archivo limpio como 'mundial_tweets_limpio.csv'...")
-# df.to_csv("mundial_tweets_limpio.csv", index=False)
+# El archivo limpio queda guardado como caché columnar
+print(f"\n Archivo limpio guardado como '{ruta_cache('mundial_tweets.csv')}'")
+if ruta_particiones is not None:
+    print(f" Dataset particionado por fecha guardado en '{ruta_particiones}'")
 
 print("\n Proceso de limpieza completado.")
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+# Caracteres que str.split() trata como espacio (los de str.isspace())
+_ESPACIOS = [(0x09, 0x0D), (0x1C, 0x20), (0x85, 0x85), (0xA0, 0xA0), (0x1680, 0x1680),
+             (0x2000, 0x200A), (0x2028, 0x2029), (0x202F, 0x202F), (0x205F, 0x205F),
+             (0x3000, 0x3000)]
+
+# Bloques de pictogramas: se cuenta cada carácter de emoji (una bandera son
+# dos indicadores regionales y cuenta dos)
+_EMOJIS = [(0x2600, 0x27BF), (0x2B00, 0x2BFF), (0x1F000, 0x1FAFF)]
+
+# Columnas que se calculan y su tipo
+TIPOS_TEXTO = {
+    "Longitud": "int32",
+    "Palabras": "int16",
+    "Hashtags_n": "int16",
+    "Menciones": "int16",
+    "URLs": "int16",
+    "Emojis": "int16",
+}
+
+
+def _clase(rangos, escape):
+    return "".join(escape(a) if a == b else f"{escape(a)}-{escape(b)}" for a, b in rangos)
+
+
+def _patrones(escape, palabra):
+    """Patrones de cada conteo, para el motor de expresiones indicado."""
+    no_espacio = f"[^{_clase(_ESPACIOS, escape)}]+"
+    return {
+        "Palabras": no_espacio,
+        "Hashtags_n": f"#{palabra}+",
+        "Menciones": f"@{palabra}+",
+        "URLs": f"https?://{no_espacio}",
+        "Emojis": f"[{_clase(_EMOJIS, escape)}]",
+    }
+
+
+# Los mismos patrones para re (pandas) y para RE2 (pyarrow)
+_PATRONES_RE = _patrones(lambda c: f"\\U{c:08x}", r"\w")
+_PATRONES_RE2 = _patrones(lambda c: f"\\x{{{c:x}}}", r"[\pL\pN_]")
+
+
+def metricas_texto(tweets):
+    """Longitud y conteos de cada tweet como columnas enteras compactas.
+
+    'Palabras' coincide con len(texto.split()). Los tweets nulos cuentan
+    como texto vacío (todo a cero). Con pyarrow los conteos se hacen en C
+    sin crear listas por tweet; si no está, con los métodos .str de pandas.
+    """
+    try:
+        columnas = _metricas_arrow(tweets)
+    except ImportError:
+        columnas = _metricas_pandas(tweets)
+    return pd.DataFrame(
+        {nombre: np.asarray(columnas[nombre]).astype(tipo) for nombre, tipo in TIPOS_TEXTO.items()},
+        index=tweets.index,
+    )
+
+
+def _metricas_arrow(tweets):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    texto = pa.array(tweets.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    texto = pc.fill_null(texto, "")
+    columnas = {"Longitud": pc.utf8_length(texto).to_numpy()}
+    for nombre, patron in _PATRONES_RE2.items():
+        columnas[nombre] = pc.count_substring_regex(texto, patron).to_numpy()
+    return columnas
+
+
+def _metricas_pandas(tweets):
+    texto = tweets.fillna("").astype(str)
+    columnas = {"Longitud": texto.str.len()}
+    for nombre, patron in _PATRONES_RE.items():
+        columnas[nombre] = texto.str.count(patron)
+    return columnas
+
+
+class HistogramaEnteros:
+    """Histograma exacto de valores enteros no negativos.
+
+    Ocupa tanto como el valor máximo visto (unos cientos de casillas para
+    la longitud de un tweet), se suma bloque a bloque y da mínimo, máximo,
+    media y percentiles exactos sin guardar los valores.
+    """
+
+    def __init__(self):
+        self.conteos = np.zeros(0, dtype=np.int64)
+
+    def sumar(self, valores):
+        parcial = np.bincount(np.asarray(valores, dtype=np.int64))
+        if len(parcial) > len(self.conteos):
+            self.conteos = np.pad(self.conteos, (0, len(parcial) - len(self.conteos)))
+        self.conteos[:len(parcial)] += parcial
+
+    @property
+    def total(self):
+        return int(self.conteos.sum())
+
+    def minimo(self):
+        return int(np.flatnonzero(self.conteos)[0])
+
+    def maximo(self):
+        return int(np.flatnonzero(self.conteos)[-1])
+
+    def media(self):
+        return float(np.dot(np.arange(len(self.conteos)), self.conteos) / self.total)
+
+    def percentil(self, q):
+        """Menor valor con al menos una fracción `q` de los datos por debajo o igual."""
+        acumulado = np.cumsum(self.conteos)
+        return int(np.searchsorted(acumulado, q * acumulado[-1]))
+
+
+class ResumenTexto:
+    """Histogramas de las métricas de texto de todos los tweets con texto."""
+
+    def __init__(self, columnas=tuple(TIPOS_TEXTO)):
+        self.histogramas = {columna: HistogramaEnteros() for columna in columnas}
+
+    def actualizar(self, metricas):
+        for columna, histograma in self.histogramas.items():
+            histograma.sumar(metricas[columna].to_numpy())
+
+    def resumen(self, percentiles=(0.5, 0.9, 0.99)):
+        """Tabla métrica x (mínimo, media, percentiles, máximo)."""
+        filas = {}
+        for columna, histograma in self.histogramas.items():
+            if not histograma.total:
+                continue
+            fila = {"min": histograma.minimo(), "media": histograma.media()}
+            fila.update({f"p{round(q * 100):g}": histograma.percentil(q) for q in percentiles})
+            fila["max"] = histograma.maximo()
+            filas[columna] = fila
+        return pd.DataFrame.from_dict(filas, orient="index")
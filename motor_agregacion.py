@@ -0,0 +1,154 @@
+from collections import namedtuple
+
+import pandas as pd
+
+from cargar_y_limpiar_datos import SIN_FECHA
+from regiones import lugar_o_sin_region, normalizar_regiones
+
+# Una métrica agrupada: `valor` es la columna acumulada (ver VALORES) y
+# `claves` las columnas por las que se agrupa.
+Metrica = namedtuple("Metrica", ["nombre", "claves", "valor"])
+
+# Columnas que se calculan por bloque antes de agrupar. Los likes se suman
+# en float64: la suma de muchos UInt32 no cabe en 32 bits. Sus cuadrados
+# dan el error de las medias (ver error_media) y sólo se calculan si se
+# piden.
+DERIVADAS = {
+    "Region": lambda df: normalizar_regiones(df['Place']),
+    # Los likes por lugar (sección 12) usan 'Place' sin normalizar
+    "Lugar": lambda df: lugar_o_sin_region(df['Place']),
+    "Likes_float": lambda df: df['Likes'].astype("float64"),
+    "Likes_cuadrado": lambda df: df['Likes'].astype("float64") ** 2,
+}
+
+# Valores acumulables: (columna, agregación). Todos se pueden sumar entre
+# bloques y entre grupos, así que cualquier métrica se obtiene del grupo
+# más fino que contenga sus claves.
+VALORES = {
+    "filas": ("Tweet", "size"),
+    "tweets": ("Tweet", "count"),
+    "likes_suma": ("Likes_float", "sum"),
+    "likes_n": ("Likes_float", "count"),
+    "likes_cuadrados": ("Likes_cuadrado", "sum"),
+}
+
+# Secciones 5, 8, 9 y 12 (el spam, sección 6, se puntúa por cuenta en
+# spam_cuentas; las series por día y por hora, 4 y 7, salen de series_tiempo)
+METRICAS = (
+    Metrica("sexo", ("Sexo",), "filas"),
+    Metrica("plataformas", ("Plataforma",), "filas"),
+    Metrica("sexo_plataforma", ("Plataforma", "Sexo"), "tweets"),
+    Metrica("likes_sexo", ("Sexo",), "likes"),
+    Metrica("likes_region", ("Lugar",), "likes"),
+    Metrica("likes_plataforma", ("Plataforma",), "likes"),
+)
+
+
+def _valores_de(metrica, dispersion=False):
+    if metrica.valor != "likes":
+        return (metrica.valor,)
+    return ("likes_suma", "likes_n", "likes_cuadrados") if dispersion else ("likes_suma", "likes_n")
+
+
+def _claves_grupo(metrica):
+    """Claves que necesita el grupo de una métrica.
+
+    Las fechas no válidas se reconocen por Hora_int == SIN_FECHA ('Dia'
+    vale SIN_FECHA también para un día real), así que las métricas por
+    fecha se agrupan siempre junto con 'Hora_int'.
+    """
+    if "Dia" in metrica.claves and "Hora_int" not in metrica.claves:
+        return metrica.claves + ("Hora_int",)
+    return metrica.claves
+
+
+def _grupo_de(metrica, grupos):
+    claves = set(_claves_grupo(metrica))
+    return next(g for g in grupos if claves <= set(g))
+
+
+def planificar(metricas, dispersion=False):
+    """Agrupa las métricas en el menor número de groupby por bloque.
+
+    Cada métrica se asigna a un grupo cuyas claves contengan las suyas
+    (p. ej. 'Sexo' y 'Plataforma' salen de ('Plataforma', 'Sexo')). Así
+    no se forma el producto de todas las claves, que con muchas regiones y
+    días crecería demasiado. Con `dispersion` se acumulan también los
+    cuadrados de los likes. Devuelve {claves del grupo: valores}.
+    """
+    grupos = []
+    for claves in sorted(map(_claves_grupo, metricas), key=len, reverse=True):
+        if not any(set(claves) <= set(g) for g in grupos):
+            grupos.append(claves)
+    plan = {grupo: set() for grupo in grupos}
+    for metrica in metricas:
+        plan[_grupo_de(metrica, grupos)].update(_valores_de(metrica, dispersion))
+    return {grupo: tuple(v for v in VALORES if v in valores) for grupo, valores in plan.items()}
+
+
+class MotorAgregacion:
+    """Calcula varias métricas agrupadas en un solo recorrido de los bloques.
+
+    Por cada bloque se hace un groupby por grupo de claves (ver planificar)
+    con todas las agregaciones que necesitan sus métricas, y el parcial se
+    suma al acumulado. Al final cada métrica se obtiene marginalizando su
+    grupo. Los grupos conservan las claves nulas (dropna=False) para que
+    las métricas con menos claves cuenten todas las filas.
+
+    Con `dispersion` se puede pedir además el error de las medias de likes
+    (error_media), que sólo hace falta con una muestra.
+    """
+
+    def __init__(self, metricas=METRICAS, dispersion=False):
+        self.metricas = tuple(metricas)
+        self.dispersion = dispersion
+        self.plan = planificar(self.metricas, dispersion)
+        self.acumulados = dict.fromkeys(self.plan)
+        columnas = {c for grupo, valores in self.plan.items()
+                    for c in grupo + tuple(VALORES[v][0] for v in valores)}
+        self._derivadas = sorted(columnas.intersection(DERIVADAS))
+
+    def actualizar(self, df):
+        """Suma un bloque (limpio y enriquecido) a todos los grupos.
+
+        Las columnas derivadas que ya trae el bloque no se recalculan.
+        """
+        df = df.assign(**{c: DERIVADAS[c](df) for c in self._derivadas if c not in df})
+        for grupo, valores in self.plan.items():
+            parcial = df.groupby(list(grupo), observed=True, dropna=False).agg(
+                **{v: VALORES[v] for v in valores})
+            actual = self.acumulados[grupo]
+            if actual is not None:
+                parcial = pd.concat([actual, parcial]).groupby(
+                    level=list(range(len(grupo))), observed=True, dropna=False).sum()
+            self.acumulados[grupo] = parcial
+
+    def _marginal(self, nombre):
+        metrica = next(m for m in self.metricas if m.nombre == nombre)
+        tabla = self.acumulados[_grupo_de(metrica, tuple(self.plan))]
+        if tabla is None or not metrica.claves:
+            return metrica, tabla
+        if {"Dia", "Hora_int"}.intersection(metrica.claves):
+            tabla = tabla[tabla.index.get_level_values("Hora_int") != SIN_FECHA]
+        return metrica, tabla.groupby(level=list(metrica.claves), observed=True).sum()
+
+    def metrica(self, nombre):
+        """Serie (o escalar, si no tiene claves) de la métrica `nombre`."""
+        metrica, marginal = self._marginal(nombre)
+        if marginal is None:
+            return None
+        if not metrica.claves:
+            return int(marginal[metrica.valor].sum())
+        if metrica.valor == "likes":
+            return marginal["likes_suma"] / marginal["likes_n"]
+        return marginal[metrica.valor]
+
+    def error_media(self, nombre):
+        """Media, error estándar (s / raíz de n) y n de una métrica de likes."""
+        if not self.dispersion:
+            raise ValueError("error_media necesita un MotorAgregacion creado con dispersion=True")
+        _, marginal = self._marginal(nombre)
+        n = marginal["likes_n"]
+        media = marginal["likes_suma"] / n
+        varianza = ((marginal["likes_cuadrados"] - n * media ** 2) / (n - 1)).clip(lower=0)
+        return pd.DataFrame({"media": media, "error": (varianza / n) ** 0.5, "n": n})
@@ -0,0 +1,192 @@
+import math
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from cargar_y_limpiar_datos import dias
+
+# Nivel de confianza de los intervalos del modo aproximado
+CONFIANZA = 0.95
+
+# Columnas que definen los estratos de la muestra
+ESTRATOS = ("Dia", "Place")
+
+# Bits de índice del HyperLogLog: 2**14 registros (16 kB), con un error
+# relativo típico de 1,04 / 128, menos del 1 %
+PRECISION_HLL = 14
+
+# Campos de Resultados que son conteos y se escalan por 1 / fracción
+CONTEOS = ("tweets_por_dia", "sexo_counts", "tweets_por_hora_region", "plataformas_counts", "sexo_plataforma")
+
+# Lo que acompaña a unos Resultados aproximados: filas leídas y de la
+# muestra, usuarios distintos estimados (con su error relativo típico) e
+# intervalos de confianza por métrica
+Aproximacion = namedtuple("Aproximacion", ["fraccion", "filas", "muestra", "usuarios", "error_usuarios",
+                                           "intervalos"])
+
+
+def _z(confianza):
+    return NormalDist().inv_cdf(0.5 + confianza / 2)
+
+
+class HyperLogLog:
+    """Número aproximado de valores distintos con memoria fija.
+
+    Cada valor se resume en un hash de 64 bits: los primeros `precision`
+    bits eligen un registro y este guarda el mayor número de ceros
+    iniciales visto en el resto. El error relativo típico es 1,04 / raíz
+    del número de registros. Los de varios bloques o procesos se combinan
+    con unir().
+    """
+
+    def __init__(self, precision=PRECISION_HLL):
+        self.precision = precision
+        self.registros = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def error_relativo(self):
+        return 1.04 / math.sqrt(len(self.registros))
+
+    def agregar(self, valores):
+        """Suma los valores no nulos de una Serie (p. ej. 'Name' de un bloque)."""
+        valores = valores.dropna()
+        if not len(valores):
+            return
+        hashes = pd.util.hash_pandas_object(valores, index=False).to_numpy()
+        registro = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        resto = hashes << np.uint64(self.precision)
+        # Ceros iniciales del resto (64 - precision bits útiles) más uno
+        _, exponente = np.frexp(resto.astype(np.float64))
+        rango = np.where(resto == 0, 64 - self.precision + 1, 65 - exponente).astype(np.uint8)
+        np.maximum.at(self.registros, registro, rango)
+
+    def unir(self, otro):
+        np.maximum(self.registros, otro.registros, out=self.registros)
+
+    def estimar(self):
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimacion = alfa * m * m / np.ldexp(1.0, -self.registros.astype(np.int64)).sum()
+        vacios = int(np.count_nonzero(self.registros == 0))
+        # Con pocos valores, el conteo de registros vacíos es más preciso
+        if estimacion <= 2.5 * m and vacios:
+            estimacion = m * math.log(m / vacios)
+        return round(estimacion)
+
+
+class MuestraEstratificada:
+    """Muestra sistemática de los bloques dentro de cada estrato (día y lugar).
+
+    De cada estrato se toma una fila de cada 1 / `fraccion`, empezando en
+    un punto al azar, así que todos los estratos aparecen en proporción a
+    su tamaño y cada fila de la muestra representa a 1 / `fraccion` filas:
+    los conteos se escalan dividiendo por la fracción y las medias no
+    cambian. Los estratos se siguen de un bloque a otro, así que la muestra
+    no depende del tamaño de bloque. Los usuarios distintos se cuentan con
+    un HyperLogLog sobre todas las filas, no sólo las de la muestra.
+
+    Los bloques pueden venir sin limpiar: el día sale entonces de 'Date'
+    como en limpiar_bloque. `columnas` son las que hacen falta para elegir.
+    """
+
+    def __init__(self, fraccion, semilla=0, estratos=ESTRATOS, precision=PRECISION_HLL):
+        if not 0 < fraccion <= 1:
+            raise ValueError(f"La fracción de muestra debe estar en (0, 1], no {fraccion}")
+        self.fraccion = fraccion
+        self.estratos = tuple(estratos)
+        self.filas = 0
+        self.muestra = 0
+        self.usuarios = HyperLogLog(precision)
+        self._azar = np.random.default_rng(semilla)
+        self._ids = {}
+        self._vistas = np.zeros(0, dtype=np.int64)
+        self._inicios = np.zeros(0)
+
+    @property
+    def columnas(self):
+        estratos = ["Date" if columna == "Dia" else columna for columna in self.estratos]
+        return tuple(dict.fromkeys(estratos + ["Name"]))
+
+    def _columna(self, df, columna):
+        if columna == "Dia" and "Dia" not in df:
+            return dias(df["Date"])
+        return df[columna]
+
+    def _estratos_de(self, df):
+        """Id de estrato de cada fila; los estratos nuevos se numeran al verlos."""
+        codigos, columnas = np.zeros(len(df), dtype=np.int64), []
+        for columna in self.estratos:
+            codigos_columna, valores = pd.factorize(self._columna(df, columna), use_na_sentinel=False)
+            codigos = codigos * len(valores) + codigos_columna
+            columnas.append([None if pd.isna(valor) else valor for valor in valores])
+        codigos, combinaciones = pd.factorize(codigos)
+        claves = []
+        for combinacion in combinaciones:
+            clave = []
+            for valores in reversed(columnas):
+                combinacion, i = divmod(int(combinacion), len(valores))
+                clave.append(valores[i])
+            claves.append(tuple(reversed(clave)))
+        nuevos = [clave for clave in claves if clave not in self._ids]
+        for clave in nuevos:
+            self._ids[clave] = len(self._ids)
+        if nuevos:
+            self._vistas = np.concatenate([self._vistas, np.zeros(len(nuevos), dtype=np.int64)])
+            self._inicios = np.concatenate([self._inicios, self._azar.random(len(nuevos))])
+        return np.array([self._ids[clave] for clave in claves], dtype=np.int64)[codigos]
+
+    def elegir(self, df):
+        """Máscara de las filas de un bloque que entran en la muestra."""
+        if "Name" in df:
+            self.usuarios.agregar(df["Name"])
+        estrato = self._estratos_de(df)
+        # Posición de cada fila en su estrato, contando los bloques anteriores
+        posicion = pd.Series(estrato).groupby(estrato).cumcount().to_numpy() + self._vistas[estrato]
+        self._vistas += np.bincount(estrato, minlength=len(self._vistas))
+        inicio = self._inicios[estrato]
+        elegida = np.floor((posicion + 1) * self.fraccion + inicio) > np.floor(posicion * self.fraccion + inicio)
+        self.filas += len(df)
+        self.muestra += int(elegida.sum())
+        return elegida
+
+    def filtrar(self, df):
+        """Filas de la muestra de un bloque, limpio o no."""
+        return df[self.elegir(df)]
+
+
+def intervalo_conteo(conteos, fraccion, confianza=CONFIANZA):
+    """Conteos de la muestra escalados, con su intervalo de confianza."""
+    estimacion = conteos / fraccion
+    error = _z(confianza) * np.sqrt(conteos * (1 - fraccion)) / fraccion
+    return pd.DataFrame({"estimacion": estimacion, "inferior": (estimacion - error).clip(lower=0),
+                         "superior": estimacion + error})
+
+
+def intervalo_media(dispersion, fraccion, confianza=CONFIANZA):
+    """Intervalo de confianza de medias (tabla media/error/n de error_media)."""
+    error = _z(confianza) * dispersion["error"] * math.sqrt(1 - fraccion)
+    return pd.DataFrame({"media": dispersion["media"], "inferior": dispersion["media"] - error,
+                         "superior": dispersion["media"] + error, "n": dispersion["n"]})
+
+
+def escalar(resultados, fraccion):
+    """Pasa los conteos de unos resultados de la muestra a la escala de los datos.
+
+    Los campos son los de agregados.Resultados; las medias y proporciones
+    no cambian. El spam (6) y los tweets extremos (11) se quedan como en la
+    muestra.
+    """
+    escalados = dict(resultados)
+    for campo in ("word_freq", "hashtag_freq"):
+        if campo in escalados:
+            escalados[campo] = [(clave, round(n / fraccion)) for clave, n in escalados[campo]]
+    for campo in CONTEOS:
+        if campo in escalados:
+            escalados[campo] = (escalados[campo] / fraccion).round().astype("int64")
+    if "picos_actividad" in escalados:
+        picos = escalados["picos_actividad"].copy()
+        picos[["tweets", "media"]] = picos[["tweets", "media"]] / fraccion
+        escalados["picos_actividad"] = picos
+    return escalados
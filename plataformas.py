@@ -0,0 +1,65 @@
+import json
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Reglas (plataforma, patrón) en orden de prioridad: gana la primera cuyo
+# patrón aparezca en 'Source' (en minúsculas).
+REGLAS_PLATAFORMA = (
+    ("iPhone", "iphone"),
+    ("Android", "android"),
+    ("Web", "web"),
+    ("iPad", "ipad"),
+)
+OTRA_PLATAFORMA = "Otro"
+
+
+def cargar_reglas(ruta):
+    """Lee reglas propias de un JSON: lista de [plataforma, patrón]."""
+    with open(ruta, encoding="utf-8") as f:
+        return tuple((etiqueta, patron) for etiqueta, patron in json.load(f))
+
+
+@lru_cache(maxsize=None)
+def _compilar(reglas):
+    """Un único patrón con una alternativa por regla.
+
+    Cada alternativa es un lookahead anclado al inicio, así que se prueban en
+    el orden de las reglas (no gana la coincidencia más a la izquierda) y el
+    grupo que coincide indica la regla.
+    """
+    alternativas = "|".join(
+        f"(?=(?P<r{i}>.*?(?:{patron})))" for i, (_, patron) in enumerate(reglas)
+    )
+    return re.compile(f"^(?:{alternativas})", re.DOTALL)
+
+
+def categorias_plataforma(reglas=REGLAS_PLATAFORMA):
+    """Categorías de 'Plataforma', ordenadas como las ordenaba el groupby."""
+    return sorted({etiqueta for etiqueta, _ in reglas} | {OTRA_PLATAFORMA})
+
+
+def clasificar_plataformas(source, reglas=REGLAS_PLATAFORMA):
+    """Columna categórica 'Plataforma' a partir de 'Source'.
+
+    Cada valor distinto de 'Source' se clasifica una sola vez y el resultado
+    se reparte a las filas a través de los códigos de factorize. Los
+    'Source' nulos quedan como nulos.
+    """
+    reglas = tuple(reglas)
+    patron = _compilar(reglas)
+    categorias = categorias_plataforma(reglas)
+    codigo_regla = [categorias.index(etiqueta) for etiqueta, _ in reglas]
+    otra = categorias.index(OTRA_PLATAFORMA)
+
+    codigos, unicos = pd.factorize(source)
+    por_valor = np.empty(len(unicos) + 1, dtype=np.int8)
+    for i, valor in enumerate(unicos):
+        coincidencia = patron.match(str(valor).lower())
+        por_valor[i] = codigo_regla[int(coincidencia.lastgroup[1:])] if coincidencia else otra
+    # El código -1 (Source nulo) toma el último valor: nulo
+    por_valor[-1] = -1
+    plataforma = pd.Categorical.from_codes(por_valor.take(codigos), categories=categorias)
+    return pd.Series(plataforma, index=source.index, name="Plataforma")
@@ -0,0 +1,48 @@
+import os
+from functools import lru_cache
+
+# Recursos que se leen del disco en lugar de descargarse (ver generar_recursos.py)
+DIRECTORIO_RECURSOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recursos")
+RUTA_STOPWORDS = os.path.join(DIRECTORIO_RECURSOS, "stopwords_es.txt")
+RUTA_SEXO_NOMBRES = os.path.join(DIRECTORIO_RECURSOS, "sexo_nombres.tsv")
+RUTA_REGIONES = os.path.join(DIRECTORIO_RECURSOS, "regiones.tsv")
+
+
+@lru_cache(maxsize=None)
+def cargar_stopwords(ruta=RUTA_STOPWORDS):
+    """Stopwords en español (la lista de NLTK, guardada en el repositorio)."""
+    with open(ruta, encoding="utf-8") as f:
+        return frozenset(linea.strip() for linea in f if linea.strip())
+
+
+def cargar_regiones(ruta=RUTA_REGIONES):
+    """Tabla lugar -> región escrita a mano (las líneas con '#' son comentarios)."""
+    with open(ruta, encoding="utf-8") as f:
+        filas = (linea.rstrip("\n").split("\t") for linea in f if linea.strip() and not linea.startswith("#"))
+        return {lugar: region for lugar, region in filas}
+
+
+class DetectorLocal:
+    """Sustituto de gender_guesser.Detector con los resultados ya calculados.
+
+    gender_guesser no depende del país cuando no se le pasa, así que su
+    respuesta para cada nombre del diccionario es fija y basta con una
+    tabla nombre -> género. Los nombres que no están son "unknown", igual
+    que en el original.
+    """
+
+    def __init__(self, generos):
+        self.generos = generos
+
+    def get_gender(self, nombre):
+        return self.generos.get(nombre, "unknown")
+
+
+def cargar_detector(ruta=RUTA_SEXO_NOMBRES):
+    """Detector de sexo: la tabla local si existe; si no, gender_guesser."""
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return DetectorLocal(dict(linea.rstrip("\n").split("\t", 1) for linea in f))
+    import gender_guesser.detector as gender
+
+    return gender.Detector()
@@ -0,0 +1,100 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from recursos_locales import cargar_regiones, RUTA_REGIONES
+
+SIN_REGION = "Sin región"
+
+# Lugares que no están en la tabla: en las series por minuto van todos juntos
+OTRAS_REGIONES = "Otros"
+
+# Regiones que se muestran en la tabla hora x región (sección 7)
+REGIONES_TOP = 10
+
+_PALABRA = re.compile(r"\w+")
+
+
+def clave_lugar(lugar):
+    """Forma de comparar lugares: minúsculas, sin acentos ni signos."""
+    descompuesto = unicodedata.normalize("NFKD", lugar.casefold())
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(_PALABRA.findall(sin_acentos))
+
+
+@lru_cache(maxsize=None)
+def tabla_regiones(ruta=RUTA_REGIONES):
+    """Tabla clave_lugar -> región de recursos/regiones.tsv."""
+    return {clave_lugar(lugar): region for lugar, region in cargar_regiones(ruta).items()}
+
+
+@lru_cache(maxsize=None)
+def regiones_conocidas(ruta=RUTA_REGIONES):
+    """Regiones de la tabla más SIN_REGION, en orden alfabético."""
+    return tuple(sorted(set(tabla_regiones(ruta).values()) | {SIN_REGION}))
+
+
+def region_de(lugar, tabla):
+    """Región de un texto de 'Place'.
+
+    Se busca el lugar completo y, si no está, su primera parte ('Rosario,
+    Santa Fe' -> 'Rosario'). Los lugares que no están en la tabla se
+    conservan tal cual, sin espacios de más.
+    """
+    clave = clave_lugar(lugar)
+    if not clave:
+        return SIN_REGION
+    if clave in tabla:
+        return tabla[clave]
+    primera = clave_lugar(lugar.split(",")[0])
+    if primera in tabla:
+        return tabla[primera]
+    return " ".join(lugar.split())
+
+
+def normalizar_regiones(lugares, tabla=None):
+    """Columna categórica 'Region' a partir de 'Place'.
+
+    Cada lugar distinto se resuelve una sola vez y se reparte a las filas
+    con los códigos de factorize, como en plataformas. Las categorías van
+    en orden alfabético y los lugares nulos quedan como SIN_REGION.
+    """
+    tabla = tabla_regiones() if tabla is None else tabla
+    codigos, unicos = pd.factorize(lugares)
+    nombres = [region_de(str(lugar), tabla) for lugar in unicos]
+    categorias = sorted(set(nombres) | {SIN_REGION})
+    posicion = {region: i for i, region in enumerate(categorias)}
+    # El último elemento es el de los nulos (código -1)
+    por_lugar = np.array([posicion[nombre] for nombre in nombres] + [posicion[SIN_REGION]], dtype=np.int32)
+    return pd.Series(pd.Categorical.from_codes(por_lugar[codigos], categorias),
+                     index=lugares.index, name="Region")
+
+
+def lugar_o_sin_region(lugares):
+    """'Place' tal cual, con los nulos como SIN_REGION (likes por lugar, sección 12)."""
+    lugares = lugares.astype("category")
+    if SIN_REGION not in lugares.cat.categories:
+        lugares = lugares.cat.add_categories([SIN_REGION])
+    return lugares.fillna(SIN_REGION)
+
+
+def agrupar_otras(regiones, conocidas=None):
+    """'Region' con los lugares que no están en la tabla como OTRAS_REGIONES.
+
+    Así las claves son como mucho las regiones de la tabla más una, por
+    muchos lugares distintos que traiga el texto libre. Se trabaja sobre
+    las categorías, no sobre las filas.
+    """
+    conocidas = regiones_conocidas() if conocidas is None else conocidas
+    regiones = regiones.astype("category")
+    categorias = regiones.cat.categories
+    en_tabla = categorias.isin(conocidas)
+    nuevas = sorted(set(categorias[en_tabla])) + [OTRAS_REGIONES]
+    posicion = {region: i for i, region in enumerate(nuevas)}
+    por_categoria = np.array([posicion[c] if dentro else len(nuevas) - 1
+                              for c, dentro in zip(categorias, en_tabla)] + [-1], dtype=np.int32)
+    return pd.Series(pd.Categorical.from_codes(por_categoria[regiones.cat.codes.to_numpy()], nuevas),
+                     index=regiones.index, name=regiones.name)
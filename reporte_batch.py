@@ -0,0 +1,118 @@
+# Reporte nocturno sin ventanas: calcula los análisis una vez y guarda todas
+# las gráficas (PNG/SVG) y un index.html en una carpeta.
+#
+#   python reporte_batch.py --csv mundial_tweets.csv --salida reporte
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import analisis
+import graficos
+import instrumentacion
+from indice_frecuencias import MODOS
+
+
+# ========================================
+# Render en paralelo
+# ========================================
+def _iniciar_proceso():
+    # Backend sin interfaz gráfica: no hace falta pantalla en el servidor
+    import matplotlib
+    matplotlib.use("Agg")
+
+    graficos.configurar()
+
+
+def renderizar(nombre, funcion, datos, salida, formatos):
+    """Dibuja una gráfica y la guarda en cada formato; devuelve la duración."""
+    import matplotlib.pyplot as plt
+
+    inicio = time.perf_counter()
+    plt.figure()
+    funcion(datos)
+    plt.tight_layout()
+    archivos = []
+    for formato in formatos:
+        archivo = f"{nombre}.{formato}"
+        plt.savefig(os.path.join(salida, archivo))
+        archivos.append(archivo)
+    plt.close("all")
+    return nombre, archivos, time.perf_counter() - inicio
+
+
+def escribir_indice(salida, resultados, titulos, textos):
+    """Genera index.html con todas las gráficas y los resultados de texto."""
+    partes = ["<!DOCTYPE html>", "<html><head><meta charset='utf-8'>",
+              "<title>Reporte Mundial</title></head><body>",
+              "<h1>Análisis de tweets del Mundial</h1>"]
+    for nombre, archivos, _ in resultados:
+        imagen = next((a for a in archivos if a.endswith(".png")), archivos[0])
+        enlaces = " ".join(f"<a href='{a}'>{a.rsplit('.', 1)[1].upper()}</a>" for a in archivos)
+        partes.append(f"<h2>{html.escape(titulos[nombre])}</h2>")
+        partes.append(f"<img src='{imagen}' alt='{html.escape(titulos[nombre])}'><p>{enlaces}</p>")
+    for titulo, texto in textos:
+        partes.append(f"<h2>{html.escape(titulo)}</h2><pre>{html.escape(texto)}</pre>")
+    partes.append("</body></html>")
+    with open(os.path.join(salida, "index.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(partes))
+
+
+def escribir_reporte(resultados, salida="reporte", formatos=("png", "svg"), procesos=None, secciones=None,
+                     estilo="basico"):
+    """Guarda las gráficas de las secciones pedidas y un index.html en `salida`."""
+    os.makedirs(salida, exist_ok=True)
+    lista = analisis.graficas(resultados, secciones, estilo)
+    titulos = {nombre: titulo for nombre, titulo, _, _ in lista}
+    inicio = time.perf_counter()
+    with instrumentacion.etapa(instrumentacion.GRAFICAS), \
+            ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as pool:
+        futuros = [pool.submit(renderizar, nombre, funcion, datos, salida, formatos)
+                   for nombre, _, funcion, datos in lista]
+        renderizadas = [futuro.result() for futuro in futuros]
+
+    print("\nTiempo de render por gráfica:")
+    for nombre, _, segundos in renderizadas:
+        print(f"  {nombre:<20} {segundos:6.2f} s")
+    print(f"Render total: {time.perf_counter() - inicio:.2f} s")
+
+    escribir_indice(salida, renderizadas, titulos, analisis.textos(resultados, secciones))
+    print(f"\nReporte guardado en '{os.path.join(salida, 'index.html')}'")
+
+
+def generar_reporte(file_path="mundial_tweets.csv", salida="reporte", formatos=("png", "svg"), procesos=None,
+                    backend="pandas", secciones=None, estilo="basico", desde=None, hasta=None, fraccion=None,
+                    modo_indice="exacto", hilos=1, deduplicar=False):
+    inicio = time.perf_counter()
+    resultados = analisis.calcular(file_path, backend, secciones, desde, hasta, fraccion, modo_indice, hilos,
+                                   deduplicar)
+    print(f"Análisis calculados en {time.perf_counter() - inicio:.2f} s")
+    escribir_reporte(resultados, salida, formatos, procesos, secciones, estilo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera el reporte de gráficas sin interfaz gráfica.")
+    parser.add_argument("--csv", default="mundial_tweets.csv", help="archivo de tweets")
+    parser.add_argument("--salida", default="reporte", help="carpeta de salida")
+    parser.add_argument("--formatos", nargs="+", default=["png", "svg"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--procesos", type=int, default=None, help="procesos para el render (por defecto, uno por núcleo)")
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "duckdb"],
+                        help="motor de los análisis (duckdb necesita el paquete 'duckdb')")
+    parser.add_argument("--secciones", nargs="+", type=int, choices=analisis.NUMEROS, default=None,
+                        help="secciones del reporte (por defecto, todas)")
+    parser.add_argument("--estilo", default="basico", choices=graficos.ESTILOS, help="estilo de las gráficas")
+    parser.add_argument("--desde", default=None, help="primer día del reporte (AAAA-MM-DD)")
+    parser.add_argument("--hasta", default=None, help="último día del reporte (AAAA-MM-DD)")
+    parser.add_argument("--muestra", type=float, default=None, metavar="FRACCION",
+                        help="modo aproximado: analizar esa fracción de los tweets (p. ej. 0.01)")
+    parser.add_argument("--indice", default="exacto", choices=MODOS,
+                        help="índice de palabras y hashtags: exacto o space_saving (memoria fija)")
+    parser.add_argument("--hilos", type=int, default=1,
+                        help="hilos para los pasos independientes de cada bloque (0 = uno por núcleo)")
+    parser.add_argument("--sin-duplicados", action="store_true",
+                        help="contar palabras y hashtags sin retweets, copias ni casi duplicados")
+    args = parser.parse_args()
+    generar_reporte(args.csv, args.salida, tuple(args.formatos), args.procesos, args.backend,
+                    args.secciones, args.estilo, args.desde, args.hasta, args.muestra, args.indice,
+                    args.hilos, args.sin_duplicados)
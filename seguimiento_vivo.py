@@ -0,0 +1,275 @@
+# Seguimiento en vivo para los días de partido: sigue un CSV o JSON Lines que
+# va creciendo (o una carpeta de archivos que rotan) y mantiene al día las
+# palabras, los hashtags, los tweets por minuto y las plataformas.
+#
+#   python seguimiento_vivo.py tweets_en_vivo.csv
+#   python seguimiento_vivo.py capturas/ --patron "*.jsonl*" --refresco 5
+#
+# Cada refresco del panel cuesta lo que los tweets nuevos desde el anterior
+# (más ordenar las palabras y hashtags distintos), no lo que el histórico.
+import argparse
+import asyncio
+import glob
+import os
+import stat
+import sys
+import time
+from collections import namedtuple
+
+from agregados import AgregadosTweets
+from cargar_y_limpiar_datos import comillas_impares, inicio_registro, leer_filas_nuevas, leer_jsonl_nuevas
+
+# Secciones que se mantienen: palabras, hashtags, tweets por minuto y plataformas
+SECCIONES_VIVO = (2, 3, 4, 8)
+
+# Segundos de espera cuando una fuente no tiene datos nuevos
+INTERVALO = 1.0
+
+# Segundos mínimos entre dos refrescos del panel
+REFRESCO = 5.0
+
+# Bytes que se leen como mucho de una vez: acota lo que tarda cada micro-lote
+# al ponerse al día con un archivo grande
+BYTES_LOTE = 4 * 1024 * 1024
+
+# Micro-lotes leídos que pueden esperar a procesarse
+LOTES_EN_COLA = 4
+
+LECTORES = {"csv": leer_filas_nuevas, "jsonl": leer_jsonl_nuevas}
+
+# Estado del panel: tweets leídos, top de palabras y hashtags, tweets de los
+# últimos minutos y proporción de cada plataforma
+Panel = namedtuple("Panel", ["tweets", "palabras", "hashtags", "por_minuto", "plataformas"])
+
+
+def formato_de(ruta):
+    """'jsonl' si el nombre lo dice (también al rotar, 'x.jsonl.1'); si no, 'csv'."""
+    nombre = os.path.basename(ruta).lower()
+    return "jsonl" if ".jsonl" in nombre or ".ndjson" in nombre else "csv"
+
+
+def _inodo(estado):
+    return estado.st_dev, estado.st_ino
+
+
+class ArchivoSeguido:
+    """Un archivo que crece, del que se recuerda hasta qué byte se ha leído.
+
+    Si se trunca o se sustituye por otro (cambia el inodo), se vuelve a
+    leer desde el principio. Con `desde_el_final` se ignora lo que ya tiene:
+    se empieza en el primer registro que empiece después, aunque el último
+    estuviera a medio escribir. Las filas mal formadas se avisan por stderr
+    y se saltan, sin parar el seguimiento.
+    """
+
+    def __init__(self, ruta, formato=None, desde_el_final=False):
+        self.ruta = ruta
+        self.formato = formato or formato_de(ruta)
+        self.inodo = None
+        self.desplazamiento = 0
+        # Comillas impares antes del desplazamiento mientras haya que buscar
+        # el principio del siguiente registro (None si ya se está en uno)
+        self._alinear = None
+        if desde_el_final and os.path.exists(ruta):
+            estado = os.stat(ruta)
+            self.inodo, self.desplazamiento = _inodo(estado), estado.st_size
+            self._alinear = self.formato == "csv" and comillas_impares(ruta, estado.st_size)
+
+    def leer(self, limite=BYTES_LOTE):
+        """Bloques limpios con las filas nuevas (ninguno si no las hay)."""
+        try:
+            estado = os.stat(self.ruta)
+        except FileNotFoundError:
+            return []
+        if _inodo(estado) != self.inodo or estado.st_size < self.desplazamiento:
+            self.inodo, self.desplazamiento, self._alinear = _inodo(estado), 0, None
+        if estado.st_size <= self.desplazamiento:
+            return []
+        if self._alinear is not None:
+            inicio = inicio_registro(self.ruta, self.desplazamiento, self.formato == "csv", self._alinear)
+            if inicio is None:
+                return []
+            self.desplazamiento, self._alinear = inicio, None
+        inicio, errores = self.desplazamiento, []
+        try:
+            bloques, self.desplazamiento = LECTORES[self.formato](self.ruta, inicio, limite=limite, errores=errores)
+        except (OSError, ValueError) as e:
+            # Se reintenta en la siguiente lectura
+            print(f"{self.ruta}: no se pudo leer desde el byte {inicio}: {e}", file=sys.stderr)
+            return []
+        for i, error in errores:
+            print(f"{self.ruta}: se salta el registro {i} del lote desde el byte {inicio}: {error}", file=sys.stderr)
+        return bloques
+
+
+class CarpetaSeguida:
+    """Los archivos de una carpeta que cumplen `patron`, aunque roten.
+
+    Cada archivo se reconoce por su inodo: uno renombrado al rotar
+    ('tweets.csv' -> 'tweets.csv.1') se sigue leyendo donde se quedó y el
+    nuevo se lee desde el principio. Se leen del más antiguo al más nuevo.
+    """
+
+    def __init__(self, carpeta, patron="*", formato=None, desde_el_final=False):
+        self.carpeta = carpeta
+        self.patron = patron
+        self.formato = formato
+        self.archivos = {}
+        self._desde_el_final = desde_el_final
+
+    def _explorar(self):
+        encontrados = []
+        for ruta in glob.glob(os.path.join(glob.escape(self.carpeta), self.patron)):
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(estado.st_mode):
+                encontrados.append((estado.st_mtime_ns, ruta, _inodo(estado)))
+        archivos = {}
+        for _, ruta, inodo in sorted(encontrados):
+            archivo = self.archivos.get(inodo) or ArchivoSeguido(ruta, self.formato, self._desde_el_final)
+            archivo.ruta = ruta
+            archivos[inodo] = archivo
+        self.archivos = archivos
+        self._desde_el_final = False
+
+    def leer(self, limite=BYTES_LOTE):
+        self._explorar()
+        bloques = []
+        for archivo in self.archivos.values():
+            bloques += archivo.leer(limite)
+        return bloques
+
+
+def fuente_de(ruta, patron="*", formato=None, desde_el_final=False):
+    """CarpetaSeguida si `ruta` es una carpeta; si no, ArchivoSeguido."""
+    if os.path.isdir(ruta):
+        return CarpetaSeguida(ruta, patron, formato, desde_el_final)
+    return ArchivoSeguido(ruta, formato, desde_el_final)
+
+
+def mostrar_panel(panel):
+    print(f"\n=== {time.strftime('%H:%M:%S')} · {panel.tweets} tweets ===")
+    print("Palabras:", ", ".join(f"{palabra} ({n})" for palabra, n in panel.palabras))
+    print("Hashtags:", ", ".join(f"#{hashtag} ({n})" for hashtag, n in panel.hashtags))
+    print("Plataformas:", ", ".join(f"{plataforma} {p:.1%}" for plataforma, p in panel.plataformas.items()))
+    print("Tweets por minuto:")
+    print(panel.por_minuto.tail(10).to_string())
+
+
+class SeguimientoVivo:
+    """Agregados en vivo de una o varias fuentes que van creciendo.
+
+    Una tarea por fuente lee las filas nuevas cada `intervalo` segundos y
+    las deja, en micro-lotes de `limite` bytes como mucho, en una cola
+    acotada; otra las limpia y las suma a los agregados, y cada `refresco`
+    segundos, si llegaron tweets, se entrega un Panel a `al_refrescar`.
+    La latencia queda acotada por `intervalo`, `refresco` y el tamaño del
+    micro-lote, no por el del archivo.
+    """
+
+    def __init__(self, fuentes, intervalo=INTERVALO, refresco=REFRESCO, limite=BYTES_LOTE, procesos=None):
+        self.fuentes = list(fuentes)
+        self.intervalo = intervalo
+        self.refresco = refresco
+        self.limite = limite
+        self.agregados = AgregadosTweets(procesos=procesos, secciones=SECCIONES_VIVO)
+        self.tweets = 0
+        self._cerrojo = None
+
+    def panel(self, n=10, minutos=30):
+        """Panel con el estado actual de los agregados."""
+        plataformas = self.agregados.plataformas_counts()
+        return Panel(
+            tweets=self.tweets,
+            palabras=self.agregados.word_freq(n),
+            hashtags=self.agregados.hashtag_freq(n),
+            por_minuto=self.agregados.series.serie("total", "min").tail(minutos),
+            plataformas=plataformas / max(plataformas.sum(), 1),
+        )
+
+    async def _leer(self, fuente, cola):
+        while True:
+            bloques = await asyncio.to_thread(fuente.leer, self.limite)
+            for bloque in bloques:
+                await cola.put(bloque)
+            if not bloques:
+                await asyncio.sleep(self.intervalo)
+
+    async def _procesar(self, cola):
+        while True:
+            bloque = await cola.get()
+            # Un None indica que ya no llegarán más bloques
+            if bloque is None:
+                return
+            async with self._cerrojo:
+                await asyncio.to_thread(self.agregados.actualizar, bloque)
+                self.tweets += len(bloque)
+
+    async def _refrescar(self, al_refrescar):
+        mostrados = 0
+        while True:
+            await asyncio.sleep(self.refresco)
+            if self.tweets == mostrados:
+                continue
+            async with self._cerrojo:
+                panel = await asyncio.to_thread(self.panel)
+            mostrados = panel.tweets
+            al_refrescar(panel)
+
+    async def seguir(self, al_refrescar=mostrar_panel, duracion=None):
+        """Sigue las fuentes hasta que se cancela (o `duracion` segundos).
+
+        Al terminar se procesan los bloques ya leídos y se devuelve el
+        último Panel (None si no llegó ningún tweet).
+        """
+        self._cerrojo = asyncio.Lock()
+        cola = asyncio.Queue(LOTES_EN_COLA)
+        lectores = [asyncio.create_task(self._leer(fuente, cola)) for fuente in self.fuentes]
+        refresco = asyncio.create_task(self._refrescar(al_refrescar))
+        procesador = asyncio.create_task(self._procesar(cola))
+        try:
+            await asyncio.wait(lectores + [refresco, procesador], timeout=duracion,
+                               return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for tarea in lectores + [refresco]:
+                tarea.cancel()
+            await asyncio.gather(*lectores, refresco, return_exceptions=True)
+            if not procesador.done():
+                await cola.put(None)
+            await asyncio.gather(procesador, return_exceptions=True)
+            self.agregados.cerrar()
+        # Errores de lectura o de proceso que pararon el seguimiento
+        for tarea in lectores + [refresco, procesador]:
+            if not tarea.cancelled() and tarea.exception() is not None:
+                raise tarea.exception()
+        return self.panel() if self.tweets else None
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Sigue en vivo archivos de tweets que van creciendo.")
+    parser.add_argument("rutas", nargs="+", help="archivos CSV/JSON Lines o carpetas con archivos que rotan")
+    parser.add_argument("--patron", default="*", help="archivos a seguir dentro de las carpetas")
+    parser.add_argument("--formato", default=None, choices=sorted(LECTORES),
+                        help="formato de los archivos (por defecto, según el nombre)")
+    parser.add_argument("--desde-el-final", action="store_true",
+                        help="ignorar lo que los archivos ya tienen al empezar")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO, help="segundos entre lecturas")
+    parser.add_argument("--refresco", type=float, default=REFRESCO, help="segundos entre refrescos del panel")
+    parser.add_argument("--duracion", type=float, default=None, help="segundos de seguimiento (por defecto, sin fin)")
+    args = parser.parse_args(argumentos)
+
+    fuentes = [fuente_de(ruta, args.patron, args.formato, args.desde_el_final) for ruta in args.rutas]
+    seguimiento = SeguimientoVivo(fuentes, args.intervalo, args.refresco)
+    try:
+        panel = asyncio.run(seguimiento.seguir(duracion=args.duracion))
+    except KeyboardInterrupt:
+        return None
+    if panel is not None:
+        mostrar_panel(panel)
+    return panel
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+
+from analisis_hashtags import explotar_hashtags
+from cargar_y_limpiar_datos import instantes
+from motor_agregacion import DERIVADAS
+from regiones import agrupar_otras
+
+# Dimensiones con serie propia: nombre -> columna de la clave. "total"
+# cuenta todos los tweets con fecha válida.
+DIMENSIONES = {
+    "total": None,
+    "region": "Region",
+    "plataforma": "Plataforma",
+    "hashtag": "Hashtag",
+}
+
+# Columnas cuyas claves se acotan antes de contar: los lugares que no están
+# en la tabla de regiones suman en una sola clave y no uno por lugar
+ACOTAR = {"Region": agrupar_otras}
+
+# Los conteos se guardan por minuto; los granos más gruesos se derivan
+GRANOS = ("min", "h", "D")
+
+# Parciales que se acumulan antes de sumarlos en una sola tabla
+COMPACTAR_CADA = 16
+
+# Detección de picos: desviaciones sobre la media de la ventana anterior y
+# tweets mínimos en la cubeta
+UMBRAL_PICO = 4.0
+MINIMO_PICO = 10
+
+_NS_MINUTO = 60_000_000_000
+
+
+def minutos_de(grano):
+    """Minutos de un grano fijo de pandas ('min', '15min', 'h', 'D'...)."""
+    from pandas.tseries.frequencies import to_offset
+
+    try:
+        nanos = to_offset(grano).nanos
+    except ValueError as e:
+        raise ValueError(f"El grano '{grano}' no tiene duración fija") from e
+    if nanos <= 0 or nanos % _NS_MINUTO:
+        raise ValueError(f"El grano '{grano}' no es un múltiplo de un minuto")
+    return nanos // _NS_MINUTO
+
+
+def _a_fechas(minutos):
+    return pd.to_datetime(np.asarray(minutos, dtype=np.int64), unit="m").rename("Fecha")
+
+
+def _contar(claves, minutos):
+    """Conteo por (clave, minuto) con la clave como texto (no categórica)."""
+    parcial = pd.DataFrame({"clave": claves, "minuto": minutos}).groupby(
+        ["clave", "minuto"], observed=True).size()
+    claves = parcial.index.levels[0]
+    if isinstance(claves, pd.CategoricalIndex):
+        parcial.index = parcial.index.set_levels(claves.astype(object), level=0)
+    return parcial
+
+
+class SeriesTiempo:
+    """Tweets por minuto para el total y cada región, plataforma y hashtag.
+
+    Cada bloque se reduce a conteos por (clave, minuto) que se suman a los
+    anteriores, así que la memoria depende de los pares distintos y no de
+    las filas. Las vistas por hora, día o cualquier grano fijo, las
+    ventanas móviles y los picos se calculan sobre esos conteos sin volver
+    a leer los tweets. Los minutos se cuentan en la hora local del CSV,
+    como 'Dia' y 'Hora_int'.
+    """
+
+    def __init__(self, dimensiones=DIMENSIONES):
+        self.dimensiones = dict(dimensiones)
+        self._parciales = {dimension: [] for dimension in self.dimensiones}
+
+    @classmethod
+    def desde_conteos(cls, conteos):
+        """Series a partir de conteos ya agregados por minuto (p. ej. en SQL).
+
+        `conteos` es {dimensión: Serie}; la del total va indexada por minuto
+        y las demás por (clave, minuto).
+        """
+        series = cls({dimension: DIMENSIONES[dimension] for dimension in conteos})
+        for dimension, conteo in conteos.items():
+            series._parciales[dimension].append(conteo)
+        return series
+
+    def _agregar(self, dimension, parcial):
+        parciales = self._parciales[dimension]
+        parciales.append(parcial)
+        if len(parciales) >= COMPACTAR_CADA:
+            self._compactar(dimension)
+
+    def _compactar(self, dimension):
+        parciales = self._parciales[dimension]
+        if len(parciales) > 1:
+            tabla = pd.concat(parciales)
+            niveles = 0 if self.dimensiones[dimension] is None else [0, 1]
+            parciales[:] = [tabla.groupby(level=niveles).sum()]
+
+    def tabla(self, dimension="total"):
+        """Conteos por minuto acumulados de `dimension` (Serie de int64)."""
+        self._compactar(dimension)
+        parciales = self._parciales[dimension]
+        if parciales:
+            return parciales[0]
+        if self.dimensiones[dimension] is None:
+            return pd.Series([], index=pd.Index([], dtype=np.int64, name="minuto"), dtype=np.int64)
+        indice = pd.MultiIndex.from_arrays([pd.Index([], dtype=object), pd.Index([], dtype=np.int64)],
+                                           names=["clave", "minuto"])
+        return pd.Series([], index=indice, dtype=np.int64)
+
+    def actualizar(self, df, explotado=None):
+        """Incorpora un bloque limpio y enriquecido (con 'Plataforma').
+
+        `explotado` son los hashtags del bloque ya separados, si se tienen;
+        'Region' se calcula si el bloque no la trae.
+        """
+        instante, valido = instantes(df["Date"])
+        minutos = instante // _NS_MINUTO
+        for dimension, columna in self.dimensiones.items():
+            if columna is None:
+                parcial = pd.Series(minutos[valido]).value_counts(sort=False)
+            elif columna == "Hashtag":
+                if explotado is None:
+                    explotado = explotar_hashtags(df["Hashtags"])
+                posiciones = df.index.get_indexer(explotado["fila"].to_numpy())
+                con_fecha = valido[posiciones]
+                parcial = _contar(explotado["Hashtag"][con_fecha], minutos[posiciones][con_fecha])
+            else:
+                claves = df[columna] if columna in df else DERIVADAS[columna](df)
+                if columna in ACOTAR:
+                    claves = ACOTAR[columna](claves)
+                parcial = _contar(claves[valido], minutos[valido])
+            self._agregar(dimension, parcial)
+
+    def principales(self, dimension, n=10, excluir=()):
+        """Las `n` claves de `dimension` con más tweets, sin las de `excluir`."""
+        por_clave = self.tabla(dimension).groupby(level=0).sum()
+        por_clave = por_clave[~por_clave.index.isin(excluir)]
+        return por_clave.sort_values(ascending=False, kind="stable").head(n).index.tolist()
+
+    def serie(self, dimension="total", grano="D", claves=None, completa=True):
+        """Tweets por cubeta de `grano` sumando los minutos de cada una.
+
+        Para el total devuelve una Serie; para las demás dimensiones, una
+        tabla cubetas x claves (todas, o sólo `claves`). Con `completa`, las
+        cubetas sin tweets entre la primera y la última aparecen con 0.
+        """
+        paso = minutos_de(grano)
+        tabla = self.tabla(dimension)
+        if self.dimensiones[dimension] is None:
+            conteos = tabla.groupby(tabla.index // paso * paso).sum()
+        else:
+            if claves is not None:
+                tabla = tabla[tabla.index.get_level_values(0).isin(claves)]
+            cubetas = tabla.index.get_level_values(1) // paso * paso
+            conteos = tabla.groupby([cubetas, tabla.index.get_level_values(0)]).sum().unstack(fill_value=0)
+            if claves is not None:
+                conteos = conteos.reindex(columns=claves, fill_value=0)
+            conteos.columns.name = self.dimensiones[dimension]
+        if completa and len(conteos):
+            conteos = conteos.reindex(np.arange(conteos.index.min(), conteos.index.max() + paso, paso),
+                                      fill_value=0)
+        conteos.index = _a_fechas(conteos.index)
+        return conteos
+
+    def por_hora_del_dia(self, dimension, claves=None):
+        """Tabla claves x hora del día (0-23) de `dimension`.
+
+        Los conteos se agrupan por (clave, hora) sin formar la tabla, y sólo
+        se forma con `claves` (en ese orden) si se dan; así el tamaño
+        depende de cuántas se piden y no de cuántas claves distintas hay.
+        """
+        tabla = self.tabla(dimension)
+        if claves is not None:
+            tabla = tabla[tabla.index.get_level_values(0).isin(claves)]
+        horas = tabla.index.get_level_values(1) // 60 % 24
+        conteos = tabla.groupby([tabla.index.get_level_values(0).rename(self.dimensiones[dimension]),
+                                 horas.rename("Hora_int")]).sum()
+        conteos = conteos.unstack(fill_value=0)
+        if claves is not None:
+            conteos = conteos.reindex(index=claves, columns=range(24), fill_value=0)
+            conteos.index.name = self.dimensiones[dimension]
+            conteos.columns.name = "Hora_int"
+        return conteos
+
+    def ventana(self, dimension="total", grano="h", ventana=24, funcion="mean", claves=None):
+        """Estadística móvil (`funcion` de rolling) sobre `ventana` cubetas o un periodo ('6h')."""
+        return self.serie(dimension, grano, claves).rolling(ventana, min_periods=1).agg(funcion)
+
+    def picos(self, dimension="total", grano="min", ventana=60, umbral=UMBRAL_PICO,
+              minimo=MINIMO_PICO, claves=None):
+        """Episodios en los que la actividad se dispara (p. ej. un gol).
+
+        Cada cubeta se compara con la media y la desviación de las
+        `ventana` cubetas anteriores; es pico si las supera en `umbral`
+        desviaciones (la desviación vale al menos 1, para que un fondo casi
+        constante no dé picos con dos tweets) y tiene al menos `minimo`
+        tweets. Las cubetas de pico seguidas forman un episodio, del que se
+        da el inicio, el fin y el momento de mayor desviación. Para las
+        dimensiones con claves se miran `claves` o, si no se dan, las diez
+        principales.
+        """
+        paso = minutos_de(grano)
+        por_clave = self.dimensiones[dimension] is not None
+        if por_clave and claves is None:
+            claves = self.principales(dimension)
+        conteos = self.serie(dimension, grano, claves)
+        if not por_clave:
+            conteos = conteos.to_frame("total")
+        anteriores = conteos.rolling(ventana, min_periods=max(2, ventana // 2))
+        media = anteriores.mean().shift(1)
+        desviacion = anteriores.std().shift(1).clip(lower=1)
+        z = (conteos - media) / desviacion
+        es_pico = ((z >= umbral) & (conteos >= minimo)).to_numpy()
+
+        columnas, filas = np.nonzero(es_pico.T)
+        nuevo = np.ones(len(filas), dtype=bool)
+        nuevo[1:] = (columnas[1:] != columnas[:-1]) | (filas[1:] != filas[:-1] + 1)
+        puntos = pd.DataFrame({
+            "episodio": np.cumsum(nuevo),
+            "clave": conteos.columns[columnas],
+            "cubeta": conteos.index[filas],
+            "tweets": conteos.to_numpy()[filas, columnas],
+            "media": media.to_numpy()[filas, columnas],
+            "z": z.to_numpy()[filas, columnas],
+        })
+        grupos = puntos.groupby("episodio")
+        episodios = puntos.loc[grupos["z"].idxmax()].set_index("episodio").rename(columns={"cubeta": "pico"})
+        episodios.insert(1, "inicio", grupos["cubeta"].min())
+        episodios.insert(2, "fin", grupos["cubeta"].max() + pd.Timedelta(minutes=int(paso)))
+        episodios = episodios.sort_values("z", ascending=False, kind="stable").reset_index(drop=True)
+        if por_clave:
+            return episodios.rename(columns={"clave": self.dimensiones[dimension]})
+        return episodios.drop(columns="clave")
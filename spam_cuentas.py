@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+from analisis_hashtags import explotar_hashtags
+from cargar_y_limpiar_datos import instantes
+from duplicados import TablaOrdenada, SIN_GRUPO
+
+# Peso de cada señal en la puntuación (suman 1). Cada señal va de 0 a 1.
+PESOS = {
+    "tasa": 0.3,          # tweets por hora de actividad
+    "repetidos": 0.3,     # proporción de tweets que repiten uno anterior de la cuenta
+    "amigos": 0.1,        # amigos frente a seguidores
+    "hashtags": 0.1,      # hashtags por tweet
+    "audiencia": 0.2,     # la regla anterior: menos de 20 followers y 20 amigos
+}
+
+# Valores a partir de los cuales una señal vale 1
+TASA_ALTA = 20
+DENSIDAD_ALTA = 5
+AUDIENCIA_MINIMA = 20
+
+# Puntuación a partir de la cual una cuenta se considera spam
+UMBRAL_SPAM = 0.5
+
+# Columnas acumuladas por cuenta
+COLUMNAS = ["tweets", "repetidos", "inicio", "fin", "followers", "friends", "hashtags"]
+
+_SIN_INSTANTE_MIN = np.iinfo(np.int64).max
+_SIN_INSTANTE_MAX = np.iinfo(np.int64).min
+
+
+def hashtags_por_tweet(hashtags, explotado=None):
+    """Número de hashtags de cada fila de la columna 'Hashtags'.
+
+    `explotado` es explotar_hashtags(hashtags), si ya se tiene.
+    """
+    explotado = explotar_hashtags(hashtags) if explotado is None else explotado
+    filas = explotado["fila"].to_numpy()
+    return np.bincount(hashtags.index.get_indexer(filas), minlength=len(hashtags))
+
+
+def puntuar(cuentas):
+    """Añade las señales, la puntuación y 'es_spam' a las columnas de COLUMNAS.
+
+    Todo son operaciones por columna sobre la tabla de cuentas: no hay un
+    bucle por usuario.
+    """
+    cuentas = cuentas.copy()
+    horas = (cuentas["fin"] - cuentas["inicio"]).astype("float64") / 3.6e12
+    # Una cuenta con un solo tweet (o sin fechas válidas) cuenta como una hora
+    cuentas["tasa"] = cuentas["tweets"] / horas.fillna(0).clip(lower=1)
+    cuentas["proporcion_repetidos"] = cuentas["repetidos"] / cuentas["tweets"]
+    seguidores = cuentas["followers"].astype("float64")
+    amigos = cuentas["friends"].astype("float64")
+    cuentas["proporcion_amigos"] = (amigos / (seguidores + amigos)).fillna(0)
+    cuentas["densidad_hashtags"] = cuentas["hashtags"] / cuentas["tweets"]
+    cuentas["audiencia_baja"] = ((seguidores < AUDIENCIA_MINIMA) & (amigos < AUDIENCIA_MINIMA)).to_numpy()
+    senales = {
+        "tasa": (np.log1p(cuentas["tasa"]) / np.log1p(TASA_ALTA)).clip(upper=1),
+        "repetidos": cuentas["proporcion_repetidos"],
+        "amigos": cuentas["proporcion_amigos"],
+        "hashtags": (cuentas["densidad_hashtags"] / DENSIDAD_ALTA).clip(upper=1),
+        "audiencia": cuentas["audiencia_baja"].astype("float64"),
+    }
+    cuentas["puntuacion"] = sum(PESOS[nombre] * valor for nombre, valor in senales.items())
+    cuentas["es_spam"] = cuentas["puntuacion"] >= UMBRAL_SPAM
+    return cuentas.sort_values("puntuacion", ascending=False, kind="stable")
+
+
+class PuntuacionSpam:
+    """Señales de spam acumuladas por cuenta ('Name') bloque a bloque.
+
+    Sustituye la marca por fila (pocos followers y amigos) por una
+    puntuación por cuenta, así una cuenta muy activa cuenta una sola vez.
+    Cada cuenta recibe un id al aparecer por primera vez y las señales se
+    acumulan en arrays indexados por ese id con bincount y minimum/maximum.at,
+    de modo que cada bloque cuesta lo mismo sea cual sea el número de
+    cuentas ya vistas.
+
+    Un tweet es repetido si su cuenta ya publicó el mismo texto. Si el
+    bloque trae 'Grupo' (ver duplicados) se compara el grupo, y cuentan
+    también los casi duplicados.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._repetidos = TablaOrdenada()
+        self._datos = {
+            "tweets": np.zeros(0, dtype=np.int64),
+            "repetidos": np.zeros(0, dtype=np.int64),
+            "inicio": np.zeros(0, dtype=np.int64),
+            "fin": np.zeros(0, dtype=np.int64),
+            "followers": np.zeros(0, dtype=np.float64),
+            "friends": np.zeros(0, dtype=np.float64),
+            "hashtags": np.zeros(0, dtype=np.int64),
+        }
+
+    def _ampliar(self, cuentas):
+        capacidad = len(self._datos["tweets"])
+        if cuentas <= capacidad:
+            return
+        nueva = max(cuentas, 2 * capacidad)
+        iniciales = {"inicio": _SIN_INSTANTE_MIN, "fin": _SIN_INSTANTE_MAX, "followers": np.nan, "friends": np.nan}
+        for nombre, valores in self._datos.items():
+            ampliado = np.full(nueva, iniciales.get(nombre, 0), dtype=valores.dtype)
+            ampliado[:capacidad] = valores
+            self._datos[nombre] = ampliado
+
+    def _ids_de(self, nombres):
+        """Id de cuenta de cada fila (-1 sin nombre); da ids nuevos a las cuentas nuevas."""
+        codigos, unicos = pd.factorize(nombres)
+        ids = np.fromiter((self._ids.setdefault(nombre, len(self._ids)) for nombre in unicos),
+                          dtype=np.int64, count=len(unicos))
+        return np.where(codigos >= 0, ids[codigos] if len(ids) else -1, -1)
+
+    def _marcar_repetidos(self, df, ids):
+        if "Grupo" in df:
+            contenido = df["Grupo"].to_numpy()
+            con_texto = contenido != SIN_GRUPO
+        else:
+            contenido = df["Tweet"].to_numpy(dtype=object)
+            con_texto = df["Tweet"].notna().to_numpy()
+        con_texto &= ids >= 0
+        claves = pd.util.hash_pandas_object(
+            pd.DataFrame({"cuenta": ids[con_texto], "contenido": contenido[con_texto]}),
+            index=False, categorize=False).to_numpy()
+        repetido = np.zeros(len(df), dtype=bool)
+        repetido[con_texto] = (self._repetidos.buscar(claves) != SIN_GRUPO) | pd.Series(claves).duplicated().to_numpy()
+        self._repetidos.agregar(claves, np.zeros(len(claves), dtype=np.int64))
+        return repetido
+
+    def actualizar(self, df, explotado=None):
+        """Incorpora un bloque limpio (columnas del CSV más 'Dia'/'Hora_int').
+
+        `explotado` son los hashtags del bloque ya separados, si se tienen.
+        """
+        ids = self._ids_de(df["Name"])
+        self._ampliar(len(self._ids))
+        repetido = self._marcar_repetidos(df, ids)
+        instante, valido = instantes(df["Date"])
+        hashtags = hashtags_por_tweet(df["Hashtags"], explotado)
+        cuenta = ids >= 0
+        ids, repetido, hashtags = ids[cuenta], repetido[cuenta], hashtags[cuenta]
+        instante, valido = instante[cuenta], valido[cuenta]
+        datos = self._datos
+        n = len(datos["tweets"])
+        datos["tweets"] += np.bincount(ids, minlength=n)
+        datos["repetidos"] += np.bincount(ids, weights=repetido, minlength=n).astype(np.int64)
+        datos["hashtags"] += np.bincount(ids, weights=hashtags, minlength=n).astype(np.int64)
+        np.minimum.at(datos["inicio"], ids[valido], instante[valido])
+        np.maximum.at(datos["fin"], ids[valido], instante[valido])
+        for columna, nombre in (("Followers", "followers"), ("Friends", "friends")):
+            valores = df[columna].to_numpy(dtype="float64", na_value=np.nan)[cuenta]
+            conocido = ~np.isnan(valores)
+            np.fmax.at(datos[nombre], ids[conocido], valores[conocido])
+
+    def cuentas(self):
+        """Tabla de cuentas con señales y puntuación, de mayor a menor puntuación."""
+        n = len(self._ids)
+        tabla = pd.DataFrame({nombre: valores[:n] for nombre, valores in self._datos.items()},
+                             index=pd.Index(list(self._ids), name="Name", dtype=object))
+        sin_fecha = tabla["inicio"] == _SIN_INSTANTE_MIN
+        tabla[["inicio", "fin"]] = tabla[["inicio", "fin"]].astype("Int64").mask(sin_fecha)
+        return puntuar(tabla)
+
+
+def unir_puntuacion(df, cuentas):
+    """Añade a cada tweet 'Puntuacion_spam' y 'Cuenta_spam' de su cuenta.
+
+    `cuentas` es la tabla de PuntuacionSpam.cuentas(); los tweets sin
+    nombre quedan con NaN y sin marcar.
+    """
+    puntuacion = df["Name"].map(cuentas["puntuacion"]).astype("float64")
+    df["Puntuacion_spam"] = puntuacion
+    df["Cuenta_spam"] = puntuacion >= UMBRAL_SPAM
+    return df
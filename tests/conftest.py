@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import cargar_y_limpiar_datos  # noqa: E402
+from generar_tweets import generar_csv  # noqa: E402
+from recursos_locales import DetectorLocal  # noqa: E402
+
+# Nombres con sexo conocido para no depender de gender_guesser ni de la tabla generada
+GENEROS = {"Juan": "male", "Carlos": "male", "Diego": "male", "María": "female", "Lucía": "female",
+           "Sofía": "female", "Alex": "andy", "Andrea": "mostly_female"}
+
+
+def nulos_como_nan(datos):
+    """Serie o DataFrame con los nulos de texto como NaN.
+
+    Arrow (caché, dataset, DuckDB) devuelve None donde el CSV da NaN; pandas
+    avisa de que pronto no los considerará iguales al comparar.
+    """
+    if isinstance(datos, pd.Series):
+        return datos.where(datos.notna(), np.nan) if datos.dtype == object else datos
+    datos = datos.copy()
+    for columna in datos.columns[datos.dtypes == object]:
+        datos[columna] = nulos_como_nan(datos[columna])
+    return datos
+
+
+@pytest.fixture(autouse=True)
+def carpeta_temporal(tmp_path, monkeypatch):
+    """Cada prueba corre en su carpeta: las cachés e índices se escriben ahí."""
+    monkeypatch.chdir(tmp_path)
+    inferencia = cargar_y_limpiar_datos.inferencia_sexo
+    monkeypatch.setattr(inferencia, "_detector", DetectorLocal(GENEROS))
+    monkeypatch.setattr(inferencia, "ruta_cache", None)
+    return tmp_path
+
+
+@pytest.fixture
+def csv_tweets(tmp_path):
+    """CSV sintético de 3000 tweets (ver benchmarks/generar_tweets.py)."""
+    return generar_csv(str(tmp_path / "tweets.csv"), 3000)
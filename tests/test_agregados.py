@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pandas as pd
+
+import analisis
+import instrumentacion
+from agregados import AgregadosTweets
+from cargar_y_limpiar_datos import enriquecer_bloque, iterar_bloques
+from esquema import concatenar
+from grafo_tareas import GrafoTareas, Nodo
+
+CAMPOS = ("word_freq", "hashtag_freq", "tweets_por_dia", "sexo_counts", "plataformas_counts",
+          "likes_region", "promedio_palabras")
+
+
+def _resultados(file_path, **opciones):
+    with AgregadosTweets(procesos=1, **opciones) as agregados:
+        for bloque in iterar_bloques(file_path, tamano_bloque=700, usar_cache=False):
+            agregados.actualizar(bloque)
+    return agregados.resultados()
+
+
+def _iguales(a, b):
+    for campo in CAMPOS:
+        x, y = getattr(a, campo), getattr(b, campo)
+        if isinstance(x, pd.Series):
+            pd.testing.assert_series_equal(x, y)
+        else:
+            assert x == y, campo
+
+
+def test_grafo_en_hilos_igual_que_en_orden(csv_tweets):
+    _iguales(_resultados(csv_tweets, hilos=1), _resultados(csv_tweets, hilos=4))
+
+
+def test_grafo_calcula_solo_lo_necesario():
+    llamadas = []
+
+    def nodo(nombre, *entradas):
+        def funcion(*valores):
+            llamadas.append(nombre)
+            return nombre
+        return Nodo(nombre, entradas, funcion)
+
+    grafo = GrafoTareas([nodo("a", "x"), nodo("b", "a"), nodo("c", "a"), nodo("d", "x")])
+    valores = grafo.ejecutar(["b", "c"], {"x": 1})
+    assert sorted(llamadas) == ["a", "b", "c"]
+    assert valores["b"] == "b"
+
+
+def test_instrumentacion_marca_etapas_solapadas():
+    dentro = threading.Barrier(2)
+
+    def medir(nombre):
+        with instrumentacion.etapa(nombre):
+            dentro.wait()
+            dentro.wait()
+
+    medida = instrumentacion.activar()
+    try:
+        hilos = [threading.Thread(target=medir, args=(nombre,)) for nombre in ("a", "b")]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        with instrumentacion.etapa("c"):
+            pass
+    finally:
+        instrumentacion.desactivar()
+    assert medida.etapas["a"]["solapadas"] == medida.etapas["b"]["solapadas"] == 1
+    assert medida.etapas["c"]["solapadas"] == 0
+    assert "corrió a la vez" in medida.tabla()
+
+
+def test_sin_etapa_no_resta_dos_veces_las_anidadas():
+    medida = instrumentacion.activar()
+    try:
+        with instrumentacion.etapa("externa"):
+            with instrumentacion.etapa("interna"):
+                time.sleep(0.05)
+    finally:
+        instrumentacion.desactivar()
+    assert medida.etapas["interna"]["anidadas"] == 1 and medida.etapas["externa"]["anidadas"] == 0
+    assert medida.etapas["interna"]["segundos_externos"] == 0
+    sin_etapa = next(linea for linea in medida.tabla().splitlines() if linea.startswith("Sin etapa"))
+    assert float(sin_etapa.split()[-1]) >= 0
+
+
+def test_tracemalloc_ejecuta_los_pasos_en_orden(csv_tweets):
+    medida = instrumentacion.activar(tracemalloc=True)
+    try:
+        _resultados(csv_tweets, hilos=4, secciones=[5, 6, 8, 10])
+    finally:
+        instrumentacion.desactivar()
+    assert not any(datos["solapadas"] for datos in medida.etapas.values())
+    assert all("pico_python_mb" in datos for datos in medida.etapas.values())
+
+
+def test_procesos_de_palabras_antes_que_los_hilos():
+    with AgregadosTweets(procesos=2, hilos=4, secciones=[2]) as agregados:
+        # Los procesos ya existen antes del primer bloque (y del pool de hilos)
+        assert len(agregados.contador_palabras._pool._processes) == 2
+        assert agregados._ejecutor is None
+
+
+def _por_clave(serie):
+    return pd.Series(serie.to_numpy(), index=serie.index.astype(object)).sort_index()
+
+
+def test_likes_por_lugar_como_el_analisis_original(csv_tweets):
+    # Variantes de un mismo lugar y lugares fuera de la tabla de regiones
+    tweets = pd.read_csv(csv_tweets)
+    tweets.loc[::7, "Place"] = "CABA"
+    tweets.loc[3::7, "Place"] = [f"Pueblo {i % 40}" for i in range(len(tweets.loc[3::7]))]
+    tweets.to_csv(csv_tweets, index=False)
+
+    df = concatenar(enriquecer_bloque(b) for b in iterar_bloques(csv_tweets, usar_cache=False))
+    likes = df["Likes"].astype("float64")
+    resultados = analisis.calcular(csv_tweets, secciones=[12])
+    # Sección 12 como en data_analytics_2.py antes de la biblioteca común
+    originales = {
+        "likes_region": likes.groupby(df["Place"].astype(object).fillna("Sin región")).mean(),
+        "likes_sexo": likes.groupby(df["Sexo"], observed=True).mean(),
+        "likes_plataforma": likes.groupby(df["Plataforma"], observed=True).mean(),
+    }
+    for campo, original in originales.items():
+        pd.testing.assert_series_equal(_por_clave(getattr(resultados, campo)), _por_clave(original))
+    assert resultados.likes_region.is_monotonic_decreasing
+    assert "CABA" in resultados.likes_region.index and "Pueblo 1" in resultados.likes_region.index
+
+
+def test_series_solo_de_las_dimensiones_usadas(csv_tweets):
+    with AgregadosTweets(procesos=1) as agregados:
+        assert set(agregados.series.dimensiones) == {"total", "region"}
+    with AgregadosTweets(procesos=1, secciones=[2], series=("hashtag",)) as agregados:
+        for bloque in iterar_bloques(csv_tweets, tamano_bloque=700, usar_cache=False):
+            agregados.actualizar(bloque)
+    assert set(agregados.series.dimensiones) == {"hashtag"}
+    assert agregados.series.tabla("hashtag").sum() > 0
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from agregados import AgregadosTweets
+from cargar_y_limpiar_datos import iterar_bloques
+from conftest import nulos_como_nan
+from regiones import OTRAS_REGIONES
+
+pytest.importorskip("duckdb")
+from backend_sql import ConsultasSQL  # noqa: E402
+
+
+def _iguales(x, y):
+    pd.testing.assert_frame_equal(nulos_como_nan(pd.DataFrame(x)), nulos_como_nan(pd.DataFrame(y)),
+                                  check_dtype=False, check_index_type=False,
+                                  check_column_type=False, check_categorical=False)
+
+
+def test_sql_igual_que_pandas(csv_tweets):
+    # Lugares que no están en la tabla de regiones
+    tweets = pd.read_csv(csv_tweets)
+    tweets.loc[::10, "Place"] = [f"Pueblo {i}" for i in range(len(tweets[::10]))]
+    tweets.to_csv(csv_tweets, index=False)
+
+    with AgregadosTweets(procesos=1) as agregados:
+        for bloque in iterar_bloques(csv_tweets, tamano_bloque=700, usar_cache=False):
+            agregados.actualizar(bloque)
+    esperados = agregados.resultados()
+    with ConsultasSQL(csv_tweets) as consultas:
+        obtenidos = consultas.resultados()
+        series = consultas.series_tiempo()
+        total = consultas.series_tiempo(["total"])
+
+    for campo in vars(esperados):
+        x, y = getattr(esperados, campo), getattr(obtenidos, campo)
+        if campo in ("max_tweet", "min_tweet"):
+            assert x["Tweet"] == y["Tweet"], campo
+        elif isinstance(x, (pd.Series, pd.DataFrame)):
+            _iguales(x, y)
+        elif isinstance(x, float):
+            assert x == pytest.approx(y), campo
+        else:
+            assert x == y, campo
+    # Las series por minuto también acotan las regiones con OTRAS_REGIONES
+    pd.testing.assert_series_equal(series.tabla("region").sort_index(), agregados.series.tabla("region").sort_index(),
+                                   check_names=False, check_dtype=False, check_index_type=False)
+    assert OTRAS_REGIONES in series.tabla("region").index.get_level_values(0)
+    # Sólo el total: sin los GROUP BY de las demás dimensiones
+    assert set(total.dimensiones) == {"total"}
+    pd.testing.assert_series_equal(total.tabla(), series.tabla())
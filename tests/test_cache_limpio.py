@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from cargar_y_limpiar_datos import VERSION_CACHE, cargar_y_limpiar_datos, iterar_bloques
+from conftest import nulos_como_nan
+from esquema import concatenar
+
+pytest.importorskip("pyarrow")
+from cache_limpio import cache_vigente, ruta_cache  # noqa: E402
+
+FILA_NUEVA = "2022-12-18 15:00:00+00:00,¡Campeones!,Qatar2022,Juan Pérez,Twitter for iPhone,Doha,10,5,3,es\n"
+
+
+def _leer(file_path, **opciones):
+    return concatenar(iterar_bloques(file_path, tamano_bloque=700, **opciones))
+
+
+def test_cache_igual_que_leer_el_csv(csv_tweets):
+    sin_cache = _leer(csv_tweets, usar_cache=False)
+    guardando = _leer(csv_tweets)
+    assert cache_vigente(csv_tweets, ruta_cache(csv_tweets), VERSION_CACHE)
+    desde_cache = _leer(csv_tweets)
+    pd.testing.assert_frame_equal(guardando, sin_cache)
+    pd.testing.assert_frame_equal(nulos_como_nan(desde_cache), sin_cache, check_categorical=False)
+    pd.testing.assert_frame_equal(nulos_como_nan(cargar_y_limpiar_datos(csv_tweets)), sin_cache,
+                                  check_categorical=False)
+    # Con columnas, sólo esas (y las de fecha)
+    columnas = _leer(csv_tweets, columnas=["Likes"])
+    assert list(columnas.columns) == ["Date", "Likes", "Dia", "Hora_int"]
+    pd.testing.assert_series_equal(columnas["Likes"], sin_cache["Likes"])
+
+
+def test_cache_se_invalida_si_cambia_el_csv(csv_tweets):
+    antes = _leer(csv_tweets)
+    with open(csv_tweets, "a", encoding="utf-8") as f:
+        f.write(FILA_NUEVA)
+    assert not cache_vigente(csv_tweets, ruta_cache(csv_tweets), VERSION_CACHE)
+    despues = _leer(csv_tweets)
+    assert len(despues) == len(antes) + 1
+    assert cache_vigente(csv_tweets, ruta_cache(csv_tweets), VERSION_CACHE)
+
+
+def test_csv_que_crece_mientras_se_lee_no_deja_la_cache_vigente(csv_tweets):
+    bloques = iterar_bloques(csv_tweets, tamano_bloque=700)
+    next(bloques)
+    with open(csv_tweets, "a", encoding="utf-8") as f:
+        f.write(FILA_NUEVA)
+    for _ in bloques:
+        pass
+    # La clave es la del CSV antes de crecer: la caché no vale para el de ahora
+    assert not cache_vigente(csv_tweets, ruta_cache(csv_tweets), VERSION_CACHE)
+    pd.testing.assert_frame_equal(_leer(csv_tweets), _leer(csv_tweets, usar_cache=False))
+    assert cache_vigente(csv_tweets, ruta_cache(csv_tweets), VERSION_CACHE)
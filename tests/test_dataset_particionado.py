@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+import analisis
+from cargar_y_limpiar_datos import iterar_bloques
+from conftest import nulos_como_nan
+from esquema import concatenar
+from muestreo import MuestraEstratificada
+
+pytest.importorskip("pyarrow")
+from dataset_particionado import dataset_vigente, escribir_dataset  # noqa: E402
+
+DESDE, HASTA = "2022-11-25", "2022-12-02"
+CAMPOS = ("word_freq", "hashtag_freq", "tweets_por_dia", "sexo_counts", "plataformas_counts",
+          "max_tweet", "min_tweet", "likes_region", "cuentas_spam")
+
+
+def _iguales(a, b):
+    for campo in CAMPOS:
+        x, y = getattr(a, campo), getattr(b, campo)
+        if isinstance(x, pd.DataFrame):
+            pd.testing.assert_frame_equal(nulos_como_nan(x), nulos_como_nan(y))
+        elif isinstance(x, pd.Series):
+            pd.testing.assert_series_equal(nulos_como_nan(x), nulos_como_nan(y))
+        else:
+            assert x == y, campo
+
+
+@pytest.mark.parametrize("por_plataforma", [False, True])
+def test_dataset_igual_que_filtrar_el_csv(csv_tweets, por_plataforma):
+    opciones = dict(desde=DESDE, hasta=HASTA, secciones=[2, 3, 4, 5, 6, 8, 11, 12])
+    completo = analisis.calcular(csv_tweets, **opciones)
+    esperados = concatenar(iterar_bloques(csv_tweets, tamano_bloque=500, desde=DESDE, hasta=HASTA,
+                                          plataformas=["Android", "iPhone"], usar_cache=False))
+
+    escribir_dataset(csv_tweets, iterar_bloques(csv_tweets, usar_cache=False), por_plataforma=por_plataforma)
+    assert dataset_vigente(csv_tweets)
+    leidos = concatenar(iterar_bloques(csv_tweets, tamano_bloque=500, desde=DESDE, hasta=HASTA,
+                                       plataformas=["Android", "iPhone"]))
+    # Mismas filas, en el orden del CSV, con el mismo índice y sin la partición
+    pd.testing.assert_frame_equal(nulos_como_nan(leidos), esperados, check_categorical=False)
+    _iguales(analisis.calcular(csv_tweets, **opciones), completo)
+
+
+def test_muestra_del_dataset_igual_que_la_del_csv(csv_tweets):
+    opciones = dict(tamano_bloque=500, desde=DESDE, hasta=HASTA, columnas=["Tweet", "Likes"])
+    esperada = concatenar(iterar_bloques(csv_tweets, usar_cache=False, muestra=MuestraEstratificada(0.2),
+                                         **opciones))
+    escribir_dataset(csv_tweets, iterar_bloques(csv_tweets, usar_cache=False), por_plataforma=True)
+    leida = concatenar(iterar_bloques(csv_tweets, muestra=MuestraEstratificada(0.2), **opciones))
+    pd.testing.assert_frame_equal(nulos_como_nan(leida), nulos_como_nan(esperada), check_categorical=False)
+
+
+def test_dataset_no_queda_vigente_si_el_csv_crece_al_escribirlo(csv_tweets):
+    def bloques():
+        for i, bloque in enumerate(iterar_bloques(csv_tweets, tamano_bloque=700, usar_cache=False)):
+            if i == 1:
+                with open(csv_tweets, "a", encoding="utf-8") as f:
+                    f.write("2022-12-18 15:00:00+00:00,¡Campeones!,Qatar2022,Juan Pérez,Twitter for iPhone,"
+                            "Doha,10,5,3,es\n")
+            yield bloque
+
+    escribir_dataset(csv_tweets, bloques())
+    assert not dataset_vigente(csv_tweets)
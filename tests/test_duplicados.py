@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+import analisis
+from duplicados import SIN_GRUPO, Deduplicador, TablaOrdenada
+
+
+def _bloque(tweets):
+    return pd.DataFrame({"Tweet": pd.Series(tweets, dtype=object)})
+
+
+def test_retweets_copias_y_casi_duplicados():
+    base = "messi levanta la copa del mundo en lusail después de una final increíble contra francia"
+    with Deduplicador(procesos=1) as deduplicador:
+        primero = deduplicador.marcar(_bloque([base, "otro tweet sin relación con nada", None]))
+        segundo = deduplicador.marcar(_bloque([
+            f"RT @hincha: {base} https://t.co/abc",
+            base.replace("increíble", "inolvidable"),
+            "algo completamente distinto sobre el árbitro",
+        ]))
+    assert primero["Duplicado"].tolist() == [False, False, False]
+    assert primero["Grupo"].iloc[2] == -1
+    assert segundo["Duplicado"].tolist() == [True, True, False]
+    assert (segundo["Grupo"].iloc[:2] == primero["Grupo"].iloc[0]).all()
+    assert (deduplicador.exactos, deduplicador.cercanos) == (1, 1)
+
+
+def test_calcular_sin_duplicados(csv_tweets):
+    tweets = pd.read_csv(csv_tweets)
+    copias = tweets.sample(500, random_state=0).assign(Tweet=lambda d: "RT @bot: " + d["Tweet"], Name="Bot")
+    con_copias = csv_tweets.replace(".csv", "_copias.csv")
+    pd.concat([tweets, copias]).to_csv(con_copias, index=False)
+
+    original = analisis.calcular(csv_tweets, secciones=[2, 3])
+    sin_duplicados = analisis.calcular(con_copias, secciones=[2, 3], deduplicar=True)
+    con_duplicados = analisis.calcular(con_copias, secciones=[2, 3])
+    assert sin_duplicados.duplicados.exactos == 500
+    assert dict(sin_duplicados.hashtag_freq) == dict(original.hashtag_freq)
+    assert dict(sin_duplicados.word_freq) == dict(original.word_freq)
+    assert sum(n for _, n in con_duplicados.word_freq) > sum(n for _, n in original.word_freq)
+    assert np.any([titulo == "Tweets repetidos" for titulo, _ in analisis.textos(sin_duplicados, [2])])
+
+
+def test_tabla_ordenada_igual_que_un_diccionario():
+    rng = np.random.default_rng(0)
+    tabla, esperado = TablaOrdenada(), {}
+    for i in range(40):
+        # Claves repetidas dentro del bloque y con bloques anteriores
+        claves = rng.integers(0, 3000, rng.integers(1, 200), dtype=np.uint64)
+        grupos = np.arange(len(claves), dtype=np.int64) + 1000 * i
+        buscados = tabla.buscar(claves)
+        assert buscados.tolist() == [esperado.get(int(c), SIN_GRUPO) for c in claves]
+        tabla.agregar(claves, grupos)
+        for clave, grupo in zip(claves.tolist(), grupos.tolist()):
+            esperado.setdefault(clave, grupo)
+    assert len(tabla) == len(esperado)
+    # Pocos tramos aunque haya muchos bloques
+    assert len(tabla._tramos) <= 2 * np.log2(len(esperado))
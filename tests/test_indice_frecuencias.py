@@ -0,0 +1,76 @@
+import os
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+import indice_frecuencias
+from agregados import AgregadosTweets
+from cargar_y_limpiar_datos import iterar_bloques
+from indice_frecuencias import FrecuenciasSpaceSaving, actualizar_indice, ruta_indice
+from recursos_locales import cargar_stopwords
+
+
+def _conteos_exactos(file_path):
+    with AgregadosTweets(secciones=[2, 3]) as agregados:
+        for bloque in iterar_bloques(file_path, usar_cache=False):
+            agregados.actualizar(bloque)
+    return agregados.word_freq(20), agregados.hashtag_freq(20)
+
+
+def test_indice_igual_que_recorrer_el_csv(csv_tweets):
+    indice = actualizar_indice(csv_tweets)
+    palabras, hashtags = _conteos_exactos(csv_tweets)
+    assert indice.filas == 3000
+    assert dict(indice.palabras.top(20)) == dict(palabras)
+    assert dict(indice.hashtags.top(20)) == dict(hashtags)
+
+
+def test_fila_a_medio_escribir_se_cuenta_despues(csv_tweets):
+    with open(csv_tweets, "rb") as f:
+        contenido = f.read()
+    corte = contenido.rindex(b"\n", 0, len(contenido) - 1) + 20
+    with open(csv_tweets, "wb") as f:
+        f.write(contenido[:corte])
+    indice = actualizar_indice(csv_tweets)
+    assert indice.filas == 2999
+    assert indice.desplazamiento < corte
+
+    with open(csv_tweets, "ab") as f:
+        f.write(contenido[corte:])
+    assert indice.actualizar(csv_tweets) == 1
+    palabras, _ = _conteos_exactos(csv_tweets)
+    assert dict(indice.palabras.top(20)) == dict(palabras)
+
+
+def test_space_saving_acota_memoria_y_error():
+    conteos = Counter({f"raro{i}": 1 for i in range(5000)})
+    conteos.update({"messi": 900, "gol": 700, "final": 500})
+    resumen = FrecuenciasSpaceSaving(capacidad=100)
+    for termino, n in conteos.items():
+        resumen.sumar({termino: n})
+    assert len(resumen) == 100
+    assert [termino for termino, _ in resumen.top(3)] == ["messi", "gol", "final"]
+    for termino, n in resumen.top(3):
+        assert conteos[termino] <= n <= conteos[termino] + resumen.errores[termino]
+
+
+def test_modo_desconocido():
+    with pytest.raises(ValueError):
+        actualizar_indice("no_existe.csv", modo="otro")
+
+
+def test_un_indice_por_csv_y_se_rehace_si_cambian_las_stopwords(csv_tweets, tmp_path, monkeypatch):
+    otro = str(tmp_path / "otro.csv")
+    pd.read_csv(csv_tweets).head(100).to_csv(otro, index=False)
+    assert actualizar_indice(csv_tweets).filas == 3000
+    assert actualizar_indice(otro).filas == 100
+    assert os.path.exists(ruta_indice(csv_tweets)) and os.path.exists(ruta_indice(otro))
+    assert actualizar_indice(csv_tweets).filas == 3000
+
+    # Con otras stopwords los conteos guardados no valen: se cuenta de nuevo
+    palabra, _ = actualizar_indice(csv_tweets).palabras.top(1)[0]
+    monkeypatch.setattr(indice_frecuencias, "cargar_stopwords", lambda: cargar_stopwords() | {palabra})
+    indice = actualizar_indice(csv_tweets)
+    assert indice.filas == 3000
+    assert palabra not in dict(indice.palabras.top(20))
@@ -0,0 +1,123 @@
+import json
+
+import pandas as pd
+
+from cargar_y_limpiar_datos import iterar_bloques, leer_filas_nuevas, leer_jsonl_nuevas
+from esquema import concatenar
+from seguimiento_vivo import ArchivoSeguido
+
+CABECERA = "Date,Tweet,Hashtags,Name,Source,Place,Followers,Friends,Likes,lang\n"
+
+MULTILINEA = [
+    '2022-12-18 15:00:00+00:00,"¡Campeones!\nMessi, por fin",Qatar2022,Juan Pérez,Twitter for iPhone,"Doha, Qatar",10,5,3,es\n',
+    '2022-12-18 15:01:00+00:00,"dice ""gol""\ny nada más",,María López,Twitter for Android,,1,2,0,es\n',
+    '2022-12-18 15:02:00+00:00,"tres\nlíneas\nde tweet",ARG,Diego Díaz,Twitter Web App,Rosario,7,7,7,es\n',
+]
+
+
+def _leer_en_trozos(ruta, limite, lector=leer_filas_nuevas):
+    bloques, desplazamiento = [], 0
+    while True:
+        nuevos, siguiente = lector(ruta, desplazamiento, limite=limite)
+        bloques += nuevos
+        if siguiente == desplazamiento:
+            return bloques, desplazamiento
+        desplazamiento = siguiente
+
+
+def test_tweets_de_varias_lineas_en_trozos_pequenos(tmp_path):
+    ruta = tmp_path / "vivo.csv"
+    ruta.write_text(CABECERA + "".join(MULTILINEA), encoding="utf-8")
+    for limite in (1, 7, 20, 64, None):
+        bloques, desplazamiento = _leer_en_trozos(ruta, limite)
+        tweets = pd.concat(bloques)["Tweet"].tolist()
+        assert tweets == ["¡Campeones!\nMessi, por fin", 'dice "gol"\ny nada más', "tres\nlíneas\nde tweet"]
+        assert desplazamiento == ruta.stat().st_size
+
+
+def test_registro_a_medio_escribir_se_deja_para_despues(tmp_path):
+    ruta = tmp_path / "vivo.csv"
+    completo = MULTILINEA[0]
+    # Se corta dentro del campo entre comillas, después de su salto de línea
+    corte = completo.index("Messi")
+    ruta.write_text(CABECERA + completo[:corte], encoding="utf-8")
+    bloques, desplazamiento = leer_filas_nuevas(ruta, 0)
+    assert bloques == []
+    assert desplazamiento == len(CABECERA.encode())
+
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(completo[corte:] + MULTILINEA[1])
+    bloques, desplazamiento = leer_filas_nuevas(ruta, desplazamiento)
+    assert pd.concat(bloques)["Tweet"].tolist() == ["¡Campeones!\nMessi, por fin", 'dice "gol"\ny nada más']
+    assert desplazamiento == ruta.stat().st_size
+
+
+def test_csv_en_trozos_igual_que_de_una_vez(csv_tweets):
+    completo, fin = leer_filas_nuevas(csv_tweets, 0)
+    trozos, fin_trozos = _leer_en_trozos(csv_tweets, 4096)
+    assert fin == fin_trozos
+    pd.testing.assert_frame_equal(concatenar(completo), concatenar(trozos), check_categorical=False)
+
+
+def test_jsonl_con_saltos_escapados(tmp_path):
+    ruta = tmp_path / "vivo.jsonl"
+    registros = [{"Date": "2022-12-18 15:00:00", "Tweet": 'con "comillas"\ny salto', "Hashtags": ["ARG", "FRA"],
+                  "Name": "Juan", "Likes": 3},
+                 {"Date": "2022-12-18 15:01:00", "Tweet": "otro", "Name": "María"}]
+    contenido = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros)
+    ruta.write_text(contenido + '{"Tweet": "a medio', encoding="utf-8")
+    bloques, desplazamiento = _leer_en_trozos(ruta, 10, leer_jsonl_nuevas)
+    bloque = pd.concat(bloques)
+    assert bloque["Tweet"].tolist() == ['con "comillas"\ny salto', "otro"]
+    assert bloque["Hashtags"].iloc[0] == "ARG, FRA"
+    assert desplazamiento == len(contenido.encode())
+
+
+def test_desde_el_final_empieza_en_el_siguiente_registro(tmp_path):
+    ruta = tmp_path / "vivo.csv"
+    completo = MULTILINEA[0]
+    # El archivo termina dentro del campo entre comillas, justo después de un salto
+    corte = completo.index("Messi")
+    ruta.write_text(CABECERA + MULTILINEA[2] + completo[:corte], encoding="utf-8")
+    archivo = ArchivoSeguido(str(ruta), desde_el_final=True)
+    assert archivo.leer() == []
+
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(completo[corte:])
+    assert archivo.leer() == []
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(MULTILINEA[1])
+    assert pd.concat(archivo.leer())["Tweet"].tolist() == ['dice "gol"\ny nada más']
+
+
+def test_fila_mal_formada_se_salta(tmp_path, capsys):
+    ruta = tmp_path / "vivo.csv"
+    mala = "2022-12-18 15:03:00+00:00,sin números,,Ana,Twitter Web App,,muchos,2,0,es\n"
+    ruta.write_text(CABECERA + MULTILINEA[0] + mala + MULTILINEA[1], encoding="utf-8")
+    archivo = ArchivoSeguido(str(ruta))
+    assert pd.concat(archivo.leer())["Tweet"].tolist() == ["¡Campeones!\nMessi, por fin", 'dice "gol"\ny nada más']
+    assert archivo.desplazamiento == ruta.stat().st_size
+    assert "se salta el registro 1" in capsys.readouterr().err
+
+
+def test_jsonl_con_conteo_imposible_queda_nulo(tmp_path):
+    ruta = tmp_path / "vivo.jsonl"
+    registros = [{"Date": "2022-12-18 15:00:00", "Tweet": "bien", "Likes": 3},
+                 {"Date": "2022-12-18 15:01:00", "Tweet": "sin likes", "Likes": -1, "Followers": 2.5},
+                 {"Date": "2022-12-18 15:02:00", "Tweet": "también bien", "Likes": 1, "Friends": 2**32}]
+    ruta.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros), encoding="utf-8")
+    df = pd.concat(ArchivoSeguido(str(ruta)).leer())
+    assert df["Tweet"].tolist() == ["bien", "sin likes", "también bien"]
+    assert df["Likes"].tolist() == [3, pd.NA, 1]
+    assert df[["Followers", "Friends"]].isna().all().all()
+
+
+def test_conteo_negativo_del_csv_queda_nulo(tmp_path):
+    # Con dtype UInt32, read_csv convertía "-1" en 4294967295
+    ruta = tmp_path / "tweets.csv"
+    ruta.write_text(CABECERA + "2022-12-18 15:00:00+00:00,hola,,Ana,Twitter Web App,,-1,1.5,4294967296,es\n"
+                    "2022-12-18 15:01:00+00:00,chau,,Ana,Twitter Web App,,7,8,9,es\n", encoding="utf-8")
+    df = concatenar(iterar_bloques(str(ruta), usar_cache=False))
+    assert df[["Followers", "Friends", "Likes"]].iloc[0].isna().all()
+    assert df[["Followers", "Friends", "Likes"]].iloc[1].tolist() == [7, 8, 9]
+    assert df["Likes"].dtype == "UInt32"
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cargar_y_limpiar_datos import iterar_bloques
+from conftest import nulos_como_nan
+from esquema import concatenar
+from motor_agregacion import METRICAS, MotorAgregacion
+from muestreo import HyperLogLog, MuestraEstratificada
+
+
+@pytest.mark.parametrize("distintos", [100, 5000, 200_000])
+def test_hyperloglog_dentro_del_error(distintos):
+    hll = HyperLogLog()
+    valores = pd.Series([f"usuario{i}" for i in range(distintos)])
+    # Repetidos y en varios bloques: sólo cuentan los distintos
+    repetidos = pd.concat([valores, valores.sample(frac=0.5, random_state=0)])
+    for inicio in range(0, len(repetidos), 1000):
+        hll.agregar(repetidos.iloc[inicio:inicio + 1000])
+    assert abs(hll.estimar() - distintos) <= 4 * hll.error_relativo * distintos
+
+
+def test_hyperloglog_unir_igual_que_uno_solo():
+    a, b, juntos = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    primeros = pd.Series([f"a{i}" for i in range(3000)])
+    segundos = pd.Series([f"b{i}" for i in range(3000)])
+    a.agregar(primeros)
+    b.agregar(segundos)
+    juntos.agregar(pd.concat([primeros, segundos]))
+    a.unir(b)
+    assert a.estimar() == juntos.estimar()
+
+
+def _limpiar_y_muestrear(file_path, fraccion):
+    muestra = MuestraEstratificada(fraccion)
+    bloques = iterar_bloques(file_path, tamano_bloque=700, usar_cache=False)
+    return concatenar(muestra.filtrar(bloque) for bloque in bloques), muestra
+
+
+@pytest.mark.parametrize("usar_cache", [False, True])
+def test_muestra_antes_de_limpiar_igual_que_despues(csv_tweets, usar_cache):
+    if usar_cache:
+        pytest.importorskip("pyarrow")
+        # La primera lectura guarda la caché; la segunda muestrea sus lotes de Arrow
+        for _ in iterar_bloques(csv_tweets):
+            pass
+    esperada, referencia = _limpiar_y_muestrear(csv_tweets, 0.1)
+    muestra = MuestraEstratificada(0.1)
+    leida = concatenar(iterar_bloques(csv_tweets, tamano_bloque=700, usar_cache=usar_cache, muestra=muestra))
+    pd.testing.assert_frame_equal(nulos_como_nan(leida), nulos_como_nan(esperada), check_categorical=False)
+    assert (muestra.filas, muestra.muestra) == (referencia.filas, referencia.muestra) == (3000, len(esperada))
+    assert muestra.usuarios.estimar() == referencia.usuarios.estimar()
+
+
+def test_cuadrados_de_likes_solo_con_muestra():
+    bloque = pd.DataFrame({"Sexo": ["Hombre", "Mujer", "Hombre"], "Likes": pd.array([1, 2, 3], dtype="UInt32")})
+    metricas = [m for m in METRICAS if m.nombre == "likes_sexo"]
+    completo = MotorAgregacion(metricas)
+    completo.actualizar(bloque)
+    assert "likes_cuadrados" not in completo.acumulados[("Sexo",)]
+    with pytest.raises(ValueError):
+        completo.error_media("likes_sexo")
+
+    con_muestra = MotorAgregacion(metricas, dispersion=True)
+    con_muestra.actualizar(bloque)
+    assert con_muestra.error_media("likes_sexo").loc["Hombre", "n"] == 2
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from regiones import OTRAS_REGIONES, SIN_REGION, agrupar_otras, normalizar_regiones, regiones_conocidas
+from series_tiempo import SeriesTiempo
+
+
+def _bloque(lugares, inicio=0):
+    fechas = pd.date_range("2022-12-18 15:00", periods=len(lugares), freq="min")
+    return pd.DataFrame({"Date": fechas, "Place": pd.array(lugares, dtype=object)},
+                        index=pd.RangeIndex(inicio, inicio + len(lugares)))
+
+
+def test_lugares_fuera_de_la_tabla_van_juntos():
+    regiones = agrupar_otras(normalizar_regiones(pd.Series(["CABA", "Pueblo Chico", None, "Madrid", "Otro Pueblo"])))
+    assert regiones.tolist() == ["Buenos Aires, Argentina", OTRAS_REGIONES, SIN_REGION, "Madrid, España",
+                                 OTRAS_REGIONES]
+    assert set(regiones.cat.categories) <= set(regiones_conocidas()) | {OTRAS_REGIONES}
+
+
+def test_claves_de_region_acotadas_por_la_tabla():
+    series = SeriesTiempo({"region": "Region"})
+    for i in range(5):
+        lugares = [f"Pueblo {i}-{j}" for j in range(200)] + ["Rosario"] * 30 + ["CABA"] * 20
+        series.actualizar(_bloque(lugares, inicio=i * 250))
+    claves = set(series.tabla("region").index.get_level_values(0))
+    assert claves == {OTRAS_REGIONES, "Rosario, Argentina", "Buenos Aires, Argentina"}
+    # "Otros" tiene más tweets que nadie, pero no es una región
+    assert series.principales("region", 2, excluir=(OTRAS_REGIONES,)) == [
+        "Rosario, Argentina", "Buenos Aires, Argentina"]